@@ -0,0 +1,20 @@
+"""Execution harness for the Quality Tracker OpenCart test suite.
+
+The modules in this package are shared by the pytest fixtures in ``tests/``
+and by the GitHub workflows that run requirement dispatches.
+"""
+
+import os
+
+DEFAULT_BASE_URL = "https://demo.opencart.com.gr/"
+
+
+def base_url():
+    """Storefront URL the browser tests start from (``QT_BASE_URL`` overrides)."""
+    return os.environ.get("QT_BASE_URL", DEFAULT_BASE_URL)
+
+
+def storefront_url():
+    """The storefront under test, also when :func:`base_url` is a local proxy in
+    front of it (``QT_STOREFRONT_URL``, set by the HTTP cache)."""
+    return os.environ.get("QT_STOREFRONT_URL") or base_url()
@@ -0,0 +1,290 @@
+"""Content-addressed store for the large text fields of result payloads.
+
+Failures of one run tend to repeat the same bytes: pytest's session header,
+the same fixture traceback, the same Selenium error text.  With artifacts on
+(``python -m quality_tracker.runner --artifacts``), a result's ``rawOutput``,
+``failure.stackTrace`` and ``junitXml.content`` are put into an
+:class:`ArtifactStore` and the payload carries a reference instead::
+
+    {"artifact": "<digest>", "size": 48213, "chunks": ["<digest>", ...]}
+
+Text is cut into chunks at line boundaries chosen by the lines' own content,
+so an identical traceback produces identical chunks wherever it appears in a
+test's output, and each chunk is stored once under the hash of its bytes.
+Values shorter than :data:`INLINE_LIMIT` stay inline.
+
+At the end of the run all chunks are packed into one compressed bundle
+(``artifacts.qtb`` in the results directory).  ``verify`` checks a bundle
+and that every reference in results documents or event logs resolves to
+the original bytes, and ``expand`` rebuilds a document with the text
+inline::
+
+    python -m quality_tracker.artifacts verify test-results/artifacts.qtb current_results.json
+    python -m quality_tracker.artifacts expand current_results.json --bundle test-results/artifacts.qtb \\
+        --output expanded.json
+    python -m quality_tracker.artifacts pack test-results/worker-*/artifacts.qtb --output artifacts.qtb
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import zlib
+
+from .capture import compress, decompress
+from .results_store import iter_events
+
+BUNDLE_MAGIC = b"QTAB1\n"
+
+# Values up to this many bytes are not worth a reference
+INLINE_LIMIT = 512
+# Chunks end at a line boundary once they have MIN_CHUNK bytes and the
+# line's checksum has its low bits clear (about every 8 lines); no chunk is
+# longer than MAX_CHUNK
+MIN_CHUNK = 512
+MAX_CHUNK = 16384
+BOUNDARY_MASK = 0x7
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def chunk(data):
+    """Split bytes into content-defined chunks at line boundaries."""
+    chunks = []
+    start = position = 0
+    size = len(data)
+    while position < size:
+        newline = data.find(b"\n", position)
+        end = size if newline < 0 else newline + 1
+        while end - start > MAX_CHUNK:
+            chunks.append(data[start:start + MAX_CHUNK])
+            start += MAX_CHUNK
+        if end - start >= MIN_CHUNK and not zlib.crc32(data[position:end]) & BOUNDARY_MASK:
+            chunks.append(data[start:end])
+            start = end
+        position = end
+    if start < size:
+        chunks.append(data[start:])
+    return chunks
+
+
+def is_ref(value):
+    return isinstance(value, dict) and "artifact" in value and "chunks" in value
+
+
+class ArtifactStore:
+    """Chunks on disk under ``directory``, one file per content hash.
+
+    Writes are atomic and idempotent, so parallel workers can share a store.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._known = set()
+        self.refs = 0
+        self.logical_bytes = 0
+        self.new_bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _put_chunk(self, data):
+        key = digest(data)
+        if key in self._known:
+            return key
+        path = self._path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.new_bytes += len(data)
+        self._known.add(key)
+        return key
+
+    def put(self, text):
+        """Store ``text`` and return its reference."""
+        data = text.encode("utf-8")
+        self.refs += 1
+        self.logical_bytes += len(data)
+        return {"artifact": digest(data), "size": len(data), "chunks": [self._put_chunk(c) for c in chunk(data)]}
+
+    def ref(self, value):
+        """A reference for a long string; short strings and non-strings unchanged."""
+        if not isinstance(value, str) or len(value.encode("utf-8")) <= INLINE_LIMIT:
+            return value
+        return self.put(value)
+
+    def chunk_data(self, key):
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def keys(self):
+        if not os.path.isdir(self.directory):
+            return
+        for prefix in sorted(os.listdir(self.directory)):
+            directory = os.path.join(self.directory, prefix)
+            if os.path.isdir(directory):
+                yield from sorted(name for name in os.listdir(directory) if not name.endswith(".tmp"))
+
+    def summary_line(self):
+        saved = 1 - self.new_bytes / self.logical_bytes if self.logical_bytes else 0.0
+        return (f"Artifacts: {self.refs} references, {self.logical_bytes} bytes -> "
+                f"{self.new_bytes} new unique bytes ({saved:.0%} deduplicated)")
+
+
+def externalize(result, store):
+    """Replace a result's large text fields with references into ``store``."""
+    if "rawOutput" in result:
+        result["rawOutput"] = store.ref(result["rawOutput"])
+    failure = result.get("failure")
+    if failure and "stackTrace" in failure:
+        failure["stackTrace"] = store.ref(failure["stackTrace"])
+    junit = result.get("junitXml")
+    if junit and "content" in junit:
+        junit["content"] = store.ref(junit["content"])
+    return result
+
+
+def resolve(ref, chunks):
+    """The text of a reference, from ``chunks`` (digest -> bytes); checks the digest."""
+    data = b"".join(chunks[key] for key in ref["chunks"])
+    if len(data) != ref["size"] or digest(data) != ref["artifact"]:
+        raise ValueError(f"artifact {ref['artifact']} does not match its content")
+    return data.decode("utf-8")
+
+
+def _walk_refs(value):
+    """Yield ``(container, key)`` for every reference nested in a document."""
+    items = value.items() if isinstance(value, dict) else enumerate(value) if isinstance(value, list) else ()
+    for key, item in items:
+        if is_ref(item):
+            yield value, key
+        else:
+            yield from _walk_refs(item)
+
+
+def expand(document, chunks):
+    """Replace every reference in ``document`` (in place) with its text."""
+    for container, key in list(_walk_refs(document)):
+        container[key] = resolve(container[key], chunks)
+    return document
+
+
+def write_bundle(path, chunks):
+    """Pack ``(digest, bytes)`` pairs into one compressed bundle; returns its size."""
+    index, parts, offset = {}, [], 0
+    for key, data in chunks:
+        if key in index:
+            continue
+        index[key] = [offset, len(data)]
+        parts.append(data)
+        offset += len(data)
+    header = json.dumps({"chunks": index}, separators=(",", ":")).encode("utf-8")
+    packed = compress(BUNDLE_MAGIC + header + b"\n" + b"".join(parts))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(packed)
+    os.replace(tmp_path, path)
+    return len(packed)
+
+
+def read_bundle(path):
+    """``{digest: bytes}`` of a bundle."""
+    with open(path, "rb") as f:
+        raw = decompress(f.read())
+    if not raw.startswith(BUNDLE_MAGIC):
+        raise ValueError(f"{path} is not an artifact bundle")
+    header_end = raw.index(b"\n", len(BUNDLE_MAGIC))
+    index = json.loads(raw[len(BUNDLE_MAGIC):header_end])["chunks"]
+    data = memoryview(raw)[header_end + 1:]
+    return {key: bytes(data[offset:offset + length]) for key, (offset, length) in index.items()}
+
+
+def bundle_store(store, path):
+    """Write every chunk of ``store`` to a bundle at ``path``; returns its size."""
+    return write_bundle(path, ((key, store.chunk_data(key)) for key in store.keys()))
+
+
+def _load_documents(path):
+    """The documents of a results file (one JSON document) or an event log (JSONL)."""
+    if path.endswith(".jsonl"):
+        return [event for _, event in iter_events(path)]
+    with open(path, encoding="utf-8") as f:
+        return [json.load(f)]
+
+
+def verify(bundle_path, document_paths=()):
+    """Check a bundle's chunks and every reference in the documents; returns problems."""
+    problems = []
+    chunks = read_bundle(bundle_path)
+    for key, data in chunks.items():
+        if digest(data) != key:
+            problems.append(f"chunk {key} is corrupt")
+    refs = 0
+    for path in document_paths:
+        for document in _load_documents(path):
+            for container, key in _walk_refs(document):
+                refs += 1
+                ref = container[key]
+                missing = [c for c in ref["chunks"] if c not in chunks]
+                if missing:
+                    problems.append(f"{path}: artifact {ref['artifact']} misses {len(missing)} chunks")
+                    continue
+                try:
+                    resolve(ref, chunks)
+                except (ValueError, UnicodeDecodeError) as error:
+                    problems.append(f"{path}: {error}")
+    return len(chunks), refs, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.artifacts", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    verify_parser = commands.add_parser("verify", help="check a bundle and the references into it")
+    verify_parser.add_argument("bundle")
+    verify_parser.add_argument("documents", nargs="*", help="results documents or results.jsonl logs")
+    expand_parser = commands.add_parser("expand", help="write a results document with the text inline")
+    expand_parser.add_argument("document")
+    expand_parser.add_argument("--bundle", required=True)
+    expand_parser.add_argument("--output", required=True)
+    pack_parser = commands.add_parser("pack", help="combine stores and bundles into one bundle")
+    pack_parser.add_argument("sources", nargs="+", help="store directories or bundles")
+    pack_parser.add_argument("--output", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        count, refs, problems = verify(args.bundle, args.documents)
+        for problem in problems:
+            print(f"❌ {problem}")
+        print(f"{'❌' if problems else '✅'} {count} chunks, {refs} references checked, {len(problems)} problems")
+        return 1 if problems else 0
+
+    if args.command == "expand":
+        document = _load_documents(args.document)[0]
+        expand(document, read_bundle(args.bundle))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+        print(f"✅ Expanded {args.document} -> {args.output}")
+        return 0
+
+    def sources():
+        for source in args.sources:
+            if os.path.isdir(source):
+                store = ArtifactStore(source)
+                yield from ((key, store.chunk_data(key)) for key in store.keys())
+            else:
+                yield from read_bundle(source).items()
+
+    size = write_bundle(args.output, sources())
+    print(f"📦 Bundle written to {args.output} ({size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
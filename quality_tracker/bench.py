@@ -0,0 +1,362 @@
+"""Benchmarks of the test harness itself, with JSON baselines.
+
+Usage::
+
+    python -m quality_tracker.bench run [--only NAME ...] [--quick] [--output FILE]
+    python -m quality_tracker.bench compare BASELINE [CURRENT] [--threshold 0.2]
+
+``run`` times the parts of a run that are not the storefront itself:
+
+* ``browser_fixture``   -- launching, resetting and quitting pooled Chrome
+  (what ``TestOpenCart.browser`` and the admin ``driver`` fixture cost);
+  skipped when Chrome or selenium is not available
+* ``framework_overhead`` -- per-test cost of the runner, its plugins and
+  ``tests/conftest.py`` around a test that does nothing
+* ``catalog``           -- loading both catalogs and building the traceability
+  index at 1x, 100x and 10,000x synthetic scale (``--quick``: 1x and 100x)
+* ``junit_parse``       -- streaming extraction from a large JUnit report
+* ``results_log``       -- results event log appends and their compaction
+* ``callback_dispatch`` -- webhook throughput against the stand-in receiver
+
+and writes the numbers to ``.quality-tracker/benchmarks/latest.json`` (or
+``--output``).  Metric names say which way is better: ``...Seconds`` and
+``...Bytes`` should go down, ``...PerSecond`` up.  ``compare`` flags every
+metric that got worse than the baseline by more than ``--threshold`` (a
+fraction) and exits with status 1 if there is any.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import payloads
+from .catalog import (
+    REQUIREMENTS_FILE,
+    ROOT,
+    TEST_CASES_FILE,
+    _measure,
+    load_requirements,
+    load_test_cases,
+    write_synthetic_catalog,
+)
+
+BENCH_DIR = os.environ.get("QT_BENCH_DIR", os.path.join(ROOT, ".quality-tracker", "benchmarks"))
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "latest.json")
+DEFAULT_THRESHOLD = 0.2
+
+CATALOG_SCALES = (1, 100, 10000)
+QUICK_CATALOG_SCALES = (1, 100)
+
+_NOOP_TESTS = '''
+import pytest
+
+
+@pytest.mark.parametrize("index", range({count}))
+def test_noop_TC_BENCH(index):
+    pass
+'''
+
+
+def _best_of(repeat, function):
+    """Fastest of ``repeat`` timed calls, in seconds."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_browser_fixture(quick=False):
+    try:
+        from .browser_pool import BrowserPool, chrome_factory
+
+        pool = BrowserPool(
+            chrome_factory(headless=True, arguments=("--no-sandbox", "--disable-dev-shm-usage")),
+            start_url="about:blank", size=1, name="bench",
+        )
+        with pool.lease():
+            pass
+    except Exception as e:
+        return {"skipped": f"no browser: {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"}
+    # The lease above launched the pooled browser; from here on leases reuse it
+    leases = 3 if quick else 10
+    try:
+        started = time.perf_counter()
+        for _ in range(leases):
+            with pool.lease():
+                pass
+        pooled = (time.perf_counter() - started) / leases
+        started = time.perf_counter()
+        for _ in range(max(1, leases // 3)):
+            with pool.lease(fresh=True):
+                pass
+        fresh = (time.perf_counter() - started) / max(1, leases // 3)
+    finally:
+        pool.close()
+    stats = pool.stats
+    return {
+        "launchSeconds": round(stats.avg_launch, 4),
+        "resetSeconds": round(stats.avg_reset, 4),
+        "quitSeconds": round(stats.avg_quit, 4),
+        "pooledLeaseSeconds": round(pooled, 4),
+        "freshLeaseSeconds": round(fresh, 4),
+    }
+
+
+def _run_noop_session(directory, count):
+    with open(os.path.join(directory, "tests", "test_noop.py"), "w") as f:
+        f.write(_NOOP_TESTS.format(count=count))
+    env = {k: v for k, v in os.environ.items() if not k.startswith("QT_") and k != "CALLBACK_URL"}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (ROOT, env.get("PYTHONPATH"))))
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "quality_tracker.runner", "--test-ids", "TC_BENCH", "--tests-path", "tests",
+         "--", "-q", "-p", "no:cacheprovider"],
+        cwd=directory, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
+    )
+    return time.perf_counter() - started
+
+
+def bench_framework_overhead(quick=False):
+    count = 100 if quick else 500
+    directory = tempfile.mkdtemp(prefix="qt-bench-")
+    try:
+        os.makedirs(os.path.join(directory, "tests"))
+        # The real conftest, so its plugins and hooks are part of the cost
+        shutil.copy(os.path.join(ROOT, "tests", "conftest.py"), os.path.join(directory, "tests"))
+        shutil.copy(os.path.join(ROOT, "pytest.ini"), directory)
+        base = min(_run_noop_session(directory, 1) for _ in range(2))
+        full = min(_run_noop_session(directory, count + 1) for _ in range(2))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "sessionStartupSeconds": round(base, 3),
+        "perTestOverheadSeconds": round((full - base) / count, 5),
+    }
+
+
+def bench_catalog(quick=False):
+    from .traceability import TraceabilityIndex
+
+    results = {}
+    directory = tempfile.mkdtemp(prefix="qt-bench-")
+    try:
+        for scale in QUICK_CATALOG_SCALES if quick else CATALOG_SCALES:
+            test_cases_path = os.path.join(directory, f"test-cases-{scale}.json")
+            requirements_path = os.path.join(directory, f"requirements-{scale}.json")
+            write_synthetic_catalog(test_cases_path, TEST_CASES_FILE, scale)
+            write_synthetic_catalog(requirements_path, REQUIREMENTS_FILE, scale)
+            load_seconds, peak, _ = _measure(load_test_cases, test_cases_path)
+            requirements_seconds, _, _ = _measure(load_requirements, requirements_path)
+            test_cases, requirements = load_test_cases(test_cases_path), load_requirements(requirements_path)
+            started = time.perf_counter()
+            TraceabilityIndex(requirements, test_cases)
+            index_seconds = time.perf_counter() - started
+            del test_cases, requirements
+            results[f"x{scale}"] = {
+                "testCaseLoadSeconds": round(load_seconds, 4),
+                "testCaseLoadPeakBytes": peak,
+                "requirementLoadSeconds": round(requirements_seconds, 4),
+                "indexSeconds": round(index_seconds, 4),
+            }
+            os.remove(test_cases_path)
+            os.remove(requirements_path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def _write_junit(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?><testsuites><testsuite name="pytest">')
+        for index in range(count):
+            f.write(f'<testcase classname="tests.test_bench.TestBench" name="test_case_TC_{index:06d}" time="0.5">')
+            if index % 5 == 0:
+                f.write('<failure message="assert 1 == 2">' + "traceback line\n" * 40 + "E   assert 1 == 2</failure>")
+            f.write("<system-out>" + "captured output\n" * 20 + "</system-out></testcase>")
+        f.write("</testsuite></testsuites>")
+
+
+def bench_junit_parse(quick=False):
+    from .junit import result_payloads
+
+    count = 2000 if quick else 20000
+    fd, path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        _write_junit(path, count)
+        test_ids = [f"TC_{index:06d}" for index in range(0, count, 10)]
+        seconds = _best_of(2, lambda: list(result_payloads(path, test_ids)))
+        return {
+            "reportBytes": os.path.getsize(path),
+            "parseSeconds": round(seconds, 4),
+            "testcasesPerSecond": round(count / seconds),
+        }
+    finally:
+        os.remove(path)
+
+
+def bench_results_log(quick=False):
+    from .results_store import ResultsLog, compact
+
+    count = 1000 if quick else 10000
+    directory = tempfile.mkdtemp(prefix="qt-bench-")
+    try:
+        log_path = os.path.join(directory, "results.jsonl")
+        log = ResultsLog(log_path)
+        log.reset()
+        test_ids = [f"TC_{index:06d}" for index in range(count)]
+        log.begin("REQ-BENCH", "bench", test_ids)
+        raw_output = "captured output line\n" * 200
+        started = time.perf_counter()
+        for test_id in test_ids:
+            log.status(test_id, "Running", logs="Test running")
+            log.status(test_id, "Passed", 1.5, "Test passed", raw_output)
+        append_seconds = time.perf_counter() - started
+        log.close()
+        started = time.perf_counter()
+        compact(log_path, os.path.join(directory, "current_results.json"),
+                summary_path=os.path.join(directory, "execution_summary.json"))
+        compact_seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "eventsPerSecond": round(2 * count / append_seconds),
+        "compactSeconds": round(compact_seconds, 4),
+    }
+
+
+def bench_callback_dispatch(quick=False):
+    from .dispatcher import CallbackDispatcher
+    from .receiver import StandInReceiver
+
+    count = 500 if quick else 5000
+    with StandInReceiver() as receiver:
+        dispatcher = CallbackDispatcher(receiver.url, {"User-Agent": "quality-tracker-bench"}, request_id="bench")
+        started = time.perf_counter()
+        for index in range(count):
+            dispatcher.submit(payloads.result_entry(f"TC_{index:06d}", "Passed", 1.0))
+        dispatcher.close()
+        seconds = time.perf_counter() - started
+        stats = dispatcher.stats.as_dict()
+    return {
+        "resultsPerSecond": round(count / seconds),
+        "requests": stats["requests"],
+        "latencyP95Seconds": round(stats["latencyP95Ms"] / 1000, 4),
+    }
+
+
+BENCHMARKS = {
+    "browser_fixture": bench_browser_fixture,
+    "framework_overhead": bench_framework_overhead,
+    "catalog": bench_catalog,
+    "junit_parse": bench_junit_parse,
+    "results_log": bench_results_log,
+    "callback_dispatch": bench_callback_dispatch,
+}
+
+
+def run(names=None, quick=False, log=print):
+    results = {}
+    for name in names or BENCHMARKS:
+        log(f"⏱️ {name}...")
+        results[name] = BENCHMARKS[name](quick=quick)
+    return {
+        "timestamp": payloads.timestamp(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "benchmarks": results,
+    }
+
+
+def _flatten(tree, prefix=""):
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+def _direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 for informational metrics."""
+    name = metric.rsplit(".", 1)[-1]
+    if name.endswith("PerSecond"):
+        return 1
+    if name.endswith("Seconds") or name.endswith("Bytes"):
+        return -1
+    return 0
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return ``(metric, baseline value, current value, relative change)`` for regressions."""
+    before = dict(_flatten(baseline.get("benchmarks", {})))
+    regressions = []
+    for metric, value in _flatten(current.get("benchmarks", {})):
+        direction = _direction(metric)
+        old = before.get(metric)
+        if not direction or not old:
+            continue
+        change = (value - old) / old
+        if -direction * change > threshold:
+            regressions.append((metric, old, value, change))
+    return regressions
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.bench", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks and save the results")
+    run_parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run (default: all)")
+    run_parser.add_argument("--quick", action="store_true", help="smaller workloads, for a fast smoke check")
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT, help="results file (default: %(default)s)")
+    compare_parser = commands.add_parser("compare", help="flag regressions against a baseline")
+    compare_parser.add_argument("baseline", help="baseline results file")
+    compare_parser.add_argument("current", nargs="?", default=DEFAULT_OUTPUT,
+                                help="results to check (default: %(default)s)")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="allowed relative slowdown, e.g. 0.2 for 20%% (default: %(default)s)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "run":
+        results = run(args.only, args.quick)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        for name, metrics in results["benchmarks"].items():
+            if "skipped" in metrics:
+                print(f"  {name:<20} skipped ({metrics['skipped']})")
+                continue
+            for metric, value in _flatten(metrics):
+                print(f"  {name:<20} {metric:<40} {value}")
+        print(f"📊 Results written to {args.output}")
+        return 0
+
+    regressions = compare(_load(args.baseline), _load(args.current), args.threshold)
+    if not regressions:
+        print(f"✅ No regressions above {args.threshold:.0%} against {args.baseline}")
+        return 0
+    print(f"❌ {len(regressions)} regressions above {args.threshold:.0%} against {args.baseline}:")
+    for metric, old, new, change in regressions:
+        print(f"  {metric:<50} {old} -> {new} ({change:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""Worker-scoped pool of warm WebDriver instances.
+
+Starting and quitting Chrome costs more wall-clock time than many of the
+tests themselves, so each pytest worker keeps a few browsers alive and resets
+them between tests instead.  A reset closes extra tabs, clears cookies and
+local/session storage and navigates back to the start URL.  Tests that really
+need a new browser process can lease with ``fresh=True``.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from . import tracing
+
+DEFAULT_POOL_SIZE = int(os.environ.get("QT_BROWSER_POOL_SIZE", "2"))
+
+_CLEAR_STORAGE_JS = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+def chrome_factory(headless=False, maximize=False, arguments=(), debugger_address=None):
+    """Return a zero-argument callable that launches a configured Chrome.
+
+    With ``debugger_address`` ("host:port") the driver attaches to a Chrome
+    that is already running instead, and the other options do not apply.
+    """
+
+    def launch():
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        options = Options()
+        if debugger_address:
+            options.debugger_address = debugger_address
+            return webdriver.Chrome(options=options)
+        if headless:
+            options.add_argument("--headless")
+        for argument in arguments:
+            options.add_argument(argument)
+        driver = webdriver.Chrome(options=options)
+        if maximize:
+            driver.maximize_window()
+        return driver
+
+    return launch
+
+
+class PoolStats:
+    """Counters and timings reported at the end of the session."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.fresh = 0
+        self.discarded = 0
+        self.launch_seconds = 0.0
+        self.reset_seconds = 0.0
+        self.resets = 0
+        self.quit_seconds = 0.0
+        self.quits = 0
+
+    @property
+    def leases(self):
+        return self.hits + self.misses + self.fresh
+
+    @property
+    def avg_launch(self):
+        launches = self.misses + self.fresh
+        return self.launch_seconds / launches if launches else 0.0
+
+    @property
+    def avg_reset(self):
+        return self.reset_seconds / self.resets if self.resets else 0.0
+
+    @property
+    def avg_quit(self):
+        return self.quit_seconds / self.quits if self.quits else 0.0
+
+    def estimated_savings(self):
+        """Seconds saved versus a launch and a quit for every lease."""
+        per_hit = self.avg_launch + self.avg_quit
+        return self.hits * per_hit - self.reset_seconds
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fresh": self.fresh,
+            "discarded": self.discarded,
+            "resets": self.resets,
+            "avgLaunchSeconds": round(self.avg_launch, 3),
+            "avgResetSeconds": round(self.avg_reset, 3),
+            "avgQuitSeconds": round(self.avg_quit, 3),
+            "estimatedSavedSeconds": round(self.estimated_savings(), 3),
+        }
+
+
+class BrowserPool:
+    """Keeps up to ``size`` idle browsers for reuse within one process."""
+
+    def __init__(self, factory, start_url=None, size=DEFAULT_POOL_SIZE, name="browser"):
+        self.factory = factory
+        self.start_url = start_url
+        self.size = size
+        self.name = name
+        self.stats = PoolStats()
+        self._idle = []
+
+    def _launch(self):
+        started = time.perf_counter()
+        with tracing.span(f"launch {self.name}", "browser"):
+            driver = self.factory()
+            if self.start_url:
+                driver.get(self.start_url)
+        self.stats.launch_seconds += time.perf_counter() - started
+        return driver
+
+    def _quit(self, driver):
+        started = time.perf_counter()
+        with tracing.span(f"quit {self.name}", "browser"):
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.stats.quit_seconds += time.perf_counter() - started
+        self.stats.quits += 1
+
+    def acquire(self, fresh=False):
+        """Return a browser, reusing an idle one unless ``fresh`` is requested."""
+        if fresh:
+            self.stats.fresh += 1
+            return self._launch()
+        if self._idle:
+            self.stats.hits += 1
+            return self._idle.pop()
+        self.stats.misses += 1
+        return self._launch()
+
+    def reset(self, driver):
+        """Bring a used browser back to a clean state at the start URL.
+
+        Returns False when the browser is no longer usable.
+        """
+        started = time.perf_counter()
+        with tracing.span(f"reset {self.name}", "browser"):
+            try:
+                handles = driver.window_handles
+                for handle in handles[1:]:
+                    driver.switch_to.window(handle)
+                    driver.close()
+                driver.switch_to.window(handles[0])
+                driver.execute_script(_CLEAR_STORAGE_JS)
+                driver.delete_all_cookies()
+                if self.start_url:
+                    driver.get(self.start_url)
+                    # Storage is per origin, so clear again on the start page.
+                    driver.execute_script(_CLEAR_STORAGE_JS)
+                ok = True
+            except Exception:
+                ok = False
+        self.stats.reset_seconds += time.perf_counter() - started
+        self.stats.resets += 1
+        return ok
+
+    def release(self, driver, reusable=True):
+        """Return a browser to the pool, or quit it if it cannot be reused."""
+        if reusable:
+            if len(self._idle) < self.size and self.reset(driver):
+                self._idle.append(driver)
+                return
+            self.stats.discarded += 1
+        self._quit(driver)
+
+    @contextmanager
+    def lease(self, fresh=False):
+        """Context manager around :meth:`acquire` and :meth:`release`.
+
+        Browsers leased with ``fresh=True`` are quit afterwards so a test that
+        asked for its own process never leaves state behind for the next one.
+        """
+        driver = self.acquire(fresh=fresh)
+        try:
+            yield driver
+        finally:
+            self.release(driver, reusable=not fresh)
+
+    def close(self):
+        while self._idle:
+            self._quit(self._idle.pop())
+
+    def summary_line(self):
+        stats = self.stats
+        return (
+            f"{self.name}: {stats.hits} hits, {stats.misses} misses, "
+            f"{stats.fresh} fresh, {stats.discarded} discarded | "
+            f"launch {stats.avg_launch:.2f}s avg, reset {stats.avg_reset:.2f}s avg | "
+            f"~{stats.estimated_savings():.1f}s saved"
+        )
@@ -0,0 +1,122 @@
+"""Bounded capture of a test case's output.
+
+The output of a test case is written to an :class:`OutputCapture` piece by
+piece as its pytest items finish.  The capture keeps the first ``head``
+characters and a ring buffer of the last ``tail`` characters, so however
+verbose a test is, the memory it holds and the ``rawOutput`` it produces are
+bounded; what was dropped in between is replaced by an elision marker.  The
+full output is not lost: it streams straight into a compressed log file
+(``output-<id>.log.zst`` when the ``zstandard`` package is installed,
+``output-<id>.log.gz`` otherwise).
+"""
+
+import gzip
+import io
+import os
+from collections import deque
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .payloads import MAX_RAW_OUTPUT
+
+# Most of the budget goes to the tail, where pytest puts the failure summary
+HEAD_CHARS = MAX_RAW_OUTPUT * 2 // 5
+TAIL_CHARS = MAX_RAW_OUTPUT - HEAD_CHARS
+
+ELISION_MARKER = "\n\n[... {elided} characters elided ...]\n\n"
+
+
+def log_suffix():
+    return ".zst" if zstandard is not None else ".gz"
+
+
+def compress(data):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data)
+
+
+def decompress(data):
+    """Inverse of :func:`compress` (either codec, by magic number)."""
+    if data[:2] == b"\x1f\x8b":
+        return gzip.decompress(data)
+    if zstandard is None:
+        raise RuntimeError("zstd-compressed output needs the zstandard package")
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def _open_log(path):
+    if zstandard is not None:
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+        return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+    return gzip.open(path, "wt", encoding="utf-8", errors="replace")
+
+
+class OutputCapture:
+    """Head plus ring-buffered tail of a stream of text, optionally spooled to a log."""
+
+    def __init__(self, log_path=None, head=HEAD_CHARS, tail=TAIL_CHARS):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.total = 0
+        self._head = []
+        self._head_size = 0
+        self._tail = deque()
+        self._tail_size = 0
+        self.log_path = log_path
+        self._log = None
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            self._log = _open_log(log_path)
+
+    def write(self, text):
+        if not text:
+            return
+        self.total += len(text)
+        if self._log is not None:
+            self._log.write(text)
+        room = self.head_limit - self._head_size
+        if room > 0:
+            self._head.append(text[:room])
+            self._head_size += min(room, len(text))
+            text = text[room:]
+            if not text:
+                return
+        if len(text) > self.tail_limit:
+            # Only the end of an oversized write can survive in the tail
+            text = text[len(text) - self.tail_limit:]
+            self._tail.clear()
+            self._tail_size = 0
+        self._tail.append(text)
+        self._tail_size += len(text)
+        # Drop whole chunks that are entirely older than the tail window
+        while self._tail_size - len(self._tail[0]) >= self.tail_limit:
+            self._tail_size -= len(self._tail.popleft())
+
+    @property
+    def elided(self):
+        return max(0, self.total - self._head_size - min(self._tail_size, self.tail_limit))
+
+    def text(self):
+        """The retained output, with a marker where the middle was dropped."""
+        tail = "".join(self._tail)
+        if len(tail) > self.tail_limit:
+            tail = tail[len(tail) - self.tail_limit:]
+        head = "".join(self._head)
+        if self.elided:
+            return head + ELISION_MARKER.format(elided=self.elided) + tail
+        return head + tail
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
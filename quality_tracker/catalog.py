@@ -0,0 +1,322 @@
+"""Access to the requirement and test-case catalogs at the repository root.
+
+The catalogs are streamed rather than ``json.load``-ed: the top-level array is
+decoded one element at a time from a bounded buffer, and each element becomes
+a compact, slotted record.  Short attributes are kept, with repeated values
+(tags, priorities, statuses, versions, owners, requirement IDs) interned so a
+catalog of any size holds one copy of each.  Long text (``description``,
+``steps``, ``expectedResult``) is not kept at all; the record remembers where
+its element lies in the file and re-reads it when such a field is accessed.
+
+Records behave like the read-only dicts they replace (``record["id"]``,
+``record.get("tags")``, ``dict(record)``) and also expose the fields as
+attributes.
+
+Compare against plain ``json.load`` on a synthetic catalog::
+
+    python -m quality_tracker.catalog bench --scale 1000
+"""
+
+import argparse
+import codecs
+import gc
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_CASES_FILE = os.path.join(ROOT, "open-cart-test-cases.json")
+REQUIREMENTS_FILE = os.path.join(ROOT, "open-cart-requirement.json")
+
+# estimatedDuration in the catalog is expressed in minutes of manual execution;
+# DurationHistory.estimate_unit calibrates what one takes once tests have run
+ESTIMATE_UNIT_SECONDS = 60
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = {"": re.compile(r"[ \t\n\r]*"), ",": re.compile(r"[ \t\n\r,]*")}
+
+
+def iter_array(path, chunk_size=CHUNK_SIZE):
+    """Yield ``(offset, length, element)`` for each element of a top-level JSON array.
+
+    ``offset`` and ``length`` are in bytes, so the element can be read back
+    from the file later.  Memory use is bounded by the largest element rather
+    than by the file.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        buffer, position, byte_offset, eof, ascii = "", 0, 0, False, True
+
+        def fill():
+            nonlocal buffer, position, eof, ascii
+            # Read at least as much as is buffered so one huge element is not
+            # re-parsed from its start once per chunk
+            chunk = f.read(max(chunk_size, len(buffer) - position))
+            eof = not chunk
+            buffer = buffer[position:] + utf8.decode(chunk, final=eof)
+            position = 0
+            ascii = buffer.isascii()
+
+        def skip(separator):
+            # Advance over whitespace and separators; JSON whitespace is ASCII,
+            # so characters and bytes advance together
+            nonlocal position, byte_offset
+            while True:
+                end = _SEPARATORS[separator].match(buffer, position).end()
+                byte_offset += end - position
+                position = end
+                if position < len(buffer) or eof:
+                    return
+                fill()
+
+        skip("")
+        if buffer[position:position + 1] == "\ufeff":
+            position += 1
+            byte_offset += 3
+            skip("")
+        if buffer[position:position + 1] != "[":
+            raise ValueError(f"{path}: expected a JSON array")
+        position += 1
+        byte_offset += 1
+        while True:
+            skip(",")
+            if position >= len(buffer):
+                raise ValueError(f"{path}: unterminated JSON array")
+            if buffer[position] == "]":
+                return
+            try:
+                element, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            length = end - position if ascii else len(buffer[position:end].encode("utf-8"))
+            yield byte_offset, length, element
+            byte_offset += length
+            position = end
+            if position > chunk_size:
+                buffer, position = buffer[position:], 0
+
+
+def _intern(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(_intern(item) for item in value)
+    return value
+
+
+class CatalogRecord:
+    """Read-only mapping over one catalog element with lazily loaded text fields."""
+
+    __slots__ = ("_path", "_offset", "_length", "_lazy", "_extra")
+
+    FIELDS = ()
+    INTERNED = ()
+    LAZY = ()
+
+    @classmethod
+    def from_element(cls, path, offset, length, element):
+        record = cls.__new__(cls)
+        record._path = path
+        record._offset = offset
+        record._length = length
+        for field in cls.FIELDS:
+            value = element.pop(field, None)
+            setattr(record, field, _intern(value) if field in cls.INTERNED else value)
+        lazy = tuple(field for field in cls.LAZY if element.pop(field, None) is not None)
+        record._lazy = lazy if lazy != cls.LAZY else cls.LAZY
+        # Anything the schema does not know about is kept as-is
+        record._extra = element or None
+        return record
+
+    def _load(self):
+        with open(self._path, "rb") as f:
+            f.seek(self._offset)
+            raw = f.read(self._length)
+        try:
+            element = json.loads(raw)
+        except ValueError:
+            element = None
+        if not isinstance(element, dict) or element.get("id") != self.id:
+            raise RuntimeError(f"{self._path} changed since {self.id} was loaded")
+        return element
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            if value is None:
+                raise KeyError(key)
+            return value
+        if key in self._lazy:
+            return self._load()[key]
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __getattr__(self, name):
+        # Only reached for names that are not slots, i.e. the lazy fields
+        if name in type(self).LAZY:
+            return self._load().get(name)
+        raise AttributeError(name)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def keys(self):
+        keys = [field for field in self.FIELDS if getattr(self, field) is not None]
+        return keys + list(self._lazy) + list(self._extra or ())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def to_dict(self):
+        """The full element as stored in the file, text fields included."""
+        return self._load()
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}>"
+
+
+class TestCase(CatalogRecord):
+    __slots__ = ("id", "name", "status", "automationStatus", "automationPath", "lastExecuted",
+                 "requirementIds", "version", "executedBy", "tags", "priority", "estimatedDuration")
+    # Not a pytest test class, despite the name
+    __test__ = False
+
+    FIELDS = __slots__
+    INTERNED = ("status", "automationStatus", "automationPath", "requirementIds", "version",
+                "executedBy", "tags", "priority")
+    LAZY = ("description", "steps", "expectedResult")
+
+
+class Requirement(CatalogRecord):
+    __slots__ = ("id", "name", "priority", "type", "businessImpact", "technicalComplexity",
+                 "regulatoryFactor", "usageFrequency", "versions", "status", "owner", "tags")
+
+    FIELDS = __slots__
+    INTERNED = ("priority", "type", "versions", "status", "owner", "tags")
+    LAZY = ("description",)
+
+
+def _iter_records(cls, path):
+    path = sys.intern(os.path.abspath(path))
+    for offset, length, element in iter_array(path):
+        yield cls.from_element(path, offset, length, element)
+
+
+def iter_test_cases(path=TEST_CASES_FILE):
+    return _iter_records(TestCase, path)
+
+
+def iter_requirements(path=REQUIREMENTS_FILE):
+    return _iter_records(Requirement, path)
+
+
+def load_test_cases(path=TEST_CASES_FILE):
+    return list(iter_test_cases(path))
+
+
+def load_requirements(path=REQUIREMENTS_FILE):
+    return list(iter_requirements(path))
+
+
+def estimated_units(path=TEST_CASES_FILE):
+    """Map TC ID -> catalog ``estimatedDuration``, in catalog units (missing ones skipped)."""
+    estimates = {}
+    for test_case in iter_test_cases(path):
+        value = test_case.estimatedDuration
+        if isinstance(value, (int, float)) and value > 0:
+            estimates[test_case.id] = value
+    return estimates
+
+
+def write_synthetic_catalog(path, source=TEST_CASES_FILE, scale=100):
+    """Write ``scale`` renumbered copies of a catalog, element by element."""
+    with open(source, encoding="utf-8") as f:
+        template = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for copy in range(scale):
+            for position, element in enumerate(template):
+                if copy or position:
+                    f.write(",\n")
+                json.dump(dict(element, id=f"{element['id']}-{copy:06d}"), f, indent=2)
+        f.write("]\n")
+    return len(template) * scale
+
+
+def _measure(load, path):
+    # Timed and traced separately: tracemalloc slows allocation-heavy code a lot
+    gc.collect()
+    started = time.perf_counter()
+    records = load(path)
+    elapsed = time.perf_counter() - started
+    del records
+    gc.collect()
+    tracemalloc.start()
+    records = load(path)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return elapsed, peak, retained
+
+
+def _json_load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def benchmark(scale=100, source=TEST_CASES_FILE):
+    """Load time, peak and retained memory of ``json.load`` vs. the streaming loader."""
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        count = write_synthetic_catalog(path, source, scale)
+        results = {"testCases": count, "fileBytes": os.path.getsize(path)}
+        for name, load in (("json.load", _json_load), ("streaming", load_test_cases)):
+            elapsed, peak, retained = _measure(load, path)
+            results[name] = {"seconds": round(elapsed, 3), "peakBytes": peak, "retainedBytes": retained}
+        return results
+    finally:
+        os.remove(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.catalog", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="compare the streaming loader with json.load")
+    bench.add_argument("--scale", type=int, default=100, help="copies of the test-case catalog to load")
+    bench.add_argument("--source", default=TEST_CASES_FILE)
+    bench.add_argument("--json", action="store_true", help="print the raw results as JSON")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.scale, args.source)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"📊 {results['testCases']} test cases, {results['fileBytes'] / 2**20:.1f} MiB")
+    for name in ("json.load", "streaming"):
+        entry = results[name]
+        print(f"  {name:<10} {entry['seconds']:>8.3f}s  peak {entry['peakBytes'] / 2**20:>8.1f} MiB  "
+              f"retained {entry['retainedBytes'] / 2**20:>8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Count the WebDriver commands each test sends to chromedriver.
+
+Every Selenium call -- on the driver or on a ``WebElement`` -- goes through
+``WebDriver.execute`` as one HTTP round trip.  :func:`instrument` wraps that
+method on a driver instance, and :class:`CommandReport` (a pytest plugin)
+attributes the commands issued during each test's call phase to that test,
+so the effect of batching (page objects, the locator resolver) can be tracked.
+With tracing on, each command is also a span (see :mod:`quality_tracker.tracing`).
+"""
+
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from . import tracing
+
+
+class CommandCounter:
+    """Commands by name while it is the active counter."""
+
+    def __init__(self):
+        self.commands = Counter()
+
+    @property
+    def total(self):
+        return sum(self.commands.values())
+
+
+_counter = None
+
+
+def instrument(driver):
+    """Count this driver's commands from now on (idempotent)."""
+    if getattr(driver, "_quality_tracker_counted", False):
+        return driver
+    execute = driver.execute
+
+    def counted(driver_command, params=None):
+        counter = _counter
+        if counter is not None:
+            counter.commands[driver_command] += 1
+        tracer = tracing._tracer
+        if tracer is None:
+            return execute(driver_command, params)
+        category = "navigation" if driver_command == "get" else "webdriver"
+        with tracer.span(driver_command, category):
+            return execute(driver_command, params)
+
+    driver.execute = counted
+    driver._quality_tracker_counted = True
+    return driver
+
+
+class CommandReport:
+    """pytest plugin: WebDriver commands per test."""
+
+    def __init__(self):
+        self.tests = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        global _counter
+        counter = _counter = CommandCounter()
+        try:
+            yield
+        finally:
+            _counter = None
+        self.tests[item.nodeid] = {"total": counter.total, "commands": dict(counter.commands)}
+        item.user_properties.append(("webdriverCommands", counter.total))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        counted = {nodeid: entry for nodeid, entry in self.tests.items() if entry["total"]}
+        if not counted:
+            return
+        by_command = Counter()
+        for entry in counted.values():
+            by_command.update(entry["commands"])
+        terminalreporter.section("webdriver commands")
+        terminalreporter.write_line(
+            f"{sum(by_command.values())} commands in {len(counted)} tests; most used: "
+            + ", ".join(f"{name} {count}" for name, count in by_command.most_common(5))
+        )
+        for nodeid, entry in sorted(counted.items(), key=lambda pair: -pair[1]["total"])[:10]:
+            terminalreporter.write_line(f"  {entry['total']:5d}  {nodeid}")
+
+        report_path = os.environ.get("QT_COMMAND_REPORT")
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(self.tests, f, indent=2)
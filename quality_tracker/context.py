@@ -0,0 +1,38 @@
+"""Run-level settings shared by the runner and its reporters."""
+
+import os
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RunContext:
+    """What a ``quality-tracker-test-run`` dispatch asked us to execute."""
+
+    requirement_id: str = ""
+    requirement_name: str = ""
+    request_id: str = ""
+    callback_url: str = ""
+    run_id: str = ""
+    test_ids: list = field(default_factory=list)
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """Build the context from the variables the workflows export."""
+        env = os.environ if environ is None else environ
+        return cls(
+            requirement_id=env.get("REQUIREMENT_ID", ""),
+            requirement_name=env.get("REQUIREMENT_NAME", ""),
+            request_id=env.get("REQUEST_ID", ""),
+            callback_url=env.get("CALLBACK_URL", ""),
+            run_id=env.get("GITHUB_RUN_ID", ""),
+            test_ids=parse_test_ids(env.get("TEST_CASE_IDS", "")),
+        )
+
+
+def parse_test_ids(value):
+    """Split a whitespace or comma separated TC ID list, dropping duplicates."""
+    seen = []
+    for test_id in value.replace(",", " ").split():
+        if test_id not in seen:
+            seen.append(test_id)
+    return seen
@@ -0,0 +1,309 @@
+"""Read-only tests in isolated browser contexts of one shared Chrome.
+
+Tests that only read public pages (home page, search, product listings,
+currency selection) are marked ``@pytest.mark.shared_browser``.  With shared
+contexts on (``python -m quality_tracker.runner --shared-contexts``, or
+``QT_SHARED_CONTEXTS=on``), such a test does not lease a Chrome process from
+the :class:`~quality_tracker.browser_pool.BrowserPool`: it gets a tab in a new
+browser context (``Target.createBrowserContext``, what an incognito window
+is) of a Chrome the worker keeps for that purpose.  A context has its own
+cookie jar, storage and cache, and is disposed after the test, so there is
+nothing to reset and nothing leaks into the next test.
+
+A context costs a renderer, not a browser process.  A parallel run with
+``--shared-contexts`` starts one :class:`SharedChrome` (``QT_CHROME_BINARY``,
+or the first Chrome on the PATH) and every worker attaches to it through
+``QT_SHARED_CHROME``, so all the workers' contexts run side by side in a
+single browser; set ``QT_SHARED_CHROME=host:port`` to use a Chrome started
+elsewhere with ``--remote-debugging-port``.  A serial run, or one where no
+Chrome could be started, hosts its contexts in a Chrome of its own.  Like
+the storefront pool's browsers, the host runs maximized, and every context's
+window gets the size of the host's first window.
+
+A test falls back to a dedicated pooled process when it is not marked, when
+it asks for ``fresh_browser``, when it starts logged in (``session`` marker),
+or when the browser cannot create contexts.  The terminal summary (and
+``QT_CONTEXT_REPORT``, a JSON path) shows each context's JS heap and DOM size
+at the end of its test, the host browser's resident memory, the throughput of
+the shared tests and why the others ran in their own process.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+
+from . import tracing
+
+SHARED_CONTEXTS = os.environ.get("QT_SHARED_CONTEXTS", "off") == "on"
+SHARED_CHROME = os.environ.get("QT_SHARED_CHROME", "")
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+# Performance.getMetrics names kept per context
+_METRICS = {"JSHeapUsedSize": "jsHeapBytes", "Nodes": "domNodes", "Documents": "documents"}
+
+
+def refusal(item):
+    """Why a test may not run in a shared context; None when it may."""
+    if item.get_closest_marker("shared_browser") is None:
+        return "not marked shared_browser"
+    if item.get_closest_marker("fresh_browser") is not None:
+        return "fresh_browser"
+    marker = item.get_closest_marker("session")
+    if marker is not None and marker.args and marker.args[0] is not None:
+        return "logged-in session"
+    return None
+
+
+def _first_line(error):
+    text = str(error).strip()
+    return text.splitlines()[0] if text else type(error).__name__
+
+
+def _tree_rss(pid):
+    """Resident bytes of a process and its descendants (Linux only; None elsewhere)."""
+    try:
+        children = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat") as f:
+                        # The command name may contain spaces; fields resume after ")"
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                except (OSError, IndexError, ValueError):
+                    continue
+                children.setdefault(ppid, []).append(int(entry))
+        total, pending = 0, [pid]
+        while pending:
+            current = pending.pop()
+            pending += children.get(current, [])
+            try:
+                with open(f"/proc/{current}/statm") as f:
+                    total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            except (OSError, IndexError, ValueError):
+                pass
+        return total
+    except OSError:
+        return None
+
+
+class SharedChrome:
+    """A maximized Chrome with remote debugging on a free local port, for workers to attach to."""
+
+    def __init__(self, binary=None, startup_timeout=30.0):
+        self.binary = binary or os.environ.get("QT_CHROME_BINARY") or next(
+            (path for path in map(shutil.which, CHROME_BINARIES) if path), None)
+        self.startup_timeout = startup_timeout
+        self.address = None
+        self.peak_rss_bytes = None
+        self._process = None
+        self._profile = None
+
+    def start(self):
+        """Launch Chrome and wait until it accepts connections; returns its "host:port"."""
+        if not self.binary:
+            raise RuntimeError(f"no Chrome binary found (tried {', '.join(CHROME_BINARIES)}; set QT_CHROME_BINARY)")
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        self._profile = tempfile.mkdtemp(prefix="qt-shared-chrome-")
+        self._process = subprocess.Popen(
+            [self.binary, f"--remote-debugging-port={port}", f"--user-data-dir={self._profile}",
+             "--start-maximized", "--no-first-run", "--no-default-browser-check", "about:blank"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                self.stop()
+                raise RuntimeError(f"{self.binary} exited with code {self._process.returncode}")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=1).close()
+            except OSError:
+                time.sleep(0.2)
+                continue
+            self.address = f"127.0.0.1:{port}"
+            return self.address
+        self.stop()
+        raise RuntimeError(f"{self.binary} did not open port {port} within {self.startup_timeout:.0f}s")
+
+    def sample_rss(self):
+        """Record the browser's resident memory (all its processes) if it is higher than before."""
+        if self._process is not None and self._process.poll() is None:
+            rss = _tree_rss(self._process.pid)
+            if rss is not None:
+                self.peak_rss_bytes = max(self.peak_rss_bytes or 0, rss)
+
+    def stop(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        if self._profile:
+            shutil.rmtree(self._profile, ignore_errors=True)
+            self._profile = None
+
+
+class ContextStats:
+    """Per-context records and fallback reasons reported at the end of the session."""
+
+    def __init__(self):
+        self.contexts = []
+        self.dedicated = Counter()
+        self.launch_seconds = 0.0
+        self.open_seconds = 0.0
+        self.close_seconds = 0.0
+        self.test_seconds = 0.0
+        self.host_rss_bytes = None
+
+    @property
+    def leases(self):
+        return len(self.contexts)
+
+    @property
+    def avg_overhead(self):
+        return (self.open_seconds + self.close_seconds) / self.leases if self.leases else 0.0
+
+    @property
+    def tests_per_minute(self):
+        busy = self.test_seconds + self.open_seconds + self.close_seconds
+        return 60.0 * self.leases / busy if busy else 0.0
+
+    def as_dict(self):
+        return {
+            "contexts": self.contexts,
+            "sharedTests": self.leases,
+            "dedicatedTests": dict(self.dedicated),
+            "launchSeconds": round(self.launch_seconds, 3),
+            "avgContextOverheadSeconds": round(self.avg_overhead, 3),
+            "testsPerMinute": round(self.tests_per_minute, 1),
+            "hostRssBytes": self.host_rss_bytes,
+        }
+
+
+class ContextPool:
+    """One host browser per worker; each lease is a fresh isolated context in it."""
+
+    def __init__(self, factory, start_url=None, name="shared", enabled=SHARED_CONTEXTS, attached=False):
+        self.factory = factory
+        self.start_url = start_url
+        self.name = name
+        self.enabled = enabled
+        # An attached host is shared with other workers; its memory is the run's to report
+        self.attached = attached
+        self.stats = ContextStats()
+        self.unavailable = None
+        self.host = None
+        self._home = None
+        self._window = {}
+
+    def _host(self):
+        if self.host is None:
+            started = time.perf_counter()
+            with tracing.span(f"launch {self.name} host", "browser"):
+                self.host = self.factory()
+                self._home = self.host.current_window_handle
+                size = self.host.get_window_size()
+                self._window = {"width": size["width"], "height": size["height"]}
+            self.stats.launch_seconds += time.perf_counter() - started
+        return self.host
+
+    def _sample_rss(self):
+        service = getattr(self.host, "service", None)
+        process = getattr(service, "process", None)
+        if process is None or self.attached:
+            return
+        rss = _tree_rss(process.pid)
+        if rss is not None:
+            self.stats.host_rss_bytes = max(self.stats.host_rss_bytes or 0, rss)
+
+    def open(self):
+        """A new context with one tab on the start URL, switched to; None if contexts do not work."""
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"open {self.name} context", "browser"):
+                host = self._host()
+                context_id = host.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+                target_id = host.execute_cdp_cmd(
+                    "Target.createTarget",
+                    {"url": self.start_url or "about:blank", "browserContextId": context_id,
+                     "newWindow": True, **self._window},
+                )["targetId"]
+                # chromedriver names windows after their target (older versions add a prefix)
+                handle = next(h for h in host.window_handles if h.endswith(target_id))
+                host.switch_to.window(handle)
+        except Exception as error:  # noqa: BLE001 - any failure means a dedicated process instead
+            self.unavailable = _first_line(error)
+            return None
+        self.stats.open_seconds += time.perf_counter() - started
+        return {"browserContextId": context_id, "targetId": target_id, "started": time.perf_counter()}
+
+    def _metrics(self):
+        try:
+            self.host.execute_cdp_cmd("Performance.enable", {})
+            metrics = self.host.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        except Exception:  # noqa: BLE001 - the report just lacks this context's numbers
+            return {}
+        return {_METRICS[m["name"]]: int(m["value"]) for m in metrics if m["name"] in _METRICS}
+
+    def close(self, context, nodeid):
+        finished = time.perf_counter()
+        self.stats.test_seconds += finished - context["started"]
+        record = {"nodeid": nodeid, "seconds": round(finished - context["started"], 3), **self._metrics()}
+        with tracing.span(f"close {self.name} context", "browser"):
+            try:
+                self.host.execute_cdp_cmd("Target.closeTarget", {"targetId": context["targetId"]})
+                self.host.execute_cdp_cmd("Target.disposeBrowserContext",
+                                          {"browserContextId": context["browserContextId"]})
+                self.host.switch_to.window(self._home)
+                self._sample_rss()
+            except Exception:  # noqa: BLE001 - start over with a new host next time
+                self.quit()
+        self.stats.close_seconds += time.perf_counter() - finished
+        self.stats.contexts.append(record)
+
+    @contextmanager
+    def lease(self, item, fallback, fresh=False):
+        """A browser for ``item``: a context when it may share, else a lease from ``fallback``."""
+        reason = refusal(item) if self.enabled else "shared contexts off"
+        context = None
+        if reason is None and self.unavailable is None:
+            context = self.open()
+        if context is None:
+            if self.enabled:
+                self.stats.dedicated[reason or f"no contexts: {self.unavailable}"] += 1
+            with fallback.lease(fresh=fresh) as driver:
+                yield driver
+            return
+        try:
+            yield self.host
+        finally:
+            self.close(context, item.nodeid)
+
+    def quit(self):
+        if self.host is not None:
+            self._sample_rss()
+            try:
+                self.host.quit()
+            except Exception:
+                pass
+            self.host = None
+
+    def summary_line(self):
+        stats = self.stats
+        heaps = [record["jsHeapBytes"] for record in stats.contexts if "jsHeapBytes" in record]
+        heap = f"JS heap {max(heaps) / 1048576:.1f} MB max/context" if heaps else "no heap metrics"
+        rss = (f", host {stats.host_rss_bytes / 1048576:.0f} MB RSS"
+               if stats.host_rss_bytes is not None else "")
+        dedicated = ", ".join(f"{count} {reason}" for reason, count in stats.dedicated.most_common())
+        return (f"{self.name}: {stats.leases} tests in contexts ({stats.tests_per_minute:.1f}/min, "
+                f"{stats.avg_overhead:.2f}s open+close avg) | {heap}{rss} | "
+                f"dedicated process: {dedicated or 'none'}")
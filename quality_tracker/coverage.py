@@ -0,0 +1,301 @@
+"""Requirement coverage matrix, updated one result at a time.
+
+The matrix is the sparse requirements x test cases relation of the
+traceability index (one cell per "test case covers requirement" link), with
+the latest status of every test case.  Per requirement, and per requirement
+owner, tag, version and priority, it keeps counts of the cells in each
+status.  A new result for a test case moves its cells from the old status to
+the new one, which touches only the requirements that test case covers and
+their groups -- no recompute over the catalog.
+
+Two rates are derived from the counts, for a requirement or a group:
+
+* ``coverage`` -- the share of its cells whose test case has run,
+* ``passRate`` -- the share of its cells whose test case passed.
+
+The latest statuses are kept between runs in
+``.quality-tracker/coverage-state.npz``, so each dispatch's results log
+updates the picture left by earlier ones::
+
+    python -m quality_tracker.coverage update test-results/results.jsonl
+    python -m quality_tracker.coverage query --priority High --below 0.8
+    python -m quality_tracker.coverage snapshot --json coverage.json --csv coverage.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from . import payloads
+from .catalog import REQUIREMENTS_FILE, ROOT, TEST_CASES_FILE
+from .results_store import iter_events
+from .traceability import CACHE_DIR, field_key, field_values, load_index
+
+STATE_FILE = os.environ.get(
+    "QT_COVERAGE_STATE", os.path.join(ROOT, ".quality-tracker", "coverage-state.npz")
+)
+
+NOT_RUN, PASSED, FAILED, OTHER = range(4)
+STATUS_NAMES = ("notRun", "passed", "failed", "other")
+# Final statuses of the results log; Not Started / Running leave a cell as it was
+STATUS_CODES = {"Passed": PASSED, "Failed": FAILED, "Not Found": OTHER, "Skipped": OTHER}
+
+GROUP_FIELDS = ("owner", "tags", "versions", "priority")
+METRICS = ("passRate", "coverage")
+
+
+def _csr(rows, columns_of, column_position=None):
+    """CSR arrays for ``rows`` -> positions of ``columns_of(row)`` that exist.
+
+    Without ``column_position``, ``columns_of`` already returns positions.
+    """
+    indptr = [0]
+    indices = []
+    for row in rows:
+        if column_position is None:
+            indices.extend(columns_of(row))
+        else:
+            indices.extend(column_position[c] for c in columns_of(row) if c in column_position)
+        indptr.append(len(indices))
+    return np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64)
+
+
+def _rates(counts):
+    total = counts.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(total > 0, (total - counts[:, NOT_RUN]) / total, 0.0)
+        pass_rate = np.where(total > 0, counts[:, PASSED] / total, 0.0)
+    return total, coverage, pass_rate
+
+
+class CoverageMatrix:
+    """Latest status per test case and cell counts per requirement and group."""
+
+    def __init__(self, index):
+        self.index = index
+        self.tc_ids = list(index.test_cases)
+        self.req_ids = list(index.requirements)
+        self.tc_position = {tc_id: i for i, tc_id in enumerate(self.tc_ids)}
+        req_position = {req_id: i for i, req_id in enumerate(self.req_ids)}
+
+        # Test case -> covered requirement positions (the matrix's cells)
+        self.indptr, self.indices = _csr(self.tc_ids, lambda t: index.covers[t], req_position)
+        self.status = np.zeros(len(self.tc_ids), dtype=np.int8)
+
+        # One counts row per requirement, then one per group of each field.
+        # A requirement's cells count towards its own row and its groups' rows.
+        self.groups = {}
+        offsets = {}
+        columns_of = {}
+        rows = len(self.req_ids)
+        for field in GROUP_FIELDS:
+            position = {}
+            for req_id in self.req_ids:
+                for value in field_values(index.requirements[req_id], field):
+                    position.setdefault(field_key(value), str(value))
+            self.groups[field] = list(position.values())
+            offsets[field] = rows
+            columns_of[field] = {key: rows + i for i, key in enumerate(position)}
+            rows += len(position)
+
+        def targets(req_id):
+            requirement = index.requirements[req_id]
+            found = [req_position[req_id]]
+            for field in GROUP_FIELDS:
+                found.extend({columns_of[field][field_key(value)] for value in field_values(requirement, field)})
+            return found
+
+        self.target_indptr, self.target_indices = _csr(self.req_ids, targets)
+        self.counts = np.zeros((rows, len(STATUS_NAMES)), dtype=np.int64)
+        self.req_counts = self.counts[:len(self.req_ids)]
+        self.group_counts = {field: self.counts[offsets[field]:offsets[field] + len(self.groups[field])]
+                             for field in GROUP_FIELDS}
+        self._recount()
+
+    def _recount(self):
+        """Rebuild every count from the statuses (a full pass, used on load)."""
+        cell_status = np.repeat(self.status, np.diff(self.indptr)).astype(np.int64)
+        per_requirement = np.zeros_like(self.req_counts)
+        np.add.at(per_requirement, (self.indices, cell_status), 1)
+        self.counts[:] = 0
+        np.add.at(self.counts, self.target_indices, np.repeat(per_requirement, np.diff(self.target_indptr), axis=0))
+
+    def update(self, tc_id, status):
+        """Record the latest ``status`` (a results-log status) of a test case.
+
+        Costs one step per requirement the test case covers, each moving the
+        counts of that requirement and its groups.  Returns False for unknown
+        test cases or statuses.
+        """
+        code = STATUS_CODES.get(status)
+        position = self.tc_position.get(tc_id)
+        if code is None or position is None:
+            return False
+        old = int(self.status[position])
+        if old == code:
+            return True
+        self.status[position] = code
+        for req in self.indices[self.indptr[position]:self.indptr[position + 1]].tolist():
+            # A requirement's target rows are distinct, so fancy indexing is safe
+            rows = self.target_indices[self.target_indptr[req]:self.target_indptr[req + 1]]
+            self.counts[rows, old] -= 1
+            self.counts[rows, code] += 1
+        return True
+
+    def apply_log(self, path):
+        """Apply every final status in a results event log; returns how many applied."""
+        applied = 0
+        for _, event in iter_events(path):
+            if event.get("event") == "status" and self.update(event.get("id"), event.get("status")):
+                applied += 1
+        return applied
+
+    def save(self, path=STATE_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        ran = np.flatnonzero(self.status != NOT_RUN)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, tc_ids=np.array([self.tc_ids[i] for i in ran], dtype=str),
+                            status=self.status[ran])
+        os.replace(tmp_path, path)
+
+    def load(self, path=STATE_FILE):
+        """Restore saved statuses; test cases no longer in the catalog are dropped."""
+        try:
+            state = np.load(path)
+        except (OSError, ValueError):
+            return 0
+        with state:
+            loaded = 0
+            for tc_id, code in zip(state["tc_ids"].tolist(), state["status"].tolist()):
+                position = self.tc_position.get(tc_id)
+                if position is not None:
+                    self.status[position] = code
+                    loaded += 1
+        self._recount()
+        return loaded
+
+    def requirement_rows(self, req_ids=None):
+        """Per-requirement counts and rates, in catalog order."""
+        total, coverage, pass_rate = _rates(self.req_counts)
+        wanted = None if req_ids is None else set(req_ids)
+        for i, req_id in enumerate(self.req_ids):
+            if wanted is not None and req_id not in wanted:
+                continue
+            requirement = self.index.requirements[req_id]
+            row = {"id": req_id, "priority": requirement.get("priority", ""), "owner": requirement.get("owner", ""),
+                   "testCases": int(total[i])}
+            row.update({name: int(self.req_counts[i, code]) for code, name in enumerate(STATUS_NAMES)})
+            row["coverage"] = round(float(coverage[i]), 4)
+            row["passRate"] = round(float(pass_rate[i]), 4)
+            yield row
+
+    def group_rows(self, field):
+        total, coverage, pass_rate = _rates(self.group_counts[field])
+        counts = self.group_counts[field]
+        return {
+            name: dict(
+                {"cells": int(total[i]), "coverage": round(float(coverage[i]), 4),
+                 "passRate": round(float(pass_rate[i]), 4)},
+                **{status: int(counts[i, code]) for code, status in enumerate(STATUS_NAMES)},
+            )
+            for i, name in enumerate(self.groups[field])
+        }
+
+    def query(self, below=None, metric="passRate", **filters):
+        """Requirement IDs matching the traceability ``filters`` whose ``metric`` is below ``below``.
+
+        ``query(priority="High", below=0.8)`` are the High priority
+        requirements under 80% pass.  Requirements without test cases have
+        no rates and never match.
+        """
+        total, coverage, pass_rate = _rates(self.req_counts)
+        values = pass_rate if metric == "passRate" else coverage
+        mask = total > 0
+        if below is not None:
+            mask &= values < below
+        if any(value is not None for value in filters.values()):
+            matched = set(self.index.find_requirements(**filters))
+            mask &= np.fromiter((r in matched for r in self.req_ids), dtype=bool, count=len(self.req_ids))
+        return [self.req_ids[i] for i in np.flatnonzero(mask)]
+
+    def cells(self, req_id):
+        """``{tc_id: status name}`` for the test cases covering a requirement."""
+        return {tc_id: STATUS_NAMES[self.status[self.tc_position[tc_id]]]
+                for tc_id in self.index.test_cases_for(req_id) if tc_id in self.tc_position}
+
+    def snapshot(self, with_cells=False):
+        requirements = list(self.requirement_rows())
+        if with_cells:
+            for row in requirements:
+                row["cells"] = self.cells(row["id"])
+        return {
+            "timestamp": payloads.timestamp(),
+            "requirements": requirements,
+            "groups": {field: self.group_rows(field) for field in GROUP_FIELDS},
+        }
+
+    def write_csv(self, path):
+        rows = self.requirement_rows()
+        first = next(rows, None)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            if first is None:
+                return
+            writer = csv.DictWriter(f, fieldnames=list(first))
+            writer.writeheader()
+            writer.writerow(first)
+            writer.writerows(rows)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.coverage", description=__doc__.split("\n")[0])
+    parser.add_argument("--requirements", default=REQUIREMENTS_FILE)
+    parser.add_argument("--test-cases", default=TEST_CASES_FILE)
+    parser.add_argument("--state", default=STATE_FILE, help="latest statuses kept between runs (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="apply results event logs to the saved state")
+    update.add_argument("logs", nargs="+", help="results.jsonl files, oldest first")
+    query = commands.add_parser("query", help="requirements below a pass rate or coverage")
+    query.add_argument("--below", type=float, help="threshold as a fraction, e.g. 0.8")
+    query.add_argument("--metric", choices=METRICS, default="passRate")
+    for field in ("priority", "owner", "tag", "version", "type", "status"):
+        query.add_argument(f"--{field}", action="append")
+    snapshot = commands.add_parser("snapshot", help="export the matrix")
+    snapshot.add_argument("--json", dest="json_path", help="write a JSON snapshot here")
+    snapshot.add_argument("--csv", dest="csv_path", help="write per-requirement rows as CSV here")
+    snapshot.add_argument("--cells", action="store_true", help="include each requirement's test case statuses")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    matrix = CoverageMatrix(load_index(args.requirements, args.test_cases, cache_dir=CACHE_DIR))
+    matrix.load(args.state)
+
+    if args.command == "update":
+        applied = sum(matrix.apply_log(path) for path in args.logs)
+        matrix.save(args.state)
+        print(f"📊 Applied {applied} results; state saved to {args.state}")
+    elif args.command == "query":
+        filters = {"priority": args.priority, "owner": args.owner, "tags": args.tag, "versions": args.version,
+                   "type": args.type, "status": args.status}
+        for row in matrix.requirement_rows(matrix.query(args.below, args.metric, **filters)):
+            print(f"{row['id']:<10} {row['priority']:<8} pass {row['passRate']:>6.0%}  coverage {row['coverage']:>6.0%}  "
+                  f"{row['passed']}/{row['testCases']} passed, {row['failed']} failed  {row['owner']}")
+    else:
+        if not args.json_path and not args.csv_path:
+            json.dump(matrix.snapshot(args.cells), sys.stdout, indent=2)
+            print()
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(matrix.snapshot(args.cells), f, indent=2)
+        if args.csv_path:
+            matrix.write_csv(args.csv_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Asynchronous, pooled and batched delivery of callback webhooks.
+
+Status updates are handed to :meth:`CallbackDispatcher.submit`, which never
+blocks the test run.  Updates wait in a bounded buffer keyed by TC ID, so a
+newer status replaces one that has not been sent yet (a ``Not Started``
+superseded by ``Running`` is simply dropped).  When the buffer is full, a
+queued intermediate status makes room; final statuses are never dropped, so
+submitting one waits for the senders if nothing else can go.  A small pool of sender threads
+each keep one HTTP keep-alive connection open and POST whatever has been
+waiting for at least ``flush_interval`` seconds, several results per request.
+Failed requests are retried with exponential backoff a bounded number of
+times.  Updates for a TC ID are never sent concurrently, so the receiver sees
+them in order.
+
+Request latencies are kept as a bounded uniform sample (a reservoir), with
+the maximum tracked on its own, so a long run's stats stay small.
+
+Sender threads never write to the terminal themselves (pytest may be
+capturing the test that is running at that moment); their log lines are
+buffered until the caller collects them with :meth:`drain_log`.
+"""
+
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+from . import payloads
+
+INTERMEDIATE_STATUSES = ("Not Started", "Running")
+
+FLUSH_INTERVAL = float(os.environ.get("QT_CALLBACK_FLUSH_INTERVAL", "0.25"))
+MAX_BATCH = int(os.environ.get("QT_CALLBACK_BATCH", "20"))
+# Request latencies kept for the percentiles
+MAX_LATENCY_SAMPLES = 1000
+
+
+class DispatchStats:
+    """Delivery counters, send latencies and queue depth."""
+
+    def __init__(self, max_samples=MAX_LATENCY_SAMPLES):
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.sent = 0
+        self.requests = 0
+        self.retries = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.latencies = []
+        self.max_latency = 0.0
+        self.max_samples = max_samples
+        self._random = random.Random()
+
+    def record_request(self, seconds):
+        """Count a request that got a response; its latency may replace a kept sample."""
+        self.requests += 1
+        self.max_latency = max(self.max_latency, seconds)
+        if len(self.latencies) < self.max_samples:
+            self.latencies.append(seconds)
+        else:
+            # Algorithm R: every request so far is kept with the same probability
+            slot = self._random.randrange(self.requests)
+            if slot < self.max_samples:
+                self.latencies[slot] = seconds
+
+    def latency(self, quantile):
+        return _quantile(sorted(self.latencies), quantile)
+
+    def as_dict(self):
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "sent": self.sent,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failed": self.failed,
+            "maxQueueDepth": self.max_queue_depth,
+            **latency_fields([round(seconds * 1000, 1) for seconds in self.latencies],
+                             round(self.max_latency * 1000, 1)),
+        }
+
+
+def _quantile(ordered, quantile):
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] if ordered else 0.0
+
+
+def latency_fields(samples_ms, max_ms=None):
+    """The latency entries of a stats document, from request latencies in milliseconds.
+
+    The samples are kept too, so the stats of several workers can be merged
+    into true percentiles (see :func:`quality_tracker.results_store.load_callback_stats`).
+    ``max_ms`` is the maximum when the samples are a subset.
+    """
+    ordered = sorted(samples_ms)
+    return {
+        "latencyP50Ms": _quantile(ordered, 0.5),
+        "latencyP95Ms": _quantile(ordered, 0.95),
+        "latencyMaxMs": max_ms if max_ms is not None else (ordered[-1] if ordered else 0.0),
+        "latencySamplesMs": list(samples_ms),
+    }
+
+
+def merge_latency_samples(parts, limit=MAX_LATENCY_SAMPLES):
+    """One bounded sample from several workers' ``(requests, samples)``.
+
+    Past ``limit``, each worker contributes in proportion to the requests its
+    samples stand for, so a worker that sent little does not skew the result.
+    """
+    parts = [(requests or len(samples), samples) for requests, samples in parts if samples]
+    if sum(len(samples) for _, samples in parts) <= limit:
+        return [sample for _, samples in parts for sample in samples]
+    total = sum(requests for requests, _ in parts)
+    merged = []
+    for requests, samples in parts:
+        merged += random.sample(samples, min(len(samples), round(limit * requests / total)))
+    return merged
+
+
+class CallbackDispatcher:
+    """Background sender for Quality Tracker webhook results."""
+
+    def __init__(self, url, headers, request_id="", senders=2, flush_interval=FLUSH_INTERVAL,
+                 max_batch=MAX_BATCH, max_queue=1000, max_retries=3, backoff=0.5, timeout=30):
+        parts = urlsplit(url)
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.headers = dict(headers, **{"Content-Type": "application/json", "Connection": "keep-alive"})
+        self.request_id = request_id
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = DispatchStats()
+
+        self._log_lines = deque(maxlen=1000)
+        self._pending = OrderedDict()  # test_id -> (queued_at, result)
+        self._in_flight = set()
+        self._closing = False
+        self._condition = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._sender, name=f"callback-sender-{index}", daemon=True)
+            for index in range(max(1, senders))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def log(self, message):
+        self._log_lines.append(message)
+
+    def drain_log(self):
+        """Return and forget the log lines written by the sender threads."""
+        lines = []
+        while self._log_lines:
+            lines.append(self._log_lines.popleft())
+        return lines
+
+    @property
+    def queue_depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def submit(self, result):
+        """Queue a result for delivery; returns immediately."""
+        test_id = result["id"]
+        with self._condition:
+            self.stats.submitted += 1
+            while test_id not in self._pending and len(self._pending) >= self.max_queue and not self._make_room():
+                if result["status"] in INTERMEDIATE_STATUSES:
+                    self.stats.dropped += 1
+                    return
+                # Every queued status is final: wait for a sender to take a batch
+                self.stats.blocked += 1
+                self._condition.wait()
+            if test_id in self._pending:
+                # Superseded before it was flushed: keep the original queue time
+                # so coalescing never delays delivery.
+                queued_at, _ = self._pending[test_id]
+                self._pending[test_id] = (queued_at, result)
+                self.stats.coalesced += 1
+            else:
+                self._pending[test_id] = (time.monotonic(), result)
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, len(self._pending))
+            # Senders and submitters waiting for room share the condition
+            self._condition.notify_all()
+
+    def _make_room(self):
+        """Drop the oldest queued intermediate status; False if every queued status is final."""
+        for test_id, (_, queued) in self._pending.items():
+            if queued["status"] in INTERMEDIATE_STATUSES:
+                del self._pending[test_id]
+                self.stats.dropped += 1
+                return True
+        return False
+
+    def _take_batch(self):
+        """Wait for a batch that is due; returns None once closed and drained."""
+        with self._condition:
+            while True:
+                ready = [test_id for test_id in self._pending if test_id not in self._in_flight]
+                if ready:
+                    oldest = self._pending[ready[0]][0]
+                    wait = oldest + self.flush_interval - time.monotonic()
+                    if self._closing or wait <= 0 or len(ready) >= self.max_batch:
+                        batch = ready[:self.max_batch]
+                        self._in_flight.update(batch)
+                        self._condition.notify_all()
+                        return batch, [self._pending.pop(test_id)[1] for test_id in batch]
+                    self._condition.wait(wait)
+                elif self._closing and not self._in_flight:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _sender(self):
+        connection = None
+        while True:
+            taken = self._take_batch()
+            if taken is None:
+                break
+            test_ids, results = taken
+            connection = self._deliver(connection, results)
+            with self._condition:
+                self._in_flight.difference_update(test_ids)
+                self._condition.notify_all()
+        if connection is not None:
+            connection.close()
+
+    def _connect(self):
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self._netloc, timeout=self.timeout)
+
+    def _deliver(self, connection, results):
+        body = json.dumps(payloads.webhook_payload(self.request_id, results)).encode("utf-8")
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._condition:
+                    self.stats.retries += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() / 2))
+            started = time.monotonic()
+            try:
+                if connection is None:
+                    connection = self._connect()
+                connection.request("POST", self._path, body=body, headers=self.headers)
+                response = connection.getresponse()
+                response.read()
+                code = response.status
+                if response.will_close:
+                    connection.close()
+                    connection = None
+            except (OSError, http.client.HTTPException) as e:
+                if connection is not None:
+                    connection.close()
+                connection = None
+                self.log(f"❌ Webhook failed: {e}")
+                continue
+            with self._condition:
+                self.stats.record_request(time.monotonic() - started)
+            if 200 <= code < 300:
+                with self._condition:
+                    self.stats.sent += len(results)
+                summary = ", ".join(f"{r['id']} -> {r['status']}" for r in results)
+                self.log(f"✅ Webhook sent (HTTP {code}): {summary}")
+                return connection
+            self.log(f"❌ Webhook failed (HTTP {code})")
+            if code < 500 and code != 429:
+                break
+        with self._condition:
+            self.stats.failed += len(results)
+        return connection
+
+    def close(self, timeout=60):
+        """Flush everything still queued and stop the sender threads."""
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def summary_line(self):
+        stats = self.stats.as_dict()
+        return (
+            f"callbacks: {stats['sent']} sent in {stats['requests']} requests, "
+            f"{stats['coalesced']} coalesced, {stats['dropped']} dropped, {stats['failed']} failed, "
+            f"{stats['retries']} retries | latency p50 {stats['latencyP50Ms']}ms "
+            f"p95 {stats['latencyP95Ms']}ms | max queue depth {stats['maxQueueDepth']}"
+        )
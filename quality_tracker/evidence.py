@@ -0,0 +1,202 @@
+"""Screenshots, DOM and console logs of failing tests, written off the test's path.
+
+When a test fails in setup or call, :class:`EvidenceCapture` (a pytest plugin
+registered by ``tests/conftest.py``) grabs from every WebDriver among the
+test's fixtures
+
+* a screenshot (the base64 PNG chromedriver returns),
+* the page source and current URL (one script call),
+* the browser console log, where the driver supports it.
+
+Only these round trips happen on the test's thread.  Decoding, compressing
+and writing the files is handed to a small thread pool through a bounded
+queue; when the queue is full the capture is dropped (and counted) rather
+than making the test wait.  Files go to ``<results dir>/evidence/<test>/``
+(``QT_EVIDENCE_DIR``) and a run writes at most ``QT_EVIDENCE_MAX_MB`` of them.
+
+The time spent grabbing is recorded per test as ``evidenceCaptureSeconds``;
+it is not part of the test's duration, and the background encoding time is
+reported separately.  ``QT_EVIDENCE=off`` disables the plugin.
+"""
+
+import base64
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .capture import compress, log_suffix
+
+EVIDENCE_DIR = os.environ.get("QT_EVIDENCE_DIR", os.path.join("test-results", "evidence"))
+MAX_BYTES = int(float(os.environ.get("QT_EVIDENCE_MAX_MB", "50")) * 1024 * 1024)
+WORKERS = 2
+QUEUE_SIZE = 8
+
+_PAGE_JS = "return [window.location.href, document.documentElement ? document.documentElement.outerHTML : ''];"
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _drivers(item):
+    """The WebDriver fixture values of an item, once each."""
+    funcargs = getattr(item, "funcargs", None) or {}
+    seen = {}
+    for name, value in funcargs.items():
+        if callable(getattr(value, "get_screenshot_as_base64", None)) and id(value) not in seen:
+            seen[id(value)] = (name, value)
+    return list(seen.values())
+
+
+def _first_line(error):
+    text = str(error).strip()
+    return text.splitlines()[0] if text else type(error).__name__
+
+
+def grab(driver):
+    """What can be read from a driver right now; failures are recorded, not raised."""
+    evidence = {"errors": {}}
+    try:
+        evidence["screenshot"] = driver.get_screenshot_as_base64()
+    except Exception as error:  # noqa: BLE001 - a broken browser must not break the report
+        evidence["errors"]["screenshot"] = _first_line(error)
+    try:
+        evidence["url"], evidence["pageSource"] = driver.execute_script(_PAGE_JS)
+    except Exception as error:  # noqa: BLE001
+        evidence["errors"]["page"] = _first_line(error)
+    try:
+        evidence["console"] = driver.get_log("browser")
+    except Exception:  # noqa: BLE001 - only some drivers have logs
+        pass
+    return evidence
+
+
+class EvidenceStats:
+    def __init__(self):
+        self.captures = 0
+        self.dropped = 0
+        self.capped = 0
+        self.capture_seconds = 0.0
+        self.max_capture_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.bytes_written = 0
+
+    def as_dict(self):
+        return {
+            "captures": self.captures,
+            "dropped": self.dropped,
+            "filesOverCap": self.capped,
+            "captureSeconds": round(self.capture_seconds, 3),
+            "maxCaptureSeconds": round(self.max_capture_seconds, 3),
+            "encodeSeconds": round(self.encode_seconds, 3),
+            "bytesWritten": self.bytes_written,
+        }
+
+
+class EvidenceCapture:
+    """pytest plugin: failure evidence grabbed inline, encoded and written in the background."""
+
+    def __init__(self, directory=EVIDENCE_DIR, max_bytes=MAX_BYTES, workers=WORKERS, queue_size=QUEUE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = EvidenceStats()
+        self.index = []
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evidence")
+        # Captures queued or being written; a full queue drops new captures
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if not report.failed or report.when not in ("setup", "call"):
+            return
+        drivers = _drivers(item)
+        if not drivers:
+            return
+        started = time.perf_counter()
+        grabbed = [(name, grab(driver)) for name, driver in drivers]
+        latency = time.perf_counter() - started
+        self.stats.captures += 1
+        self.stats.capture_seconds += latency
+        self.stats.max_capture_seconds = max(self.stats.max_capture_seconds, latency)
+        report.user_properties.append(("evidenceCaptureSeconds", round(latency, 3)))
+
+        directory = os.path.join(self.directory, _UNSAFE.sub("_", item.nodeid)[-150:])
+        if not self._slots.acquire(blocking=False):
+            self.stats.dropped += 1
+            item.add_report_section(report.when, "evidence", "evidence dropped: capture queue full\n")
+            return
+        entry = {"nodeid": item.nodeid, "when": report.when, "directory": directory,
+                 "captureSeconds": round(latency, 3), "files": []}
+        self.index.append(entry)
+        self._executor.submit(self._write, entry, grabbed)
+        lines = [f"{name}: {evidence.get('url', '?')}" for name, evidence in grabbed]
+        item.add_report_section(report.when, "evidence", f"evidence in {directory}\n" + "\n".join(lines) + "\n")
+
+    def _reserve(self, size):
+        with self._lock:
+            if self.stats.bytes_written + size > self.max_bytes:
+                self.stats.capped += 1
+                return False
+            self.stats.bytes_written += size
+            return True
+
+    def _write_file(self, entry, name, data):
+        if not self._reserve(len(data)):
+            return
+        path = os.path.join(entry["directory"], name)
+        with open(path, "wb") as f:
+            f.write(data)
+        entry["files"].append(name)
+
+    def _write(self, entry, grabbed):
+        started = time.perf_counter()
+        try:
+            os.makedirs(entry["directory"], exist_ok=True)
+            for name, evidence in grabbed:
+                prefix = name if len(grabbed) > 1 else "browser"
+                if evidence.get("screenshot"):
+                    self._write_file(entry, f"{prefix}-screenshot.png", base64.b64decode(evidence["screenshot"]))
+                if evidence.get("pageSource"):
+                    self._write_file(entry, f"{prefix}-page.html{log_suffix()}",
+                                     compress(evidence["pageSource"].encode("utf-8")))
+                meta = {"url": evidence.get("url"), "errors": evidence["errors"], "console": evidence.get("console")}
+                self._write_file(entry, f"{prefix}-meta.json", json.dumps(meta, indent=2).encode("utf-8"))
+        finally:
+            with self._lock:
+                self.stats.encode_seconds += time.perf_counter() - started
+            self._slots.release()
+
+    def pytest_sessionfinish(self):
+        # Let queued captures finish before the run's artifacts are collected
+        self._executor.shutdown(wait=True)
+        if self.index:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, "index.json"), "w") as f:
+                json.dump({"captures": self.index, "stats": self.stats.as_dict()}, f, indent=2)
+
+    def summary_line(self):
+        stats = self.stats
+        average = stats.capture_seconds / stats.captures if stats.captures else 0.0
+        return (f"{stats.captures} failures captured ({stats.dropped} dropped with the queue full), "
+                f"grab {average:.2f}s avg / {stats.max_capture_seconds:.2f}s max on the test thread, "
+                f"{stats.encode_seconds:.2f}s encoding in the background, "
+                f"{stats.bytes_written / 1048576:.1f} of {self.max_bytes / 1048576:.0f} MB"
+                + (f" ({stats.capped} files over the cap)" if stats.capped else ""))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.stats.captures:
+            return
+        terminalreporter.section("evidence")
+        terminalreporter.write_line(self.summary_line())
+        terminalreporter.write_line(f"  written to {self.directory}")
+
+
+def capture_from_env():
+    if os.environ.get("QT_EVIDENCE", "on") == "off":
+        return None
+    return EvidenceCapture(os.environ.get("QT_EVIDENCE_DIR", EVIDENCE_DIR))
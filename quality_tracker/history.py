@@ -0,0 +1,283 @@
+"""Measured test-case durations from previous runs, kept in SQLite.
+
+The runner records every finished test case (duration and outcome) as it
+finishes, so the store learns real durations instead of the catalog's
+hand-entered ``estimatedDuration``, which is in minutes of manual execution
+and is only scaled to seconds by the median ratio of measured to estimated
+durations (see :meth:`DurationHistory.estimate_unit`).  Per TC ID it keeps rolling statistics --
+an exponentially weighted moving average, mean and variance (Welford), and
+p50/p95 over the most recent samples -- in one row, so schedulers, ETA
+reporting and per-test timeouts read them with a single query.
+
+The database is ``.quality-tracker/durations.sqlite`` (``QT_HISTORY_DB``).
+It is opened in WAL mode, so parallel workers can record into it at the same
+time.
+
+Usage::
+
+    python -m quality_tracker.history show [TC_002 ...]
+    python -m quality_tracker.history export-catalog --output refreshed-test-cases.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+from .catalog import ESTIMATE_UNIT_SECONDS, ROOT, TEST_CASES_FILE, estimated_units
+
+HISTORY_DB = os.environ.get(
+    "QT_HISTORY_DB", os.path.join(ROOT, ".quality-tracker", "durations.sqlite")
+)
+
+# Weight of the newest sample in the moving average
+EWMA_ALPHA = 0.3
+# Samples kept per TC ID for the percentiles
+MAX_SAMPLES = 50
+# Per-test timeout = TIMEOUT_FACTOR x p95, but never below MIN_TIMEOUT
+TIMEOUT_FACTOR = 3.0
+MIN_TIMEOUT = 60.0
+# Test cases with both history and a catalog estimate before the estimate unit
+# is calibrated rather than taken to be a minute
+MIN_CALIBRATION_SAMPLES = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    test_id TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_by_test ON samples (test_id, finished_at);
+CREATE TABLE IF NOT EXISTS stats (
+    test_id TEXT PRIMARY KEY,
+    runs INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    ewma REAL NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    p50 REAL NOT NULL,
+    p95 REAL NOT NULL,
+    last REAL NOT NULL,
+    last_outcome TEXT NOT NULL,
+    last_executed REAL NOT NULL
+);
+"""
+
+_COLUMNS = ("test_id", "runs", "failures", "ewma", "mean", "m2", "p50", "p95", "last", "last_outcome",
+            "last_executed")
+
+
+def quantile(values, q):
+    """Linear-interpolation quantile of a non-empty list."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class DurationStats:
+    """The rolling statistics of one TC ID."""
+
+    def __init__(self, row):
+        for column, value in zip(_COLUMNS, row):
+            setattr(self, column, value)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.runs - 1) if self.runs > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def as_dict(self):
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "ewma": round(self.ewma, 3),
+            "mean": round(self.mean, 3),
+            "stdev": round(self.stdev, 3),
+            "p50": round(self.p50, 3),
+            "p95": round(self.p95, 3),
+            "last": round(self.last, 3),
+            "lastOutcome": self.last_outcome,
+            "lastExecuted": _iso(self.last_executed),
+        }
+
+
+def _iso(epoch):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
+class DurationHistory:
+    """Per-TC duration statistics in a SQLite database."""
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._stats = None
+
+    def _load(self):
+        # One query for every TC ID; lookups after that are dictionary reads
+        if self._stats is None:
+            rows = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM stats")
+            self._stats = {row[0]: DurationStats(row) for row in rows}
+        return self._stats
+
+    def stats(self, test_id):
+        """The :class:`DurationStats` of ``test_id``, or None if it never ran."""
+        return self._load().get(test_id)
+
+    def all_stats(self):
+        return dict(self._load())
+
+    def expected(self, test_id):
+        """Best guess of the next duration in seconds (the EWMA), or None."""
+        entry = self.stats(test_id)
+        return entry.ewma if entry else None
+
+    def mean(self, test_id):
+        entry = self.stats(test_id)
+        return entry.mean if entry else None
+
+    def timeout(self, test_id, default=None, factor=TIMEOUT_FACTOR, minimum=MIN_TIMEOUT):
+        """A per-test timeout from the p95 duration; ``default`` if there is no history."""
+        entry = self.stats(test_id)
+        if entry is None:
+            return default
+        return max(minimum, entry.p95 * factor)
+
+    def estimate_unit(self, estimates, minimum=MIN_CALIBRATION_SAMPLES):
+        """Seconds one unit of catalog ``estimatedDuration`` takes here.
+
+        ``estimates`` maps TC ID -> estimate in catalog units.  The unit is
+        the median of measured EWMA / estimate over the test cases that have
+        both, and ``ESTIMATE_UNIT_SECONDS`` (a minute) until ``minimum`` do.
+        """
+        history = self._load()
+        ratios = [history[test_id].ewma / value for test_id, value in estimates.items()
+                  if test_id in history and value > 0]
+        return statistics.median(ratios) if len(ratios) >= minimum else ESTIMATE_UNIT_SECONDS
+
+    def estimated_seconds(self, path=TEST_CASES_FILE):
+        """Map TC ID -> catalog estimate in seconds, in the unit calibrated here."""
+        estimates = estimated_units(path)
+        unit = self.estimate_unit(estimates)
+        return {test_id: value * unit for test_id, value in estimates.items()}
+
+    def eta(self, test_ids, default=None):
+        """Expected total seconds for ``test_ids`` and how many had no history."""
+        total, unknown = 0.0, 0
+        for test_id in test_ids:
+            expected = self.expected(test_id)
+            if expected is None:
+                unknown += 1
+                expected = default or 0.0
+            total += expected
+        return total, unknown
+
+    def record(self, test_id, duration, outcome="Passed"):
+        """Add a measured run and update the TC's statistics (committed at once)."""
+        now = time.time()
+        failed = outcome != "Passed"
+        with self._db:
+            self._db.execute("INSERT INTO samples VALUES (?, ?, ?, ?)", (test_id, now, duration, outcome))
+            self._db.execute(
+                "DELETE FROM samples WHERE test_id = ? AND rowid NOT IN "
+                "(SELECT rowid FROM samples WHERE test_id = ? ORDER BY finished_at DESC LIMIT ?)",
+                (test_id, test_id, MAX_SAMPLES),
+            )
+            recent = [row[0] for row in self._db.execute("SELECT duration FROM samples WHERE test_id = ?", (test_id,))]
+            row = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM stats WHERE test_id = ?", (test_id,)).fetchone()
+            if row is None:
+                runs, failures, ewma, mean, m2 = 1, int(failed), duration, duration, 0.0
+            else:
+                previous = DurationStats(row)
+                runs = previous.runs + 1
+                failures = previous.failures + failed
+                ewma = EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * previous.ewma
+                delta = duration - previous.mean
+                mean = previous.mean + delta / runs
+                m2 = previous.m2 + delta * (duration - mean)
+            values = (test_id, runs, failures, ewma, mean, m2, quantile(recent, 0.5), quantile(recent, 0.95),
+                      duration, outcome, now)
+            self._db.execute(f"INSERT OR REPLACE INTO stats VALUES ({', '.join('?' * len(values))})", values)
+        if self._stats is not None:
+            self._stats[test_id] = DurationStats(values)
+
+    def save(self):
+        """Records are committed as they are made; kept for callers that batch."""
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def write_catalog(self, output, source=TEST_CASES_FILE):
+        """Copy the catalog with ``estimatedDuration`` and ``lastExecuted`` from history.
+
+        Returns the number of test cases that were refreshed.
+        """
+        with open(source, encoding="utf-8") as f:
+            test_cases = json.load(f)
+        refreshed = 0
+        for test_case in test_cases:
+            entry = self.stats(test_case.get("id"))
+            if entry is None:
+                continue
+            test_case["estimatedDuration"] = round(entry.ewma / ESTIMATE_UNIT_SECONDS, 2)
+            test_case["lastExecuted"] = _iso(entry.last_executed)
+            refreshed += 1
+        tmp_path = f"{output}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(test_cases, f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, output)
+        return refreshed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.history", description=__doc__.split("\n")[0])
+    parser.add_argument("--db", default=HISTORY_DB, help="history database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="print the statistics of some or all TC IDs")
+    show.add_argument("test_ids", nargs="*")
+    show.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    export = commands.add_parser("export-catalog", help="write a catalog copy with learned estimates")
+    export.add_argument("--source", default=TEST_CASES_FILE)
+    export.add_argument("--output", required=True)
+    args = parser.parse_args(argv)
+
+    history = DurationHistory(args.db)
+    if args.command == "export-catalog":
+        refreshed = history.write_catalog(args.output, args.source)
+        print(f"📋 Refreshed {refreshed} test cases -> {args.output}")
+        return 0
+
+    stats = history.all_stats()
+    test_ids = args.test_ids or sorted(stats)
+    if args.json:
+        print(json.dumps({t: stats[t].as_dict() for t in test_ids if t in stats}, indent=2))
+        return 0
+    print(f"{'TC ID':<12}{'runs':>6}{'fail':>6}{'ewma':>9}{'p50':>9}{'p95':>9}{'stdev':>9}  last executed")
+    for test_id in test_ids:
+        entry = stats.get(test_id)
+        if entry is None:
+            print(f"{test_id:<12}  no history")
+            continue
+        print(f"{test_id:<12}{entry.runs:>6}{entry.failures:>6}{entry.ewma:>9.2f}{entry.p50:>9.2f}"
+              f"{entry.p95:>9.2f}{entry.stdev:>9.2f}  {_iso(entry.last_executed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+"""Record/replay HTTP cache in front of the storefront.
+
+The browser tests normally talk to the public demo store, paying internet
+latency and failing whenever it is slow or down.  :class:`RecordReplayProxy`
+is a local reverse proxy the browser is pointed at instead (by setting the
+base URL, see :func:`quality_tracker.base_url`):
+
+* ``record`` forwards every request to the real storefront and stores the
+  response under ``.quality-tracker/http-cache/``;
+* ``replay`` answers from that store only -- no network, no added latency --
+  and answers ``504`` for anything that was not recorded.
+
+Responses are keyed by method, path and query (minus per-session tokens such
+as ``login_token``) and a hash of the request body, and are kept per test in
+the order they were seen, so a page that changes during a test (a wishlist
+before and after a removal) replays in the same sequence.  Absolute links to
+the storefront, redirects and cookies are rewritten at serve time so the
+browser stays on the proxy.  Asset requests (stylesheets, scripts, images,
+fonts) are either cached like pages or blocked with an empty ``204``.
+
+The proxy is started by ``tests/conftest.py`` when ``QT_HTTP_CACHE`` is
+``record`` or ``replay``; ``QT_HTTP_CACHE_ASSETS`` is ``cache`` (default) or
+``block``.  Standalone::
+
+    python -m quality_tracker.http_cache serve --mode replay --port 8080
+    python -m quality_tracker.http_cache info
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import pytest
+
+from . import base_url
+from .catalog import ROOT
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (OFF, RECORD, REPLAY)
+
+CACHE_ASSETS = "cache"
+BLOCK_ASSETS = "block"
+ASSET_POLICIES = (CACHE_ASSETS, BLOCK_ASSETS)
+
+HTTP_CACHE_DIR = os.environ.get("QT_HTTP_CACHE_DIR", os.path.join(ROOT, ".quality-tracker", "http-cache"))
+
+ASSET_EXTENSIONS = (
+    ".css", ".js", ".map", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+    ".woff", ".woff2", ".ttf", ".eot", ".otf",
+)
+# Query parameters that change per session and must not be part of the key
+VOLATILE_PARAMS = tuple(
+    p for p in os.environ.get("QT_HTTP_CACHE_IGNORE_PARAMS", "login_token,customer_token,user_token,_").split(",") if p
+)
+
+_HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+    "transfer-encoding", "upgrade", "content-length", "content-encoding",
+}
+_TEXT_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg")
+
+_RETRIED_METHODS = ("GET", "HEAD")
+
+SESSION_LABEL = "(session)"
+
+
+def is_asset(path):
+    return urlsplit(path).path.lower().endswith(ASSET_EXTENSIONS)
+
+
+def request_key(method, path, body=b""):
+    parts = urlsplit(path)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if k not in VOLATILE_PARAMS))
+    key = f"{method} {parts.path}" + (f"?{query}" if query else "")
+    if body:
+        key += f" #{hashlib.sha256(body).hexdigest()[:16]}"
+    return key
+
+
+class HttpStore:
+    """Content-addressed response bodies plus an index of recorded responses.
+
+    The index maps ``key -> {test: [response, ...]}`` where a response is
+    ``{"status", "headers", "body"}`` and ``body`` names a file under
+    ``bodies/``.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.entries = self._read()
+        self._recorded = {}
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _body_path(self, digest):
+        return os.path.join(self.directory, "bodies", digest[:2], digest)
+
+    def put_body(self, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get_body(self, digest):
+        with open(self._body_path(digest), "rb") as f:
+            return f.read()
+
+    def lookup(self, key, test, seq):
+        """The ``seq``-th response recorded for ``key`` in ``test`` (its last one
+        past the end), else the latest one recorded for ``key`` by any test."""
+        by_test = self.entries.get(key)
+        if not by_test:
+            return None
+        responses = by_test.get(test)
+        if responses:
+            return responses[min(seq, len(responses) - 1)]
+        return next(reversed(by_test.values()))[-1]
+
+    def record(self, key, test, status, headers, body):
+        response = {"status": status, "headers": headers, "body": self.put_body(body)}
+        with self._lock:
+            # A test recorded again replaces what it recorded before
+            responses = self._recorded.setdefault((key, test), [])
+            responses.append(response)
+            self.entries.setdefault(key, {})[test] = list(responses)
+        return response
+
+    def save(self):
+        """Merge this process's recordings into the index (workers share it)."""
+        with self._lock:
+            if not self._recorded:
+                return
+            merged = self._read()
+            for (key, test), responses in self._recorded.items():
+                merged.setdefault(key, {})[test] = responses
+            self._recorded = {}
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, headers, payload = self.server.proxy.respond(self.command, self.path, self.headers, body)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_HEAD = do_PUT = do_DELETE = do_OPTIONS = _handle
+
+    def log_message(self, format, *args):
+        if self.server.proxy.verbose:
+            super().log_message(format, *args)
+
+
+class RecordReplayProxy:
+    """Local reverse proxy that records or replays the storefront."""
+
+    def __init__(self, mode=REPLAY, upstream=None, store=None, assets=CACHE_ASSETS,
+                 host="127.0.0.1", port=0, latency=0.0, verbose=False):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown HTTP cache mode: {mode}")
+        if assets not in ASSET_POLICIES:
+            raise ValueError(f"Unknown asset policy: {assets}")
+        self.mode = mode
+        self.assets = assets
+        self.latency = latency
+        self.verbose = verbose
+        self.store = store if store is not None else HttpStore()
+        self.upstream_url = upstream or base_url()
+        upstream = urlsplit(self.upstream_url)
+        self.upstream_scheme = upstream.scheme
+        self.upstream_netloc = upstream.netloc
+        self.upstream_origin = f"{upstream.scheme}://{upstream.netloc}"
+
+        self.current_test = SESSION_LABEL
+        self.stats = {}
+        self._seq = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.proxy = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def origin(self):
+        return self.url.rstrip("/")
+
+    def _count(self, test, outcome):
+        with self._lock:
+            self.stats.setdefault(test, Counter())[outcome] += 1
+
+    # --- upstream -----------------------------------------------------------
+
+    def _connection(self, fresh=False):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or fresh:
+            if connection is not None:
+                connection.close()
+            cls = http.client.HTTPSConnection if self.upstream_scheme == "https" else http.client.HTTPConnection
+            connection = self._local.connection = cls(self.upstream_netloc, timeout=30)
+        return connection
+
+    def _fetch(self, method, path, headers, body):
+        forwarded = {}
+        for name, value in headers.items():
+            lowered = name.lower()
+            if lowered in _HOP_BY_HOP or lowered in ("host", "accept-encoding"):
+                continue
+            forwarded[name] = value.replace(self.origin, self.upstream_origin)
+        forwarded["Host"] = self.upstream_netloc
+        forwarded["Accept-Encoding"] = "identity"
+        # A kept-alive connection the storefront has since closed fails on
+        # first use; only a request that is safe to send twice is retried
+        attempts = (0, 1) if method in _RETRIED_METHODS else (0,)
+        for attempt in attempts:
+            connection = self._connection(fresh=bool(attempt))
+            try:
+                connection.request(method, path, body=body or None, headers=forwarded)
+                response = connection.getresponse()
+                payload = response.read()
+                break
+            except (OSError, http.client.HTTPException):
+                if attempt == attempts[-1]:
+                    # Do not reuse a connection left in an unknown state
+                    self._local.connection = None
+                    connection.close()
+                    raise
+        kept = [[name, value] for name, value in response.getheaders() if name.lower() not in _HOP_BY_HOP]
+        return response.status, kept, payload
+
+    # --- serving ------------------------------------------------------------
+
+    def _rewrite(self, headers, body):
+        """Point links, redirects and cookies at the proxy instead of the storefront."""
+        out = []
+        content_type = ""
+        escaped_upstream = self.upstream_origin.replace("/", "\\/")
+        for name, value in headers:
+            lowered = name.lower()
+            if lowered == "content-type":
+                content_type = value.lower()
+            elif lowered == "location":
+                value = value.replace(self.upstream_origin, self.origin)
+            elif lowered == "set-cookie":
+                attributes = [a for a in value.split(";") if a.strip().split("=")[0].lower()
+                              not in ("domain", "secure", "samesite")]
+                value = ";".join(attributes)
+            out.append((name, value))
+        if content_type.startswith(_TEXT_TYPES):
+            for upstream, local in ((self.upstream_origin, self.origin),
+                                    (escaped_upstream, self.origin.replace("/", "\\/")),
+                                    (f"//{self.upstream_netloc}", f"//{urlsplit(self.url).netloc}")):
+                body = body.replace(upstream.encode(), local.encode())
+        return out, body
+
+    def respond(self, method, path, headers, body):
+        """Return ``(status, headers, body)`` for a browser request."""
+        test = self.current_test
+        if self.assets == BLOCK_ASSETS and is_asset(path):
+            self._count(test, "blocked")
+            return 204, [], b""
+
+        key = request_key(method, path, body)
+        with self._lock:
+            seq = self._seq[(test, key)]
+            self._seq[(test, key)] += 1
+
+        if self.mode == REPLAY:
+            response = self.store.lookup(key, test, seq)
+            if response is None:
+                self._count(test, "misses")
+                message = f"Not recorded: {key}".encode()
+                return 504, [("Content-Type", "text/plain; charset=utf-8")], message
+            if self.latency:
+                time.sleep(self.latency)
+            self._count(test, "hits")
+            status, stored_headers = response["status"], response["headers"]
+            payload = self.store.get_body(response["body"])
+        else:
+            try:
+                status, stored_headers, payload = self._fetch(method, path, headers, body)
+            except (OSError, http.client.HTTPException) as e:
+                self._count(test, "errors")
+                return 502, [("Content-Type", "text/plain; charset=utf-8")], f"Upstream error: {e}".encode()
+            self.store.record(key, test, status, stored_headers, payload)
+            self._count(test, "recorded")
+
+        out_headers, payload = self._rewrite(stored_headers, payload)
+        return status, out_headers, payload
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self.store.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def totals(self):
+        with self._lock:
+            return sum(self.stats.values(), Counter())
+
+
+class CacheReport:
+    """pytest plugin: labels proxied requests with the running test and
+    reports hits and misses per test."""
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        self.proxy.current_test = item.nodeid
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        yield
+        self.proxy.current_test = SESSION_LABEL
+        stats = self.proxy.stats.get(item.nodeid)
+        if stats:
+            item.user_properties.append(("httpCache", json.dumps(dict(stats), sort_keys=True)))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        proxy = self.proxy
+        totals = proxy.totals()
+        terminalreporter.section("http cache")
+        terminalreporter.write_line(
+            f"{proxy.mode} ({proxy.assets} assets) via {proxy.url}: "
+            + (", ".join(f"{count} {outcome}" for outcome, count in sorted(totals.items())) or "no requests")
+        )
+        for test, stats in sorted(proxy.stats.items()):
+            if test != SESSION_LABEL:
+                terminalreporter.write_line(
+                    f"  {' '.join(f'{k}={v}' for k, v in sorted(stats.items()))}  {test}"
+                )
+
+        report_path = os.environ.get("QT_HTTP_CACHE_REPORT")
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump({test: dict(stats) for test, stats in proxy.stats.items()}, f, indent=2)
+
+
+def proxy_from_env():
+    """A started proxy as configured by ``QT_HTTP_CACHE``, or None when off."""
+    mode = os.environ.get("QT_HTTP_CACHE", OFF)
+    if mode == OFF:
+        return None
+    proxy = RecordReplayProxy(
+        mode=mode,
+        assets=os.environ.get("QT_HTTP_CACHE_ASSETS", CACHE_ASSETS),
+        latency=float(os.environ.get("QT_HTTP_CACHE_LATENCY", "0")),
+    )
+    return proxy.start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.http_cache", description=__doc__.split("\n")[0])
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the proxy in the foreground")
+    serve.add_argument("--mode", choices=(RECORD, REPLAY), default=REPLAY)
+    serve.add_argument("--assets", choices=ASSET_POLICIES, default=CACHE_ASSETS)
+    serve.add_argument("--upstream", default=None, help="storefront to record (default: the base URL)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8080)
+    commands.add_parser("info", help="summarize the recorded responses")
+    args = parser.parse_args(argv)
+
+    store = HttpStore(args.cache_dir)
+    if args.command == "info":
+        responses = [r for by_test in store.entries.values() for rs in by_test.values() for r in rs]
+        bodies = {r["body"] for r in responses}
+        size = sum(os.path.getsize(store._body_path(digest)) for digest in bodies
+                   if os.path.exists(store._body_path(digest)))
+        print(f"📋 {len(store.entries)} request keys, {len(responses)} responses, "
+              f"{len(bodies)} bodies ({size / 2**20:.1f} MiB) in {args.cache_dir}")
+        return
+
+    proxy = RecordReplayProxy(args.mode, args.upstream, store, args.assets, args.host, args.port, verbose=True)
+    print(f"📡 {args.mode} proxy for {proxy.upstream_origin} on {proxy.url}")
+    try:
+        proxy._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy._server.server_close()
+        store.save()
+        print(f"📊 {dict(proxy.totals())}")
+
+
+if __name__ == "__main__":
+    main()
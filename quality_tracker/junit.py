@@ -0,0 +1,169 @@
+"""Streaming extraction of per-TC results from a batch JUnit XML report.
+
+``ET.parse`` holds the whole report in memory, and looking a test up by
+substring match walks every ``testsuite``/``testcase`` again for each failure.
+:func:`iter_testcases` instead reads the file with ``iterparse`` and drops
+each ``<testcase>`` as soon as it has been turned into a record, so memory
+stays flat however large the batch report is.  :class:`ResultIndex` builds the
+TC ID -> records index in that single pass, and :func:`result_payloads` turns
+it into the same result entries the runner sends, failure details included
+(classified by :func:`quality_tracker.payloads.categorize_failure`).
+
+Usage::
+
+    python -m quality_tracker.junit extract test-results/junit-batch.xml \\
+        --test-ids "TC_002 TC_003" [--mode enhanced|raw-xml] [--failed-only] \\
+        [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+from . import payloads
+from .context import parse_test_ids
+from .tc_index import find_ids, normalize
+
+# Outcome elements pytest writes inside a <testcase>; <error> is a failure in
+# setup or teardown, which the runner reports as a failure too
+_OUTCOMES = {"failure": "failed", "error": "failed", "skipped": "skipped"}
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _record(case):
+    """The JUnit-style record (see ``status_events.junit_record``) of a ``<testcase>``."""
+    record = {
+        "classname": case.get("classname", ""),
+        "name": case.get("name", ""),
+        "file": case.get("file", ""),
+        "line": case.get("line", "0"),
+        "time": float(case.get("time") or 0),
+        "outcome": "passed",
+    }
+    for child in case:
+        outcome = _OUTCOMES.get(_local(child.tag))
+        if outcome is None or (outcome == "skipped" and record["outcome"] != "passed"):
+            continue
+        record["outcome"] = outcome
+        record["failure_type"] = child.get("type", "")
+        record["failure_message"] = child.get("message", "")
+        record["failure_text"] = child.text or ""
+        if outcome == "failed":
+            break
+    return record
+
+
+def iter_testcases(source):
+    """Yield a record per ``<testcase>`` of a JUnit report, without building the tree.
+
+    ``source`` is a path or a binary file object.
+    """
+    stack = []
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        if _local(element.tag) != "testcase":
+            continue
+        yield _record(element)
+        # Drop the finished testcase and anything before it in its suite
+        if stack:
+            del stack[-1][:]
+        else:
+            element.clear()
+
+
+class ResultIndex:
+    """TC ID -> records of the testcases implementing it, from one pass over a report.
+
+    A testcase implements the TC IDs :func:`~quality_tracker.tc_index.find_ids`
+    finds in its class path and name, so ``TC_1`` does not match
+    ``test_x_TC_10``.  Reports carry no docstrings, so IDs only given in a
+    docstring are not seen here.
+    """
+
+    def __init__(self, source, test_ids):
+        self.test_ids = list(test_ids)
+        self.records = {test_id: [] for test_id in self.test_ids}
+        self.testcases = 0
+        # Requested IDs in any spelling, by normalized ID
+        requested = {}
+        for test_id in self.test_ids:
+            requested.setdefault(normalize(test_id), []).append(test_id)
+        for record in iter_testcases(source):
+            self.testcases += 1
+            for found in find_ids(f"{record['classname']}.{record['name']}"):
+                for test_id in requested.get(found, ()):
+                    self.records[test_id].append(record)
+
+    def status(self, test_id):
+        records = self.records.get(test_id)
+        if not records:
+            return "Not Found"
+        if any(r["outcome"] == "failed" for r in records):
+            return "Failed"
+        return "Passed"
+
+
+def result_entry(index, test_id, mode=payloads.ENHANCED, junit_file=""):
+    """The result payload the runner sends for ``test_id``, rebuilt from the report."""
+    records = index.records.get(test_id, [])
+    status = index.status(test_id)
+    duration = round(sum(r["time"] for r in records), 2)
+    result = payloads.result_entry(test_id, status, duration)
+    if mode == payloads.RAW_XML:
+        if records:
+            payloads.add_raw_junit(result, junit_file, payloads.junit_document(records))
+        else:
+            payloads.add_raw_junit(result, junit_file)
+    elif status == "Failed":
+        failed = [r for r in records if r["outcome"] == "failed"]
+        payloads.add_enhanced_failure(result, failed[0])
+    return result
+
+
+def result_payloads(source, test_ids, mode=payloads.ENHANCED, failed_only=False):
+    """Result entries for ``test_ids`` from a JUnit report, in the order given."""
+    index = ResultIndex(source, test_ids)
+    junit_file = source if isinstance(source, str) else ""
+    for test_id in index.test_ids:
+        if failed_only and index.status(test_id) != "Failed":
+            continue
+        yield result_entry(index, test_id, mode, junit_file)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.junit", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    extract = commands.add_parser("extract", help="result payloads for TC IDs from a JUnit report")
+    extract.add_argument("report", help="JUnit XML file, e.g. test-results/junit-batch.xml")
+    extract.add_argument("--test-ids", help="TC IDs to extract (default: $TEST_CASE_IDS)")
+    extract.add_argument("--mode", choices=payloads.PAYLOAD_MODES, default=payloads.ENHANCED,
+                         help="payload flavour (default: %(default)s)")
+    extract.add_argument("--failed-only", action="store_true", help="only the failed test cases")
+    extract.add_argument("--output", help="write the results here instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    test_ids = parse_test_ids(args.test_ids if args.test_ids is not None else os.environ.get("TEST_CASE_IDS", ""))
+    results = list(result_payloads(args.report, test_ids, args.mode, args.failed_only))
+    document = json.dumps({"results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+        print(f"📋 {len(results)} results from {args.report} -> {args.output}")
+    else:
+        print(document)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
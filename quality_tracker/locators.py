@@ -0,0 +1,313 @@
+"""Logical storefront elements and a resolver that remembers which selector works.
+
+OpenCart themes and versions disagree on markup, so the tests describe an
+element such as "the add-to-cart button" by a list of candidate CSS/XPath
+selectors (XPath when the selector contains ``//``, as before).  Trying them
+one ``find_element`` at a time costs a WebDriver round trip per miss, plus the
+implicit wait if one is set.  :class:`LocatorResolver` instead evaluates the
+candidates inside the page in a single script call and returns the first
+match.
+
+The selector that matched is cached per site and theme in
+``.quality-tracker/locators.json`` and tried first next time.  When it stops
+matching, the same call falls through to the other candidates and the cache
+is updated (or the entry dropped if nothing matches), so no manual
+invalidation is needed.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+
+from .catalog import ROOT
+
+LOCATOR_CACHE_FILE = os.environ.get(
+    "QT_LOCATOR_CACHE_FILE", os.path.join(ROOT, ".quality-tracker", "locators.json")
+)
+
+
+class Locator:
+    """A named element and its candidate selectors, most likely first."""
+
+    def __init__(self, name, *candidates):
+        self.name = name
+        self.candidates = candidates
+
+    def __repr__(self):
+        return f"Locator({self.name!r})"
+
+
+def selector_kind(selector):
+    return "xpath" if "//" in selector else "css"
+
+
+SEARCH_BUTTON = Locator(
+    "search-button",
+    "button[type='button'][class*='btn']",  # Common in newer versions
+    ".btn-default",  # Used in some themes
+    "button.btn",  # Generic bootstrap button
+    "#search button",  # Button inside search element
+    "//div[@id='search']//button",
+)
+PRODUCT = Locator(
+    "product",
+    ".product-layout:first-child",
+    ".product-thumb:first-child",
+    ".product:first-child",
+    "//div[contains(@class, 'product')]",
+)
+PRODUCT_TILES = Locator(
+    "product-tiles",
+    ".product-layout",
+    ".product-thumb",
+    "//div[contains(@class, 'product-layout')]",
+    "//div[contains(@class, 'product-thumb')]",
+)
+ADD_TO_CART_BUTTON = Locator(
+    "add-to-cart-button",
+    "#button-cart",
+    "button[id*='cart']",
+    "//button[contains(@id, 'cart')]",
+    "//button[contains(text(), 'Add to Cart')]",
+)
+MY_ACCOUNT_LINK = Locator(
+    "my-account-link",
+    "#top-links a[title='My Account']",
+    "//a[contains(text(), 'My Account')]",
+    "//a[contains(@title, 'My Account')]",
+)
+LOGIN_LINK = Locator(
+    "login-link",
+    "//a[contains(text(), 'Login')]",
+    "#top-links a[href*='login']",
+    "//a[contains(@href, 'login')]",
+)
+LOGIN_SUBMIT = Locator(
+    "login-submit",
+    "input[type='submit']",
+    ".btn-primary",
+    "button[type='submit']",
+    "//input[@type='submit']",
+    "//button[@type='submit']",
+    "//button[contains(text(), 'Login')]",
+    "//input[contains(@value, 'Login')]",
+)
+WISHLIST_BUTTON = Locator(
+    "wishlist-button",
+    "button[data-original-title='Add to Wish List']",
+    "button[title='Add to Wish List']",
+    ".fa-heart",
+    "button[onclick*='wishlist']",
+    "//button[contains(@onclick, 'wishlist')]",
+    "//button[contains(@data-original-title, 'Wish List')]",
+    "//button[contains(@title, 'Wish List')]",
+    "//i[contains(@class, 'fa-heart')]/..",
+)
+WISHLIST_LINK = Locator(
+    "wishlist-link",
+    "a[title='Wish List']",
+    "#wishlist-total",
+    "//a[contains(@title, 'Wish List')]",
+    "//a[contains(text(), 'Wish List')]",
+)
+WISHLIST_REMOVE_BUTTONS = Locator(
+    "wishlist-remove-buttons",
+    "a[data-original-title='Remove']",
+    "a[title='Remove']",
+    ".fa-times",
+    "button[onclick*='remove']",
+    "//a[contains(@onclick, 'remove')]",
+    "//i[contains(@class, 'fa-times')]/..",
+)
+
+# arguments[0]: [[kind, selector], ...]; arguments[1]: return every match of
+# the winning selector rather than the first.  Selectors the browser cannot
+# parse (e.g. jQuery's :contains) are skipped.
+_RESOLVE_JS = """
+var candidates = arguments[0], all = arguments[1], found = null, index = -1;
+for (var i = 0; i < candidates.length && index < 0; i++) {
+    var kind = candidates[i][0], selector = candidates[i][1], matches = [];
+    try {
+        if (kind === 'xpath') {
+            var result = document.evaluate(selector, document, null,
+                XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < result.snapshotLength && (all || !matches.length); j++) {
+                matches.push(result.snapshotItem(j));
+            }
+        } else {
+            matches = all ? Array.prototype.slice.call(document.querySelectorAll(selector))
+                          : [document.querySelector(selector)].filter(Boolean);
+        }
+    } catch (e) { continue; }
+    if (matches.length) { index = i; found = matches; }
+}
+var link = document.querySelector("link[href*='catalog/view/theme/']");
+var theme = link && link.getAttribute('href').match(/catalog\\/view\\/theme\\/([^\\/]+)/);
+return [index, found, location.host, theme ? theme[1] : ''];
+"""
+
+
+class LocatorCache:
+    """Winning selector per ``site|theme|element``, kept in a JSON file."""
+
+    def __init__(self, path=LOCATOR_CACHE_FILE):
+        self.path = path
+        self.entries = self._read()
+        self._changed = {}
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, selector):
+        with self._lock:
+            if self.entries.get(key) != selector:
+                self.entries[key] = selector
+                self._changed[key] = selector
+
+    def drop(self, key):
+        with self._lock:
+            if self.entries.pop(key, None) is not None:
+                self._changed[key] = None
+
+    def save(self):
+        """Merge this process's changes into the file (workers share it)."""
+        with self._lock:
+            if not self._changed:
+                return
+            merged = self._read()
+            for key, selector in self._changed.items():
+                if selector is None:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = selector
+            self._changed = {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class LocatorResolver:
+    """Finds logical elements in one script call, trying the cached winner first."""
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else LocatorCache()
+        # Until a page tells us, assume the site and theme seen most before
+        sites = Counter(key.rsplit("|", 1)[0] for key in self.cache.entries)
+        self.site = sites.most_common(1)[0][0] if sites else ""
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _ordered(self, locator, exclude=()):
+        # The page's site and theme come back with the result, so order by the
+        # last ones seen; a different site only costs a less useful order.
+        cached = self.cache.get(f"{self.site}|{locator.name}")
+        candidates = [s for s in locator.candidates if s not in exclude]
+        if cached in candidates:
+            candidates.remove(cached)
+            candidates.insert(0, cached)
+        return cached, candidates
+
+    def _resolve(self, driver, locator, all_matches, exclude=()):
+        cached, candidates = self._ordered(locator, exclude)
+        if not candidates:
+            return None, []
+        index, found, host, theme = driver.execute_script(
+            _RESOLVE_JS, [[selector_kind(s), s] for s in candidates], all_matches
+        )
+        self.site = f"{host}|{theme}"
+        key = f"{self.site}|{locator.name}"
+        if index < 0:
+            if not exclude and self.cache.get(key) is not None:
+                self.invalidations += 1
+                self.cache.drop(key)
+            return None, []
+        selector = candidates[index]
+        if selector == cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if cached is not None and not exclude:
+                self.invalidations += 1
+            self.cache.put(key, selector)
+        return selector, found
+
+    def find(self, driver, locator):
+        """First element matching any candidate, or None."""
+        _, found = self._resolve(driver, locator, all_matches=False)
+        return found[0] if found else None
+
+    def find_all(self, driver, locator):
+        """Every element matching the first candidate that matches anything."""
+        return self._resolve(driver, locator, all_matches=True)[1]
+
+    def click(self, driver, locator):
+        """Click the element; if the click fails, move on to the next matching
+        candidate, as the per-selector try/except loops did.  Returns whether
+        anything was clicked."""
+        from selenium.common.exceptions import WebDriverException
+
+        tried = []
+        while True:
+            selector, found = self._resolve(driver, locator, all_matches=False, exclude=tried)
+            if selector is None:
+                return False
+            try:
+                found[0].click()
+            except WebDriverException:
+                tried.append(selector)
+                continue
+            if tried:
+                # The selector that matched first is not the one that works
+                self.cache.put(f"{self.site}|{locator.name}", selector)
+            return True
+
+    def summary_line(self):
+        return (f"locators: {self.hits} cache hits, {self.misses} misses, "
+                f"{self.invalidations} invalidated")
+
+
+_resolver = None
+
+
+def resolver():
+    """The process-wide :class:`LocatorResolver`, loaded on first use."""
+    global _resolver
+    if _resolver is None:
+        _resolver = LocatorResolver()
+    return _resolver
+
+
+def save():
+    if _resolver is not None:
+        _resolver.cache.save()
+
+
+def summary_line():
+    """Cache statistics of this process, or "" if nothing was resolved."""
+    if _resolver is None or not _resolver.hits + _resolver.misses:
+        return ""
+    return _resolver.summary_line()
+
+
+def find(driver, locator):
+    return resolver().find(driver, locator)
+
+
+def find_all(driver, locator):
+    return resolver().find_all(driver, locator)
+
+
+def click(driver, locator):
+    return resolver().click(driver, locator)
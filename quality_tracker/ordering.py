@@ -0,0 +1,87 @@
+"""Failure-first ordering of a dispatch's tests, from the duration history.
+
+With ``--order failures-first`` the runner does not run test cases in the
+order ``TEST_CASE_IDS`` arrived in, but puts first the ones most likely to
+report a real failure soon:
+
+1. test cases whose last run failed,
+2. test cases whose test file changed since their last run (or, given a list
+   of changed files such as ``git diff --name-only BASE`` prints, whose test
+   file is on it -- a fresh checkout has no useful modification times),
+3. test cases that never ran here,
+4. everything else.
+
+Within a group, higher failure rates go first, then shorter expected
+durations, so the first failure of a dispatch is reported as early as
+possible.  See :mod:`quality_tracker.history` for where the outcomes and
+durations come from.
+"""
+
+import os
+
+ORDERS = ("dispatch", "failures-first")
+
+FAILED, CHANGED, NEW, STABLE = range(4)
+GROUP_NAMES = {FAILED: "failed last run", CHANGED: "changed", NEW: "no history", STABLE: "stable"}
+
+
+def _mtime(path, cache):
+    if path not in cache:
+        try:
+            cache[path] = os.path.getmtime(path)
+        except OSError:
+            cache[path] = 0.0
+    return cache[path]
+
+
+def read_changed_files(path):
+    """Absolute paths of the files listed in ``path``, one per line relative to
+    the working directory; an unreadable list counts as no changes."""
+    try:
+        with open(path) as f:
+            return {os.path.abspath(line.strip()) for line in f if line.strip()}
+    except OSError:
+        return set()
+
+
+def group(stats, modified):
+    """The ordering group of a test case with history ``stats`` (or None)."""
+    if stats is None:
+        return NEW
+    if stats.last_outcome == "Failed":
+        return FAILED
+    if modified > stats.last_executed:
+        return CHANGED
+    return STABLE
+
+
+def order_items(items, item_tests, history, changed_files=None):
+    """Return ``items`` sorted failure-first, and the group of each TC ID.
+
+    ``item_tests`` maps an item's node ID to the TC IDs it implements; an
+    item shared by several TC IDs takes the most urgent of their groups.
+    ``changed_files`` (absolute paths) replaces the test files' modification
+    times as the test of what changed.
+    """
+    mtimes = {}
+    groups = {}
+
+    def key(position_item):
+        position, item = position_item
+        path = str(getattr(item, "path", "") or item.fspath)
+        if changed_files is not None:
+            # Listed files changed after any run, the others before all of them
+            modified = float("inf") if os.path.abspath(path) in changed_files else 0.0
+        else:
+            modified = _mtime(path, mtimes)
+        ranks = []
+        for test_id in item_tests.get(item.nodeid, ()):
+            stats = history.stats(test_id)
+            groups[test_id] = group(stats, modified)
+            failure_rate = stats.failures / stats.runs if stats and stats.runs else 0.0
+            expected = stats.ewma if stats else 0.0
+            ranks.append((groups[test_id], -failure_rate, expected))
+        return (min(ranks) if ranks else (STABLE, 0.0, 0.0)) + (position,)
+
+    ordered = [item for _, item in sorted(enumerate(items), key=key)]
+    return ordered, groups
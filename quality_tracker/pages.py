@@ -0,0 +1,226 @@
+"""Page objects for the OpenCart storefront pages the tests touch.
+
+Reading the page element by element (``find_element``, ``.text``,
+``.is_displayed()``, ``get_attribute("class")``) costs one chromedriver round
+trip per call, and a loop over links or alerts multiplies that.  A page
+object instead reads everything the tests look at -- URL, heading, ``#content``
+text, alerts and their classes, cart total, visible menu links, table rows,
+product tiles -- in one script call, as a :class:`PageState` snapshot.  The
+snapshot is taken lazily and dropped by any action that can change the page.
+
+Actions click through :mod:`quality_tracker.locators`, so the candidate
+selectors and their cache are shared with the rest of the suite.
+"""
+
+import re
+from urllib.parse import urljoin
+
+from . import base_url, locators
+from .waits import dropdown_visible, wait_until
+
+_STATE_JS = """
+function visible(e) { return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length); }
+function text(selector) { var e = document.querySelector(selector); return e ? (e.innerText || '') : null; }
+function all(selector) { return Array.prototype.slice.call(document.querySelectorAll(selector)); }
+return {
+    url: location.href,
+    title: document.title,
+    h1: text('h1'),
+    content: text('#content'),
+    cartTotal: text('#cart-total'),
+    alerts: all('.alert').map(function (a) { return {className: a.className || '', text: a.innerText || ''}; }),
+    menuLinks: all('#menu a').filter(visible).map(function (a) { return {text: a.innerText || '', href: a.href}; }),
+    hasProduct: !!document.getElementById('product'),
+    tableRows: all('.table-responsive tr').length,
+    productTiles: all('.product-layout').length
+};
+"""
+
+# Visible #menu links in document order (the script takes no arguments)
+_VISIBLE_MENU_LINKS_JS = """
+return Array.prototype.filter.call(document.querySelectorAll('#menu a'), function (e) {
+    return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length);
+});
+"""
+
+_ITEM_COUNT = re.compile(r"(\d+)\s*item", re.IGNORECASE)
+
+ACCOUNT_INDICATORS = ("My Account", "Account Dashboard", "My Orders", "Logout")
+
+
+class PageState:
+    """What the page showed when the snapshot was taken."""
+
+    def __init__(self, data):
+        self.url = data.get("url") or ""
+        self.title = data.get("title") or ""
+        self.h1 = data.get("h1")
+        self.content = data.get("content")
+        self.cart_total = data.get("cartTotal")
+        self.alerts = data.get("alerts") or []
+        self.menu_links = data.get("menuLinks") or []
+        self.has_product = bool(data.get("hasProduct"))
+        self.table_rows = data.get("tableRows") or 0
+        self.product_tiles = data.get("productTiles") or 0
+
+    def success_alerts(self, text=None):
+        """Texts of the alerts with a success class (containing ``text``, if given)."""
+        return [
+            alert["text"] for alert in self.alerts
+            if "success" in alert["className"].lower()
+            and (text is None or text.lower() in alert["text"].lower())
+        ]
+
+    @property
+    def cart_items(self):
+        match = _ITEM_COUNT.search(self.cart_total or "")
+        return int(match.group(1)) if match else None
+
+
+class Page:
+    """A storefront page; ``route`` is the OpenCart route :meth:`open` goes to."""
+
+    route = None
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._state = None
+
+    def url(self):
+        return urljoin(base_url(), f"index.php?route={self.route}" if self.route else "")
+
+    def open(self):
+        self.driver.get(self.url())
+        self._state = None
+        return self
+
+    @property
+    def state(self):
+        """The current snapshot, read in one script call if there is none."""
+        if self._state is None:
+            self._state = PageState(self.driver.execute_script(_STATE_JS) or {})
+        return self._state
+
+    def refresh(self):
+        self._state = None
+        return self.state
+
+    def click(self, locator):
+        """Click a logical element (see :mod:`quality_tracker.locators`)."""
+        self._state = None
+        return locators.click(self.driver, locator)
+
+    def content_text(self):
+        return self.state.content or ""
+
+
+class HomePage(Page):
+    route = None
+
+    def open_category(self, index=0):
+        """Click the ``index``-th visible top menu link, or the next one that takes a click.
+
+        Returns whether any link could be clicked.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        links = self.driver.execute_script(_VISIBLE_MENU_LINKS_JS) or []
+        for link in links[index:]:
+            self._state = None
+            try:
+                link.click()
+                return True
+            except WebDriverException:
+                continue
+        return False
+
+    def open_first_product(self):
+        return self.click(locators.PRODUCT_TILES)
+
+
+class SearchResultsPage(Page):
+    route = "product/search"
+
+    def search(self, term):
+        """Search from the header box; presses Enter when no search button works."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+
+        search_box = self.driver.find_element(By.NAME, "search")
+        search_box.clear()
+        search_box.send_keys(term)
+        if not self.click(locators.SEARCH_BUTTON):
+            search_box.send_keys(Keys.RETURN)
+        return self
+
+
+class ProductPage(Page):
+    route = "product/product"
+
+    def __init__(self, driver, product_id=None):
+        super().__init__(driver)
+        self.product_id = product_id
+
+    def url(self):
+        return super().url() + (f"&product_id={self.product_id}" if self.product_id else "")
+
+    @property
+    def name(self):
+        return self.state.h1 or "Product"
+
+    def add_to_cart(self):
+        return self.click(locators.ADD_TO_CART_BUTTON)
+
+    def add_to_wishlist(self):
+        return self.click(locators.WISHLIST_BUTTON)
+
+
+class LoginPage(Page):
+    route = "account/login"
+
+    def open_from_menu(self):
+        """Go through the My Account dropdown; returns whether Login was clicked."""
+        self.click(locators.MY_ACCOUNT_LINK)
+        wait_until(self.driver, dropdown_visible(), required=False)
+        return self.click(locators.LOGIN_LINK)
+
+    def login(self, email, password):
+        """Fill in and submit the form; returns the URL the form was on."""
+        from selenium.webdriver.common.by import By
+
+        for field_id, value in (("input-email", email), ("input-password", password)):
+            field = self.driver.find_element(By.ID, field_id)
+            field.clear()
+            field.send_keys(value)
+        login_url = self.driver.current_url
+        self.click(locators.LOGIN_SUBMIT)
+        return login_url
+
+    def logged_in(self):
+        """Whether the page is in the account area (by URL or by its content)."""
+        state = self.state
+        if "account" in state.url and "login" not in state.url:
+            return True
+        content = state.content or ""
+        return any(indicator in content for indicator in ACCOUNT_INDICATORS)
+
+
+class WishlistPage(Page):
+    route = "account/wishlist"
+
+    def open_from_header(self):
+        """Use the header link, falling back to the URL."""
+        if not self.click(locators.WISHLIST_LINK):
+            self.open()
+        return self
+
+    @property
+    def product_count(self):
+        # Table rows minus the header row; themes without the table list tiles
+        state = self.state
+        if state.table_rows:
+            return state.table_rows - 1
+        return state.product_tiles
+
+    def remove_first(self):
+        return self.click(locators.WISHLIST_REMOVE_BUTTONS)
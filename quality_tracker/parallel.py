@@ -0,0 +1,189 @@
+"""Parallel execution mode: spread a dispatch's test cases over local workers.
+
+Each worker is a separate ``quality_tracker.runner`` process with its own
+pytest session and browser pool, and it reports every TC ID it owns exactly as
+a serial run would.  Test cases are assigned longest-expected-first to the
+least loaded worker (LPT scheduling), so the slowest shard finishes as early as
+possible.  Expected durations come from the measured history (the workers
+record into it as each test case finishes), falling back to the catalog's
+``estimatedDuration`` (in minutes, or the unit the history calibrates) and
+then to the median of known estimates.
+"""
+
+import heapq
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .contexts import SharedChrome
+from .history import DurationHistory
+from .results_store import LogIndex
+
+
+def expected_durations(test_ids, estimates, history):
+    """Return ``{test_id: (seconds, source)}`` for scheduling."""
+    known = {}
+    for test_id in test_ids:
+        expected = history.expected(test_id)
+        if expected is not None:
+            known[test_id] = (expected, "history")
+        elif test_id in estimates:
+            known[test_id] = (estimates[test_id], "catalog")
+    default = statistics.median(v for v, _ in known.values()) if known else 1.0
+    return {test_id: known.get(test_id, (default, "default")) for test_id in test_ids}
+
+
+def plan_shards(test_ids, durations, workers):
+    """Longest-processing-time-first assignment of TC IDs to ``workers`` shards.
+
+    ``durations`` maps TC ID -> expected seconds.  Returns a list of
+    ``(expected_total, [test_ids])`` with empty shards dropped.
+    """
+    position = {test_id: index for index, test_id in enumerate(test_ids)}
+    order = sorted(test_ids, key=lambda test_id: (-durations[test_id], position[test_id]))
+    heap = [(0.0, index) for index in range(max(1, workers))]
+    shards = [[] for _ in heap]
+    for test_id in order:
+        load, index = heapq.heappop(heap)
+        shards[index].append(test_id)
+        heapq.heappush(heap, (load + durations[test_id], index))
+    loads = {index: load for load, index in heap}
+    return [(loads[index], shard) for index, shard in enumerate(shards) if shard]
+
+
+def worker_command(args, shard, worker_dir):
+    command = [
+        sys.executable, "-m", "quality_tracker.runner",
+        "--workers", "1",
+        "--test-ids", " ".join(shard),
+        "--payload-mode", args.payload_mode,
+        "--results-dir", worker_dir,
+        # Workers append to the run's shared event log; the parent compacts it
+        "--results-log", args.results_log,
+        "--resume",
+        "--results-file", "",
+        "--tests-path", args.tests_path,
+        "--order", args.order,
+        "--fail-fast-per-requirement", str(args.fail_fast_per_requirement),
+    ]
+    if args.changed_files:
+        command += ["--changed-files", args.changed_files]
+    if args.rerun_failures:
+        command.append("--rerun-failures")
+    if args.test_timeouts:
+        command.append("--test-timeouts")
+    if args.artifacts:
+        command.append("--artifacts")
+    if args.json_report:
+        command.append("--json-report")
+    if args.pytest_args:
+        command += ["--", *args.pytest_args]
+    return command
+
+
+def run(context, args):
+    """Run ``context.test_ids`` across ``args.workers`` processes and report."""
+    history = DurationHistory()
+    durations = expected_durations(context.test_ids, history.estimated_seconds(args.catalog), history)
+    history.close()
+    shards = plan_shards(context.test_ids, {k: v[0] for k, v in durations.items()}, args.workers)
+    serial_estimate = sum(seconds for seconds, _ in durations.values())
+
+    print(f"⚙️ Parallel mode: {len(context.test_ids)} test cases on {len(shards)} workers")
+    print(f"   Planned makespan {max(load for load, _ in shards):.0f}s vs serial estimate {serial_estimate:.0f}s")
+
+    # One Chrome hosts every worker's shared_browser contexts (see contexts.py)
+    shared_chrome = None
+    if args.shared_contexts and not os.environ.get("QT_SHARED_CHROME"):
+        shared_chrome = SharedChrome()
+        try:
+            print(f"🌐 Shared Chrome for browser contexts at {shared_chrome.start()}")
+        except (OSError, RuntimeError) as error:
+            print(f"⚠️ No shared Chrome ({error}); each worker hosts its own contexts")
+            shared_chrome = None
+
+    try:
+        started = time.monotonic()
+        workers = []
+        for index, (load, shard) in enumerate(shards):
+            worker_dir = os.path.join(args.results_dir, f"worker-{index}")
+            os.makedirs(worker_dir, exist_ok=True)
+            log_file = open(os.path.join(worker_dir, "runner.log"), "w")
+            # QT_WORKER_ID keeps each worker's session snapshots apart (see
+            # sessions.py); artifacts go to the run's one store (see artifacts.py)
+            env = dict(os.environ, QT_WORKER_ID=f"worker-{index}")
+            if args.artifacts:
+                env["QT_ARTIFACT_STORE"] = os.path.abspath(os.path.join(args.results_dir, "artifacts"))
+            if shared_chrome is not None:
+                env["QT_SHARED_CHROME"] = shared_chrome.address
+            process = subprocess.Popen(worker_command(args, shard, worker_dir),
+                                       stdout=log_file, stderr=subprocess.STDOUT, env=env)
+            print(f"   worker-{index}: {len(shard)} tests, ~{load:.0f}s expected: {' '.join(shard)}")
+            workers.append({"index": index, "dir": worker_dir, "shard": shard, "expected": load,
+                            "process": process, "log": log_file, "wall": None})
+
+        remaining = list(workers)
+        while remaining:
+            for worker in list(remaining):
+                if worker["process"].poll() is not None:
+                    worker["wall"] = time.monotonic() - started
+                    worker["log"].close()
+                    remaining.remove(worker)
+                    print(f"::group::worker-{worker['index']} output")
+                    with open(os.path.join(worker["dir"], "runner.log"), errors="replace") as f:
+                        sys.stdout.write(f.read())
+                    print("::endgroup::")
+                    print(f"✅ worker-{worker['index']} finished in {worker['wall']:.1f}s "
+                          f"(exit code {worker['process'].returncode})")
+            if shared_chrome is not None:
+                shared_chrome.sample_rss()
+            time.sleep(0.2)
+        makespan = time.monotonic() - started
+    finally:
+        if shared_chrome is not None:
+            shared_chrome.stop()
+
+    measured = {r["id"]: float(r.get("duration") or 0) for r in LogIndex(args.results_log).results()
+                if r["status"] in ("Passed", "Failed")}
+    report = {
+        "workers": [],
+        "makespanSeconds": round(makespan, 2),
+        "measuredSerialSeconds": round(sum(measured.values()), 2),
+        "plannedMakespanSeconds": round(max(w["expected"] for w in workers), 2),
+        "serialEstimateSeconds": round(serial_estimate, 2),
+        "durationSources": {test_id: source for test_id, (_, source) in durations.items()},
+    }
+    if shared_chrome is not None and shared_chrome.peak_rss_bytes is not None:
+        report["sharedChromePeakRssBytes"] = shared_chrome.peak_rss_bytes
+        print(f"🌐 Shared Chrome peak RSS {shared_chrome.peak_rss_bytes / 1048576:.0f} MB "
+              f"for {len(workers)} workers' browser contexts")
+    print("📊 Worker utilization:")
+    for worker in workers:
+        busy = sum(measured.get(test_id, 0.0) for test_id in worker["shard"])
+        utilization = busy / makespan if makespan else 0.0
+        report["workers"].append({
+            "worker": worker["index"],
+            "testCases": worker["shard"],
+            "expectedSeconds": round(worker["expected"], 2),
+            "busySeconds": round(busy, 2),
+            "wallSeconds": round(worker["wall"], 2),
+            "utilization": round(utilization, 3),
+            "exitCode": worker["process"].returncode,
+        })
+        print(f"   worker-{worker['index']}: busy {busy:.1f}s / {makespan:.1f}s ({utilization:.0%})")
+    speedup = report["measuredSerialSeconds"] / makespan if makespan else 0.0
+    print(f"   Makespan {makespan:.1f}s vs {report['measuredSerialSeconds']:.1f}s of serial test time "
+          f"({speedup:.1f}x)")
+
+    with open(os.path.join(args.results_dir, "parallel-report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    codes = [w["process"].returncode for w in workers]
+    if all(code == 0 for code in codes):
+        return 0
+    # A worker killed by a signal (negative code, e.g. -9 when OOM-killed)
+    # left test cases unfinished, so it fails the run like a test failure
+    return 1 if any(code < 0 or code == 1 for code in codes) else max(codes)
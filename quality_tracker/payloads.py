@@ -0,0 +1,189 @@
+"""Callback payloads sent to the Quality Tracker.
+
+The structures here are the ones the workflows used to assemble with inline
+``python3 -c`` programs, so the receiving side sees no difference.  Two
+payload modes exist, matching the two workflows:
+
+* ``enhanced`` (ind03) parses each failure into a structured ``failure``
+  object with assertion details and a category.
+* ``raw-xml`` (ind04) ships the test's JUnit XML untouched for the frontend
+  to parse.
+"""
+
+import re
+import time
+import xml.etree.ElementTree as ET
+
+ENHANCED = "enhanced"
+RAW_XML = "raw-xml"
+PAYLOAD_MODES = (ENHANCED, RAW_XML)
+
+USER_AGENTS = {
+    ENHANCED: "GitHub-Actions-Quality-Tracker-Enhanced",
+    RAW_XML: "GitHub-Actions-Quality-Tracker-RawXML",
+}
+
+# Upper bound on rawOutput; see quality_tracker.capture
+MAX_RAW_OUTPUT = 50000
+
+# Simple assert like 'assert 1 == 2', in the failure message or the stack trace
+_ASSERT_IN_MESSAGE = re.compile(r"assert\s+(.+?)\s*(==|!=|<|>|<=|>=)\s*(.+?)(?:\s|$)")
+_ASSERT_IN_TRACE = re.compile(r"assert\s+(.+?)\s*(==|!=|<|>|<=|>=)\s*(.+?)(?:\n|$)")
+_ASSERTION = re.compile(r"assert", re.IGNORECASE)
+
+# Non-assertion categories, first match wins: (category, pattern searched in
+# the failure type, pattern searched in the message)
+_CATEGORIES = (
+    ("timeout", re.compile(r"timeout", re.IGNORECASE), re.compile(r"timeout", re.IGNORECASE)),
+    ("element", re.compile(r"element", re.IGNORECASE), re.compile(r"element", re.IGNORECASE)),
+    ("network", re.compile(r"network", re.IGNORECASE), re.compile(r"connection", re.IGNORECASE)),
+)
+
+
+def timestamp():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def result_entry(test_id, status, duration=0, logs="Test execution info", raw_output=""):
+    return {
+        "id": test_id,
+        "name": f"Test {test_id}",
+        "status": status,
+        "duration": duration,
+        "logs": logs,
+        "rawOutput": raw_output,
+    }
+
+
+def webhook_payload(request_id, results):
+    return {
+        "requestId": request_id,
+        "timestamp": timestamp(),
+        "results": list(results),
+    }
+
+
+def categorize_failure(failure_type, message, stack_trace):
+    """Return ``(category, assertion)`` for a failure; ``assertion`` may be None."""
+    if failure_type == "AssertionError" or _ASSERTION.search(message):
+        match = _ASSERT_IN_MESSAGE.search(message) or _ASSERT_IN_TRACE.search(stack_trace)
+        if match:
+            actual, operator, expected = (
+                match.group(1).strip(),
+                match.group(2),
+                match.group(3).strip(),
+            )
+        else:
+            # Basic assertion without clear expected/actual
+            actual = operator = expected = ""
+        return "assertion", {
+            "available": True,
+            "expression": message,
+            "actual": actual,
+            "expected": expected,
+            "operator": operator,
+        }
+
+    for category, in_type, in_message in _CATEGORIES:
+        if in_type.search(failure_type) or in_message.search(message):
+            return category, None
+    return "general", None
+
+
+def add_enhanced_failure(result, record):
+    """Attach the structured ``failure`` block for a failed JUnit test record.
+
+    ``record`` carries the attributes of a JUnit ``<testcase>`` plus its
+    ``<failure>`` element: ``classname``, ``name``, ``file``, ``line``,
+    ``time``, ``failure_type``, ``failure_message`` and ``failure_text``.
+    """
+    failure_type = record.get("failure_type") or "TestFailure"
+    message = record.get("failure_message") or ""
+    stack_trace = record.get("failure_text") or ""
+    file_path = record.get("file") or ""
+    line = str(record.get("line") or "0")
+    failure = {
+        "type": failure_type,
+        "message": message,
+        "file": file_path.split("/")[-1] if file_path else "",
+        "line": int(line) if line.isdigit() else 0,
+        "classname": record.get("classname", ""),
+        "method": record.get("name", ""),
+        "stackTrace": stack_trace,
+        "parsingSource": "junit-xml",
+        "parsingConfidence": "high",
+    }
+    category, assertion = categorize_failure(failure_type, message, stack_trace)
+    if assertion is not None:
+        failure["assertion"] = assertion
+    failure["category"] = category
+
+    result["failure"] = failure
+    result["execution"] = {
+        "framework": "pytest",
+        "testSuite": record.get("classname", ""),
+        "totalTime": float(record.get("time") or 0),
+        "junitSource": True,
+    }
+    result["framework"] = {
+        "name": "pytest",
+        "detected": True,
+        "junitSupported": True,
+    }
+    return result
+
+
+def add_raw_junit(result, junit_file, content=None, error=None):
+    """Attach the raw JUnit XML block used by the ``raw-xml`` payload mode."""
+    if error is not None:
+        result["junitXml"] = {"available": False, "error": str(error)}
+    elif content is None:
+        result["junitXml"] = {"available": False, "reason": "file_not_found"}
+    else:
+        result["junitXml"] = {
+            "available": True,
+            "filename": junit_file,
+            "content": content,
+            "size": len(content),
+        }
+        result["execution"] = {
+            "framework": "pytest",
+            "junitAvailable": True,
+            "processingMode": "frontend",
+        }
+    return result
+
+
+def junit_document(records):
+    """Render a standalone JUnit XML document for a set of test records."""
+    failures = sum(1 for r in records if r.get("outcome") == "failed")
+    skipped = sum(1 for r in records if r.get("outcome") == "skipped")
+    total_time = sum(float(r.get("time") or 0) for r in records)
+    suites = ET.Element("testsuites")
+    suite = ET.SubElement(
+        suites,
+        "testsuite",
+        name="pytest",
+        errors="0",
+        failures=str(failures),
+        skipped=str(skipped),
+        tests=str(len(records)),
+        time=f"{total_time:.3f}",
+        timestamp=timestamp(),
+    )
+    for record in records:
+        case = ET.SubElement(
+            suite,
+            "testcase",
+            classname=record.get("classname", ""),
+            name=record.get("name", ""),
+            file=record.get("file", ""),
+            line=str(record.get("line", 0)),
+            time=f"{float(record.get('time') or 0):.3f}",
+        )
+        if record.get("outcome") == "failed":
+            failure = ET.SubElement(case, "failure", message=record.get("failure_message", ""))
+            failure.text = record.get("failure_text", "")
+        elif record.get("outcome") == "skipped":
+            ET.SubElement(case, "skipped", message=record.get("failure_message", ""))
+    return '<?xml version="1.0" encoding="utf-8"?>' + ET.tostring(suites, encoding="unicode")
@@ -0,0 +1,125 @@
+"""Local stand-in for the Quality Tracker callback endpoint.
+
+Used to exercise the callback dispatcher without the real backend::
+
+    python -m quality_tracker.receiver --port 8765 [--delay 0.2] [--fail-every 5]
+
+or from code::
+
+    with StandInReceiver() as receiver:
+        dispatcher = CallbackDispatcher(receiver.url, ...)
+        ...
+        receiver.results  # every result received, in arrival order
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if receiver.delay:
+            time.sleep(receiver.delay)
+
+        code = receiver.accept(body, dict(self.headers), self.client_address)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args):
+        if self.server.receiver.verbose:
+            super().log_message(format, *args)
+
+
+class StandInReceiver:
+    """Threaded HTTP server that records the webhook payloads it receives."""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fail_every=0, verbose=False):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.verbose = verbose
+        self.requests = 0
+        self.payloads = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/callback"
+
+    @property
+    def results(self):
+        with self._lock:
+            return [result for payload in self.payloads for result in payload.get("results", [])]
+
+    def accept(self, body, headers, client_address):
+        """Record a request and return the HTTP status code to answer with."""
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            if self.fail_every and self.requests % self.fail_every == 0:
+                return 503
+            self.payloads.append(payload)
+        if self.verbose:
+            for result in payload.get("results", []):
+                print(f"📥 {result.get('id')} -> {result.get('status')}")
+        return 200
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.receiver", description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with HTTP 503")
+    args = parser.parse_args(argv)
+
+    receiver = StandInReceiver(args.host, args.port, args.delay, args.fail_every, verbose=True)
+    print(f"📡 Listening on {receiver.url}")
+    try:
+        receiver._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver._server.server_close()
+        print(f"📊 {receiver.requests} requests, {len(receiver.results)} results, "
+              f"{len(receiver.connections)} client connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Delivery of status events: callback webhooks and the results event log."""
+
+import json
+import os
+
+from . import payloads
+from .artifacts import externalize
+from .capture import OutputCapture, log_suffix
+from .dispatcher import CallbackDispatcher
+
+
+class RunReporter:
+    """Turns per-test status changes into webhooks, result updates and log files."""
+
+    def __init__(self, context, results_log, mode=payloads.ENHANCED, results_dir="test-results", log=print,
+                 history=None, artifacts=None):
+        self.context = context
+        self.history = history
+        # An ArtifactStore: large text fields are sent as references into it
+        self.artifacts = artifacts
+        self.mode = mode
+        self.results_dir = results_dir
+        self.log = log
+        self.results = results_log
+        # Final results of failed test cases, for the rerun verdict
+        self._failed = {}
+        self.dispatcher = None
+        if context.callback_url:
+            self.dispatcher = CallbackDispatcher(
+                context.callback_url,
+                {
+                    "User-Agent": payloads.USER_AGENTS[mode],
+                    "X-GitHub-Run-ID": context.run_id,
+                    "X-Request-ID": context.request_id,
+                },
+                request_id=context.request_id,
+            )
+        else:
+            self.log("❌ No CALLBACK_URL configured")
+
+    def start(self, test_ids):
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.log(f"📋 Initialized {len(test_ids)} test results")
+
+    def _send(self, result):
+        if self.dispatcher is None:
+            return
+        if self.mode == payloads.RAW_XML and "junitXml" not in result:
+            payloads.add_raw_junit(result, "")
+        self.dispatcher.submit(result)
+        self._flush_dispatch_log()
+
+    def _flush_dispatch_log(self):
+        for line in self.dispatcher.drain_log():
+            self.log(line)
+
+    def status(self, test_id, status):
+        """Report an intermediate status such as ``Not Started`` or ``Running``."""
+        self._send(payloads.result_entry(test_id, status))
+        self.results.status(test_id, status, logs=f"Test {status.lower()}")
+
+    def output(self, test_id):
+        """A bounded capture for the test case's output, spooled to its compressed log."""
+        return OutputCapture(os.path.join(self.results_dir, f"output-{test_id}.log{log_suffix()}"))
+
+    def finished(self, test_id, status, duration, output, records=()):
+        """Report the final status of a test case.
+
+        ``output`` is the :meth:`output` capture the test case's output was
+        written to.  ``records`` are the JUnit-style records of the pytest
+        items that implement the test case; they feed the failure details or
+        raw XML.
+        """
+        output.close()
+        raw_output = output.text()
+
+        result = payloads.result_entry(test_id, status, duration, raw_output=raw_output)
+        if self.mode == payloads.RAW_XML:
+            junit_file = os.path.join(self.results_dir, f"junit-{test_id}.xml")
+            if records:
+                content = payloads.junit_document(records)
+                with open(junit_file, "w", encoding="utf-8") as f:
+                    f.write(content)
+                payloads.add_raw_junit(result, junit_file, content)
+            else:
+                payloads.add_raw_junit(result, junit_file)
+        elif status == "Failed":
+            failed = [r for r in records if r.get("outcome") == "failed"]
+            if failed:
+                payloads.add_enhanced_failure(result, failed[0])
+        if self.artifacts is not None:
+            externalize(result, self.artifacts)
+
+        self._send(result)
+        self.results.status(test_id, status, duration, f"Test {status.lower()}", result["rawOutput"])
+        if status == "Failed":
+            self._failed[test_id] = result
+        if self.history is not None and status in ("Passed", "Failed"):
+            self.history.record(test_id, duration, status)
+        self.log(f"📊 Completed: {test_id} -> {status} ({duration}s)")
+
+    def rerun(self, test_id, classification, records):
+        """Report how a failed test case did when it was run again in a fresh browser.
+
+        ``classification`` is ``flaky`` (passed on rerun) or ``deterministic``.
+        The status stays ``Failed``; the result gains a ``rerun`` block.
+        """
+        result = dict(self._failed.get(test_id) or payloads.result_entry(test_id, "Failed"))
+        result["rerun"] = {
+            "classification": classification,
+            "outcome": "failed" if classification == "deterministic" else "passed",
+            "duration": round(sum(r["time"] for r in records), 2),
+        }
+        result["logs"] = f"Test failed ({classification} on rerun)"
+        self._send(result)
+        self.results.status(test_id, "Failed", result["duration"], result["logs"], result["rawOutput"])
+        self.log(f"🔁 Rerun: {test_id} -> {classification}")
+
+    def close(self):
+        """Deliver any queued webhooks and report dispatch statistics."""
+        self.results.close()
+        if self.artifacts is not None and self.artifacts.refs:
+            self.log(f"📦 {self.artifacts.summary_line()}")
+        if self.dispatcher is None:
+            return
+        self.dispatcher.close()
+        self._flush_dispatch_log()
+        self.log(f"📡 {self.dispatcher.summary_line()}")
+        with open(os.path.join(self.results_dir, "callback-stats.json"), "w") as f:
+            json.dump(self.dispatcher.stats.as_dict(), f, indent=2)
@@ -0,0 +1,282 @@
+"""Append-only results event log and its compaction into the final documents.
+
+Every status change of a run is one JSON line appended to
+``test-results/results.jsonl``, so recording a result costs the same however
+many test cases the run has, and a crash can at worst leave one torn last line
+(which is skipped when reading).  At the end, :func:`compact` streams over the
+log and writes ``current_results.json`` (and its ``results-$GITHUB_RUN_ID.json``
+copy) plus ``execution_summary.json``.  The same pass serves crash recovery:
+compacting the log of an interrupted run gives its partial results, and
+:func:`finished_ids` tells a resumed run which test cases are already done.
+
+Usage::
+
+    python -m quality_tracker.results_store compact test-results/results.jsonl \\
+        [--results current_results.json] [--copy-to results-123.json] \\
+        [--summary execution_summary.json] [--mode enhanced|raw-xml]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import textwrap
+from datetime import datetime, timezone
+
+from . import payloads
+from .dispatcher import latency_fields, merge_latency_samples
+
+FINAL_STATUSES = ("Passed", "Failed", "Skipped", "Not Found")
+
+SUMMARY_MODES = {
+    payloads.ENHANCED: {
+        "executionMode": "enhanced-junit-xml",
+        "note": "Enhanced: JUnit XML parsing + raw data capture",
+        "features": {
+            "junitXmlParsing": True,
+            "assertionExtraction": True,
+            "enhancedFailureData": True,
+            "frameworkDetection": True,
+        },
+    },
+    payloads.RAW_XML: {
+        "executionMode": "raw-junit-xml-frontend-processing",
+        "note": "Enhanced: Raw JUnit XML + frontend processing",
+        "features": {
+            "rawJunitXmlDelivery": True,
+            "frontendProcessing": True,
+            "workflowSimplified": True,
+            "consistentWithPolling": True,
+        },
+    },
+}
+
+
+class ResultsLog:
+    """Writer for the JSONL event log; each event is a single ``write``."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def reset(self):
+        """Start an empty log (a new run rather than a resumed one)."""
+        self.close()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        open(self.path, "w").close()
+
+    def append(self, event):
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # O_APPEND keeps concurrent writers (parallel workers) from
+            # overwriting each other's lines.
+            self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            size = os.fstat(self._fd).st_size
+            if size and os.pread(self._fd, 1, size - 1) != b"\n":
+                # Terminate a torn line left by a crash before resuming
+                os.write(self._fd, b"\n")
+        os.write(self._fd, (json.dumps(event, separators=(",", ":")) + "\n").encode("utf-8"))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def begin(self, requirement_id, request_id, test_ids):
+        self.append({
+            "event": "run",
+            "requirementId": requirement_id,
+            "requestId": request_id,
+            "testIds": list(test_ids),
+            "timestamp": payloads.timestamp(),
+        })
+
+    def status(self, test_id, status, duration=0, logs="", raw_output=""):
+        self.append({
+            "event": "status",
+            "id": test_id,
+            "status": status,
+            "duration": duration,
+            "logs": logs,
+            "rawOutput": raw_output,
+            "timestamp": payloads.timestamp(),
+        })
+
+
+def iter_events(path):
+    """Yield ``(offset, event)`` for every readable line of the log."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        offset = 0
+        for line in f:
+            start, offset = offset, offset + len(line)
+            try:
+                yield start, json.loads(line)
+            except ValueError:
+                # Torn last write of a crashed run
+                continue
+
+
+class LogIndex:
+    """One pass over the log: run metadata plus the offset of each TC's last event."""
+
+    def __init__(self, path):
+        self.path = path
+        self.requirement_id = ""
+        self.request_id = ""
+        self.order = []
+        self.last = {}
+        self.statuses = {}
+        seen = set()
+        for offset, event in iter_events(path):
+            if event.get("event") == "run":
+                self.requirement_id = event.get("requirementId") or self.requirement_id
+                self.request_id = event.get("requestId") or self.request_id
+                ids = event.get("testIds", [])
+            elif event.get("event") == "status":
+                ids = [event["id"]]
+                self.last[event["id"]] = offset
+                self.statuses[event["id"]] = event["status"]
+            else:
+                continue
+            for test_id in ids:
+                if test_id not in seen:
+                    seen.add(test_id)
+                    self.order.append(test_id)
+
+    def results(self):
+        """Yield the latest result entry of every TC, in dispatch order."""
+        with open(self.path, "rb") as f:
+            for test_id in self.order:
+                if test_id not in self.last:
+                    yield payloads.result_entry(test_id, "Not Started", logs="")
+                    continue
+                f.seek(self.last[test_id])
+                event = json.loads(f.readline())
+                yield payloads.result_entry(
+                    test_id, event["status"], event.get("duration", 0),
+                    logs=event.get("logs", ""), raw_output=event.get("rawOutput", ""),
+                )
+
+
+def finished_ids(path):
+    """TC IDs whose latest event in the log is a final status."""
+    index = LogIndex(path)
+    return {test_id for test_id, status in index.statuses.items() if status in FINAL_STATUSES}
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def write_results(index, path):
+    """Stream the consolidated results document, one entry at a time."""
+
+    def write(f):
+        f.write("{\n")
+        f.write(f'  "requirementId": {json.dumps(index.requirement_id)},\n')
+        f.write(f'  "requestId": {json.dumps(index.request_id)},\n')
+        f.write(f'  "timestamp": {json.dumps(payloads.timestamp())},\n')
+        f.write('  "results": [')
+        for position, result in enumerate(index.results()):
+            f.write(",\n" if position else "\n")
+            f.write(textwrap.indent(json.dumps(result, indent=2), "    "))
+        f.write("\n  ]\n}" if index.order else "]\n}")
+
+    _write_atomic(path, write)
+
+
+def build_summary(index, mode=payloads.ENHANCED, run_id="", callback_stats=None):
+    status_counts = {}
+    for test_id in index.order:
+        status = index.statuses.get(test_id, "Not Started")
+        status_counts[status] = status_counts.get(status, 0) + 1
+    mode_info = SUMMARY_MODES[mode]
+    summary = {
+        "executionMode": mode_info["executionMode"],
+        "requestId": index.request_id,
+        "requirementId": index.requirement_id,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "githubRunId": run_id,
+        "note": mode_info["note"],
+        "features": dict(mode_info["features"]),
+        "totalTests": len(index.order),
+        "statusSummary": status_counts,
+    }
+    if callback_stats is not None:
+        # Coalesced updates are never sent, so this is anywhere from one to three
+        sent = callback_stats.get("sent", 0)
+        summary["webhooksPerTest"] = round(sent / len(index.order), 2) if index.order else 0.0
+        summary["totalWebhooks"] = sent
+        summary["callbacks"] = {key: value for key, value in callback_stats.items() if key != "latencySamplesMs"}
+    return summary
+
+
+def compact(log_path, results_path="current_results.json", copy_to=None, summary_path=None,
+            mode=payloads.ENHANCED, run_id="", callback_stats=None):
+    """Produce the final results (and optionally summary) documents from the log."""
+    index = LogIndex(log_path)
+    write_results(index, results_path)
+    if copy_to:
+        shutil.copyfile(results_path, copy_to)
+    summary = build_summary(index, mode, run_id, callback_stats)
+    if summary_path:
+        _write_atomic(summary_path, lambda f: json.dump(summary, f, indent=2))
+    return summary
+
+
+def load_callback_stats(paths):
+    """Callback statistics of several workers' files combined (None if none could be read)."""
+    stats = None
+    for path in paths:
+        try:
+            with open(path) as f:
+                worker_stats = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if stats is None:
+            stats, samples = {}, []
+        samples.append((worker_stats.get("requests", 0), worker_stats.get("latencySamplesMs") or []))
+        for key, value in worker_stats.items():
+            if key in ("latencyMaxMs", "maxQueueDepth"):
+                stats[key] = max(stats.get(key, 0), value)
+            elif not key.startswith("latency"):
+                stats[key] = stats.get(key, 0) + value
+    if stats is not None:
+        # Percentiles do not add up; they are taken again over every worker's samples
+        merged = merge_latency_samples(samples)
+        stats.update(latency_fields(merged, max(stats.pop("latencyMaxMs", 0.0), max(merged, default=0.0))))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.results_store",
+                                     description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact_parser = commands.add_parser("compact", help="write the final results documents")
+    compact_parser.add_argument("log", help="results event log (JSONL)")
+    compact_parser.add_argument("--results", default="current_results.json")
+    compact_parser.add_argument("--copy-to", help="also copy the results document here")
+    compact_parser.add_argument("--summary", help="write execution_summary.json here")
+    compact_parser.add_argument("--mode", choices=payloads.PAYLOAD_MODES, default=payloads.ENHANCED)
+    compact_parser.add_argument("--callback-stats", nargs="*", default=[],
+                                help="callback-stats.json files to include in the summary")
+    args = parser.parse_args(argv)
+
+    summary = compact(args.log, args.results, args.copy_to, args.summary, args.mode,
+                      run_id=os.environ.get("GITHUB_RUN_ID", ""),
+                      callback_stats=load_callback_stats(args.callback_stats))
+    print(f"📋 Summary: {summary['totalTests']} tests")
+    for status, count in summary["statusSummary"].items():
+        print(f"  {status}: {count}")
+    print(f"✅ Results written to {args.results}" + (f" and {args.copy_to}" if args.copy_to else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Run the test cases of a requirement dispatch in a single pytest session.
+
+Usage::
+
+    python -m quality_tracker.runner [--test-ids "TC_002 TC_003"] \\
+        [--payload-mode enhanced|raw-xml] [-- extra pytest args]
+
+Settings default to the environment the workflows export (``TEST_CASE_IDS``,
+``CALLBACK_URL``, ``REQUEST_ID``, ...).  Collection happens once for the whole
+batch, and the Not Started / Running / final status events come from pytest
+hooks instead of one process per test case.  Only the test functions the
+static TC index (:mod:`quality_tracker.tc_index`) maps the TC IDs to are
+collected.
+"""
+
+import argparse
+import os
+import sys
+
+import pytest
+
+from . import payloads, parallel
+from .artifacts import ArtifactStore, bundle_store
+from .catalog import TEST_CASES_FILE, iter_test_cases
+from .context import RunContext, parse_test_ids
+from .history import DurationHistory
+from .ordering import ORDERS, read_changed_files
+from .reporting import RunReporter
+from .results_store import ResultsLog, compact, finished_ids
+from .status_events import StatusEvents
+from .tc_index import build_index
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.runner", description=__doc__.split("\n")[0])
+    parser.add_argument("--test-ids", help="TC IDs to run (default: $TEST_CASE_IDS)")
+    parser.add_argument("--payload-mode", choices=payloads.PAYLOAD_MODES, default=payloads.ENHANCED,
+                        help="callback payload flavour (default: %(default)s)")
+    parser.add_argument("--results-dir", default="test-results",
+                        help="directory for logs and JUnit XML (default: %(default)s)")
+    parser.add_argument("--results-file", default="current_results.json",
+                        help="consolidated results file written at the end; empty to skip (default: %(default)s)")
+    parser.add_argument("--results-log", help="append-only results event log (default: RESULTS_DIR/results.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                        help="append to an existing results log and skip test cases it already finished")
+    parser.add_argument("--tests-path", default="tests", help="test tree to collect (default: %(default)s)")
+    parser.add_argument("--json-report", action="store_true",
+                        help="also write a pytest-json-report file into the results directory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="run test cases across this many local processes (default: %(default)s)")
+    parser.add_argument("--catalog", default=TEST_CASES_FILE,
+                        help="test-case catalog with estimatedDuration used to balance workers")
+    parser.add_argument("--order", choices=ORDERS, default=os.environ.get("TEST_ORDER", "dispatch"),
+                        help="run test cases in dispatch order or failure-first from history "
+                             "(default: $TEST_ORDER or %(default)s)")
+    parser.add_argument("--changed-files", default=os.environ.get("QT_CHANGED_FILES"), metavar="FILE",
+                        help="files changed since the last run, one per line (git diff --name-only), for "
+                             "failures-first instead of modification times (default: $QT_CHANGED_FILES)")
+    parser.add_argument("--rerun-failures", action="store_true",
+                        help="rerun failed tests in a fresh browser at the end to tell flaky from deterministic")
+    parser.add_argument("--test-timeouts", action="store_true",
+                        help="fail a test that runs longer than 3x its p95 duration from history (at least 60s)")
+    parser.add_argument("--fail-fast-per-requirement", type=int, default=0, metavar="N",
+                        help="skip a requirement's remaining test cases after N of them failed (default: off)")
+    parser.add_argument("--artifacts", action="store_true",
+                        help="send large output fields as references into a content-addressed store, "
+                             "bundled into RESULTS_DIR/artifacts.qtb")
+    parser.add_argument("--shared-contexts", action="store_true",
+                        help="run shared_browser tests in isolated contexts of one Chrome per worker "
+                             "(see quality_tracker/contexts.py)")
+    parser.add_argument("pytest_args", nargs="*", help="extra arguments passed to pytest (after --)")
+    return parser
+
+
+def pytest_arguments(args, node_ids=()):
+    return [
+        # Without a single implemented TC ID the whole tree is collected, so
+        # the Not Found reports include any collection errors
+        *(node_ids or [args.tests_path]),
+        "-v",
+        "--tb=long",
+        f"--junit-xml={os.path.join(args.results_dir, 'junit-batch.xml')}",
+        *(["--json-report", f"--json-report-file={os.path.join(args.results_dir, 'json-batch.json')}"]
+          if args.json_report else []),
+        *args.pytest_args,
+    ]
+
+
+def requirement_map(catalog, context):
+    """TC ID -> requirement IDs from the catalog; the dispatch's requirement otherwise."""
+    requirements = {}
+    for test_case in iter_test_cases(catalog):
+        requirements[test_case.id] = tuple(test_case.requirementIds or ())
+    fallback = (context.requirement_id,) if context.requirement_id else ()
+    return {test_id: requirements.get(test_id) or fallback for test_id in context.test_ids}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    context = RunContext.from_env()
+    if args.test_ids is not None:
+        context.test_ids = parse_test_ids(args.test_ids)
+    if not context.test_ids:
+        print("❌ No test case IDs given (use --test-ids or TEST_CASE_IDS)")
+        return 4
+
+    print(f"🎯 Requirement: {context.requirement_id} - {context.requirement_name}")
+    print(f"📋 Test Cases: {' '.join(context.test_ids)} ({len(context.test_ids)} total)")
+
+    args.results_log = args.results_log or os.path.join(args.results_dir, "results.jsonl")
+    results_log = ResultsLog(args.results_log)
+    if args.resume:
+        done = finished_ids(args.results_log)
+        if done:
+            print(f"⏭️ Resuming: {len(done)} test cases already finished")
+        context.test_ids = [test_id for test_id in context.test_ids if test_id not in done]
+    else:
+        results_log.reset()
+        results_log.begin(context.requirement_id, context.request_id, context.test_ids)
+
+    # Parallel workers share their parent's store; whoever created it bundles it
+    artifacts = None
+    if args.artifacts:
+        artifacts = ArtifactStore(os.environ.get("QT_ARTIFACT_STORE") or os.path.join(args.results_dir, "artifacts"))
+
+    # Read by tests/conftest.py, here and in parallel workers alike
+    if args.shared_contexts:
+        os.environ["QT_SHARED_CONTEXTS"] = "on"
+
+    if not context.test_ids:
+        exit_code = 0
+    elif args.workers > 1:
+        exit_code = parallel.run(context, args)
+    else:
+        # Every finished test case updates the duration history as it finishes
+        history = DurationHistory()
+        eta, unknown = history.eta(context.test_ids)
+        print(f"⏱️ Expected duration ~{eta:.0f}s from history"
+              + (f" ({unknown} test cases without history)" if unknown else ""))
+        index = build_index(args.tests_path)
+        node_ids, missing = index.select(context.test_ids)
+        if missing:
+            print(f"❌ No test implements: {' '.join(missing)}")
+        reporter = RunReporter(context, results_log, mode=args.payload_mode, results_dir=args.results_dir,
+                               history=history, artifacts=artifacts)
+        plugin = StatusEvents(
+            context.test_ids, reporter, index, order=args.order, history=history, rerun_failures=args.rerun_failures,
+            timeouts=args.test_timeouts, fail_fast=args.fail_fast_per_requirement,
+            requirements=requirement_map(args.catalog, context) if args.fail_fast_per_requirement else None,
+            changed_files=read_changed_files(args.changed_files) if args.changed_files else None,
+        )
+        # Failure screenshots and page sources go with the run's other results
+        os.environ.setdefault("QT_EVIDENCE_DIR", os.path.join(args.results_dir, "evidence"))
+        exit_code = int(pytest.main(pytest_arguments(args, node_ids), plugins=[plugin]))
+        history.close()
+    results_log.close()
+
+    if artifacts is not None and "QT_ARTIFACT_STORE" not in os.environ:
+        bundle = os.path.join(args.results_dir, "artifacts.qtb")
+        print(f"📦 Artifact bundle {bundle}: {bundle_store(artifacts, bundle)} bytes")
+
+    if args.results_file:
+        compact(args.results_log, args.results_file)
+    print(f"🏁 All tests completed (exit code {exit_code})")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
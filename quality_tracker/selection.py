@@ -0,0 +1,210 @@
+"""Risk-weighted test selection under a wall-clock budget.
+
+Each requirement gets a risk score from its catalog attributes::
+
+    impact     = (businessImpact + regulatoryFactor) / 2
+    likelihood = (technicalComplexity + usageFrequency) / 2
+    risk       = impact * likelihood
+
+A test case earns an equal share of the risk of every requirement it covers
+(so the fifth test of a requirement is worth less than the first one of an
+uncovered requirement), weighted by its own priority.  Scoring is done with
+numpy over arrays built from the traceability index, and selecting the best
+subset that fits the budget is a 0/1 knapsack: solved exactly by dynamic
+programming when the problem is small enough, otherwise by value density.
+
+Usage::
+
+    python -m quality_tracker.selection --budget 600 [--changed REQ-001 REQ-004] [--tag Login]
+
+prints the selected TC IDs, ready for ``TEST_CASE_IDS``.
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .catalog import ESTIMATE_UNIT_SECONDS
+from .history import DurationHistory
+from .traceability import load_index
+
+PRIORITY_WEIGHTS = {"high": 3.0, "medium": 2.0, "low": 1.0}
+DEFAULT_DURATION = 1 * ESTIMATE_UNIT_SECONDS
+
+# Exact knapsack when candidates x budget buckets stays below this many cells
+MAX_DP_CELLS = 20_000_000
+MAX_BUCKETS = 2000
+
+
+def requirement_risk(requirement):
+    impact = (requirement.get("businessImpact", 1) + requirement.get("regulatoryFactor", 1)) / 2
+    likelihood = (requirement.get("technicalComplexity", 1) + requirement.get("usageFrequency", 1)) / 2
+    return impact * likelihood
+
+
+class RiskModel:
+    """Column-oriented view of the catalogs for vectorized scoring."""
+
+    def __init__(self, index, history=None):
+        self.index = index
+        self.tc_ids = list(index.test_cases)
+        self.req_ids = list(index.requirements)
+        req_position = {req_id: i for i, req_id in enumerate(self.req_ids)}
+
+        self.risk = np.array([requirement_risk(index.requirements[r]) for r in self.req_ids], dtype=np.float64)
+
+        # CSR adjacency test case -> covered requirement positions
+        indptr = [0]
+        indices = []
+        for tc_id in self.tc_ids:
+            indices.extend(req_position[r] for r in index.covers[tc_id] if r in req_position)
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.coverage_count = np.bincount(self.indices, minlength=len(self.req_ids))
+
+        self.priority = np.array([
+            PRIORITY_WEIGHTS.get(str(index.test_cases[t].get("priority", "")).lower(), 1.0)
+            for t in self.tc_ids
+        ])
+        # Measured history first, then the catalog estimate, like the parallel scheduler
+        estimates = {t: index.test_cases[t].get("estimatedDuration") or 0 for t in self.tc_ids}
+        unit = history.estimate_unit(estimates) if history is not None else ESTIMATE_UNIT_SECONDS
+        self.duration = np.array([
+            (history.expected(t) if history is not None else None)
+            or estimates[t] * unit
+            or DEFAULT_DURATION
+            for t in self.tc_ids
+        ], dtype=np.float64)
+
+    def scores(self, boost_requirements=(), boost=2.0):
+        """Risk score per test case; ``boost_requirements`` multiply their risk by ``boost``."""
+        risk = self.risk.copy()
+        if boost_requirements:
+            boosted = set(boost_requirements)
+            positions = [i for i, r in enumerate(self.req_ids) if r in boosted]
+            risk[positions] *= boost
+        share = np.divide(risk, self.coverage_count, out=np.zeros_like(risk), where=self.coverage_count > 0)
+        per_edge = share[self.indices]
+        # Row sums of the CSR matrix; np.add.reduceat misbehaves on empty rows
+        totals = np.concatenate(([0.0], np.cumsum(per_edge)))
+        return (totals[self.indptr[1:]] - totals[self.indptr[:-1]]) * self.priority
+
+    def candidate_mask(self, changed_requirements=(), tags=()):
+        """Test cases covering a changed requirement or carrying one of the tags
+        (on the test case or on a requirement it covers); all when neither is given."""
+        if not changed_requirements and not tags:
+            return np.ones(len(self.tc_ids), dtype=bool)
+        wanted = set(changed_requirements)
+        if tags:
+            wanted.update(self.index.find_requirements(tags=list(tags)))
+        selected = set()
+        for req_id in wanted:
+            selected.update(self.index.test_cases_for(req_id))
+        if tags:
+            selected.update(self.index.find_test_cases(tags=list(tags)))
+        return np.fromiter((t in selected for t in self.tc_ids), dtype=bool, count=len(self.tc_ids))
+
+
+def knapsack(values, weights, budget):
+    """Indices of a value-maximizing subset whose weights sum to at most ``budget``."""
+    free = np.flatnonzero(weights <= 0)
+    items = np.flatnonzero((weights > 0) & (weights <= budget) & (values > 0))
+    if not len(items):
+        return free
+    step = max(1.0, budget / MAX_BUCKETS)
+    # Uncalibrated estimates are whole minutes: a step dividing every weight keeps the DP exact
+    if np.all(weights[items] == np.round(weights[items])):
+        unit = float(np.gcd.reduce(weights[items].astype(np.int64)))
+        step = unit * np.ceil(step / unit)
+    capacity = int(budget // step)
+    buckets = np.ceil(weights[items] / step).astype(np.int64)
+
+    if len(items) * (capacity + 1) <= MAX_DP_CELLS:
+        best = np.zeros(capacity + 1)
+        keep = np.zeros((len(items), capacity + 1), dtype=bool)
+        for row, (value, weight) in enumerate(zip(values[items], buckets)):
+            if weight > capacity:
+                continue
+            candidate = best[:capacity + 1 - weight] + value
+            improved = candidate > best[weight:]
+            keep[row, weight:] = improved
+            best[weight:] = np.where(improved, candidate, best[weight:])
+        chosen = []
+        remaining = capacity
+        for row in range(len(items) - 1, -1, -1):
+            if keep[row, remaining]:
+                chosen.append(items[row])
+                remaining -= buckets[row]
+        return np.concatenate((free, np.array(chosen, dtype=np.int64)))
+
+    # Too large for exact DP: take items by value density while they fit
+    order = items[np.argsort(-(values[items] / weights[items]), kind="stable")]
+    cumulative = np.cumsum(weights[order])
+    prefix = int(np.searchsorted(cumulative, budget, side="right"))
+    chosen = list(order[:prefix])
+    used = float(cumulative[prefix - 1]) if prefix else 0.0
+    for item in order[prefix:]:
+        if used + weights[item] <= budget:
+            chosen.append(item)
+            used += weights[item]
+    return np.concatenate((free, np.array(chosen, dtype=np.int64)))
+
+
+@dataclass
+class Selection:
+    test_ids: list
+    score: float
+    duration: float
+    candidate_score: float
+    candidates: int
+    scores: dict = field(default_factory=dict)
+
+    @property
+    def risk_covered(self):
+        return self.score / self.candidate_score if self.candidate_score else 1.0
+
+
+def select(model, budget=None, changed_requirements=(), tags=(), boost=2.0):
+    """Pick the test cases to run, highest score first."""
+    scores = model.scores(changed_requirements, boost)
+    mask = model.candidate_mask(changed_requirements, tags)
+    candidates = np.flatnonzero(mask)
+    if budget is None:
+        chosen = candidates
+    else:
+        chosen = candidates[knapsack(scores[candidates], model.duration[candidates], budget)]
+    chosen = chosen[np.argsort(-scores[chosen], kind="stable")]
+    return Selection(
+        test_ids=[model.tc_ids[i] for i in chosen],
+        score=float(scores[chosen].sum()),
+        duration=float(model.duration[chosen].sum()),
+        candidate_score=float(scores[candidates].sum()),
+        candidates=len(candidates),
+        scores={model.tc_ids[i]: float(scores[i]) for i in chosen},
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.selection", description=__doc__.split("\n")[0])
+    parser.add_argument("--budget", type=float, help="wall-clock budget in seconds")
+    parser.add_argument("--changed", nargs="*", default=[], help="changed requirement IDs")
+    parser.add_argument("--tag", nargs="*", default=[], help="changed tags")
+    parser.add_argument("--boost", type=float, default=2.0, help="risk multiplier for changed requirements")
+    parser.add_argument("--explain", action="store_true", help="print scores to stderr")
+    args = parser.parse_args(argv)
+
+    model = RiskModel(load_index(), DurationHistory())
+    selection = select(model, args.budget, args.changed, args.tag, args.boost)
+    if args.explain:
+        for tc_id in selection.test_ids:
+            print(f"{tc_id}\t{selection.scores[tc_id]:.2f}", file=sys.stderr)
+        print(f"{len(selection.test_ids)}/{selection.candidates} test cases, "
+              f"{selection.duration:.0f}s, {selection.risk_covered:.0%} of candidate risk", file=sys.stderr)
+    print(" ".join(selection.test_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Authenticated-session snapshots, so tests do not log in through the UI.
+
+A test that needs a logged-in customer (or admin) is marked
+``@pytest.mark.session("customer")``.  The first such test in a worker logs in
+through the login form once; the resulting cookies and local/session storage
+are saved to ``.quality-tracker/sessions/<worker>-<role>.json``.  Later tests
+-- and later runs -- get that state injected into their pooled browser
+instead, which costs a handful of WebDriver commands rather than a form
+round trip.
+
+A snapshot belongs to the storefront it was taken against and to the
+browser host its cookies are scoped to.  Behind the HTTP cache proxy that is
+the upstream storefront (see :func:`quality_tracker.storefront_url`) and the
+proxy's host, not its port, which changes every run; the landing URL is kept
+relative to the base URL for the same reason.
+
+A snapshot is checked for free first (its storefront and host, its age
+against ``QT_SESSION_MAX_AGE`` and the expiry of its cookies), then with one
+script call after injection (is the logout link there?).  Only a snapshot
+that fails either check is replaced by a new UI login, after clearing the
+cookies and storage it left behind; a UI login that does not end logged in
+raises instead of being saved.  Tests about the login flow itself simply do
+not use the marker, or opt out of a class- or module-level one with
+``@pytest.mark.session(None)``; ``QT_SESSION_CACHE=off`` disables snapshots
+and logs in through the UI every time.
+"""
+
+import json
+import os
+import time
+from urllib.parse import urljoin, urlsplit
+
+from . import base_url, storefront_url
+from .catalog import ROOT
+
+SESSION_DIR = os.environ.get("QT_SESSION_DIR", os.path.join(ROOT, ".quality-tracker", "sessions"))
+# OpenCart's default PHP session lifetime is well above this
+MAX_AGE = float(os.environ.get("QT_SESSION_MAX_AGE", "1800"))
+
+CUSTOMER = "customer"
+ADMIN = "admin"
+ROLES = (CUSTOMER, ADMIN)
+
+_STORAGE_JS = """
+function dump(storage) {
+    var out = {};
+    try { for (var i = 0; i < storage.length; i++) { out[storage.key(i)] = storage.getItem(storage.key(i)); } }
+    catch (e) {}
+    return out;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_RESTORE_STORAGE_JS = """
+var data = arguments[0];
+try { Object.keys(data.local).forEach(function (k) { window.localStorage.setItem(k, data.local[k]); }); } catch (e) {}
+try { Object.keys(data.session).forEach(function (k) { window.sessionStorage.setItem(k, data.session[k]); }); } catch (e) {}
+"""
+
+_CLEAR_STORAGE_JS = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+# Logged in when the page offers a way to log out
+_LOGGED_IN_JS = {
+    CUSTOMER: "return !!document.querySelector(\"a[href*='account/logout']\");",
+    ADMIN: "return !!document.querySelector(\"a[href*='common/logout']\");",
+}
+
+
+def credentials(role):
+    if role == CUSTOMER:
+        return (os.environ.get("QT_CUSTOMER_EMAIL", "demo@opencart.com"),
+                os.environ.get("QT_CUSTOMER_PASSWORD", "demo1234"))
+    return (os.environ.get("QT_ADMIN_USERNAME", "demo"),
+            os.environ.get("QT_ADMIN_PASSWORD", "demo"))
+
+
+def login_url(role):
+    if role == CUSTOMER:
+        return urljoin(base_url(), "index.php?route=account/login")
+    return urljoin(base_url(), "admin/")
+
+
+def _browser_host():
+    return urlsplit(base_url()).hostname
+
+
+def _relative(url):
+    base = base_url()
+    return url[len(base):] if url.startswith(base) else url
+
+
+def logged_in(driver, role):
+    """Whether the current page shows ``role`` logged in."""
+    return bool(driver.execute_script(_LOGGED_IN_JS[role]))
+
+
+def ui_login(driver, role):
+    """Log in through the form; returns the URL the test should start from.
+
+    That is the home page for a customer, and for an admin the dashboard,
+    whose URL carries the session's ``user_token``.
+    """
+    from selenium.webdriver.common.by import By
+
+    from .pages import LoginPage
+    from .waits import element_present, route_changed, wait_until
+
+    if role == CUSTOMER:
+        page = LoginPage(driver).open()
+        wait_until(driver, element_present((By.ID, "input-email")))
+        previous_url = page.login(*credentials(role))
+    else:
+        driver.get(login_url(role))
+        wait_until(driver, element_present((By.ID, "input-username")))
+        for field_id, value in zip(("input-username", "input-password"), credentials(role)):
+            field = driver.find_element(By.ID, field_id)
+            field.clear()
+            field.send_keys(value)
+        previous_url = driver.current_url
+        driver.find_element(By.CSS_SELECTOR, "button[type='submit']").click()
+    wait_until(driver, route_changed(previous_url), required=False)
+    if role == CUSTOMER:
+        driver.get(base_url())
+    return driver.current_url
+
+
+class SessionCache:
+    """Per-worker snapshots of logged-in browser state, by role."""
+
+    def __init__(self, directory=SESSION_DIR, worker=None, enabled=True, max_age=MAX_AGE):
+        self.directory = directory
+        self.worker = worker or os.environ.get("QT_WORKER_ID", "main")
+        self.enabled = enabled
+        self.max_age = max_age
+        self.logins = 0
+        self.restored = 0
+        self.rejected = 0
+
+    def _path(self, role):
+        return os.path.join(self.directory, f"{self.worker}-{role}.json")
+
+    def load(self, role):
+        try:
+            with open(self._path(role)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fresh_enough(self, snapshot, now=None):
+        """The free check: snapshot age and cookie expiry, without a browser."""
+        now = time.time() if now is None else now
+        if snapshot.get("origin") != storefront_url() or snapshot.get("host") != _browser_host():
+            return False
+        if now - snapshot.get("created", 0) > self.max_age:
+            return False
+        return all(cookie.get("expiry", now + 1) > now for cookie in snapshot.get("cookies", ()))
+
+    def capture(self, driver, role, landing_url):
+        storage = driver.execute_script(_STORAGE_JS) or {"local": {}, "session": {}}
+        snapshot = {
+            "role": role,
+            "origin": storefront_url(),
+            "host": _browser_host(),
+            "landingUrl": _relative(landing_url),
+            "created": time.time(),
+            "cookies": driver.get_cookies(),
+            "storage": storage,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(role)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, self._path(role))
+        return snapshot
+
+    def restore(self, driver, snapshot):
+        """Inject a snapshot and return whether the page shows a logged-in state."""
+        # Cookies can only be set for the origin the browser is on
+        if not driver.current_url.startswith(base_url()):
+            driver.get(base_url())
+        for cookie in snapshot["cookies"]:
+            cookie = {k: v for k, v in cookie.items() if k != "sameSite" or v in ("Strict", "Lax", "None")}
+            driver.add_cookie(cookie)
+        driver.execute_script(_RESTORE_STORAGE_JS, snapshot["storage"])
+        driver.get(urljoin(base_url(), snapshot["landingUrl"]))
+        return logged_in(driver, snapshot["role"])
+
+    def clear(self, driver):
+        """Drop what a rejected snapshot injected: cookies and local/session storage."""
+        driver.delete_all_cookies()
+        driver.execute_script(_CLEAR_STORAGE_JS)
+
+    def authenticate(self, driver, role):
+        """Put ``driver`` in a logged-in state for ``role``."""
+        if role not in ROLES:
+            raise ValueError(f"Unknown session role: {role}")
+        if self.enabled:
+            snapshot = self.load(role)
+            if snapshot is not None and self.fresh_enough(snapshot):
+                if self.restore(driver, snapshot):
+                    self.restored += 1
+                    return
+                # Expired on the server: start over from a clean browser
+                self.clear(driver)
+            if snapshot is not None:
+                self.rejected += 1
+        landing_url = ui_login(driver, role)
+        self.logins += 1
+        # Never save (or hand a test) the state of a login that did not work
+        if not logged_in(driver, role):
+            raise RuntimeError(f"UI login as {role} did not log in (no logout link on {driver.current_url})")
+        if self.enabled:
+            self.capture(driver, role, landing_url)
+
+    def summary_line(self):
+        return (f"sessions: {self.restored} restored, {self.logins} UI logins, "
+                f"{self.rejected} snapshots rejected")
+
+
+def cache_from_env():
+    return SessionCache(enabled=os.environ.get("QT_SESSION_CACHE", "on") != "off")
@@ -0,0 +1,319 @@
+"""Split a dispatch across runners, and merge the shards' results back.
+
+``parallel.py`` spreads a dispatch over processes of one job.  This module
+does the same across jobs or machines: ``plan`` splits the dispatch's
+``testCases`` into N shards balanced by expected duration (LPT, see
+:func:`quality_tracker.parallel.plan_shards`) and writes one manifest per
+shard; each manifest is executed independently with ``run``; ``merge``
+combines the shards' results event logs, JUnit reports and artifact bundles
+into the one consolidated results document and summary of the
+``requestId``::
+
+    python -m quality_tracker.shards plan --payload dispatch.json --shards 4 --output-dir shards
+    python -m quality_tracker.shards run shards/shard-0.json --results-dir test-results/shard-0 \\
+        [-- runner options [-- pytest args]]
+    python -m quality_tracker.shards merge --plan shards/plan.json test-results/shard-* \\
+        --results current_results.json --summary execution_summary.json \\
+        --junit test-results/junit-merged.xml
+
+Without ``--payload`` the dispatch comes from the environment the workflows
+export (``TEST_CASE_IDS``, ``REQUEST_ID``, ...).  The merge keeps the
+dispatch's TC ID order and reports each TC ID once: its final status if any
+shard finished it (the latest one, if a shard was run twice), otherwise its
+most advanced intermediate status.  All three commands are local, so a
+sharded run can be tried on one machine by running the shards as processes.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+from . import payloads
+from .artifacts import read_bundle, write_bundle
+from .catalog import TEST_CASES_FILE
+from .context import RunContext
+from .history import DurationHistory
+from .junit import iter_testcases
+from .parallel import expected_durations, plan_shards
+from .results_store import FINAL_STATUSES, ResultsLog, compact, iter_events, load_callback_stats
+from .tc_index import find_ids
+
+PLAN_FILE = "plan.json"
+
+# Which of several status events of a TC ID the merge keeps
+_STATUS_RANK = {"Not Started": 0, "Running": 1, "Skipped": 2}
+_FINAL_RANK = 3
+
+
+def load_dispatch(path=None):
+    """A :class:`RunContext` from a dispatch payload file, or from the environment.
+
+    The file is either the ``client_payload`` itself or a whole
+    ``repository_dispatch`` event (``$GITHUB_EVENT_PATH``).
+    """
+    context = RunContext.from_env()
+    if path is None:
+        return context
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    payload = payload.get("client_payload", payload)
+    context.requirement_id = payload.get("requirementId", "")
+    context.requirement_name = payload.get("requirementName", "")
+    context.request_id = payload.get("requestId", "")
+    context.callback_url = payload.get("callbackUrl", "")
+    context.test_ids = list(dict.fromkeys(payload.get("testCases") or []))
+    return context
+
+
+def plan(context, shard_count, output_dir, catalog=TEST_CASES_FILE, history=None):
+    """Write ``plan.json`` and one ``shard-<n>.json`` manifest per shard; return the plan."""
+    own_history = history is None
+    history = DurationHistory() if own_history else history
+    durations = expected_durations(context.test_ids, history.estimated_seconds(catalog), history)
+    if own_history:
+        history.close()
+    position = {test_id: index for index, test_id in enumerate(context.test_ids)}
+    shards = plan_shards(context.test_ids, {k: v[0] for k, v in durations.items()}, shard_count)
+
+    os.makedirs(output_dir, exist_ok=True)
+    dispatch = {
+        "requirementId": context.requirement_id,
+        "requirementName": context.requirement_name,
+        "requestId": context.request_id,
+        "callbackUrl": context.callback_url,
+    }
+    document = dict(dispatch, testCases=context.test_ids, shards=[], createdAt=payloads.timestamp(),
+                    serialEstimateSeconds=round(sum(seconds for seconds, _ in durations.values()), 2),
+                    plannedMakespanSeconds=round(max((load for load, _ in shards), default=0.0), 2))
+    for index, (load, shard) in enumerate(shards):
+        # A shard runs its test cases in dispatch order
+        shard = sorted(shard, key=position.get)
+        manifest = dict(dispatch, shard=index, shardCount=len(shards), testCases=shard,
+                        expectedSeconds=round(load, 2),
+                        durationSources={test_id: durations[test_id][1] for test_id in shard})
+        name = f"shard-{index}.json"
+        _write_json(os.path.join(output_dir, name), manifest)
+        document["shards"].append({"manifest": name, "testCases": shard, "expectedSeconds": round(load, 2)})
+    _write_json(os.path.join(output_dir, PLAN_FILE), document)
+    return document
+
+
+def _write_json(path, document):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_manifest(manifest_path, results_dir=None, runner_args=()):
+    """Execute one shard with :mod:`quality_tracker.runner`; returns its exit code."""
+    from . import runner
+
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    os.environ.update({
+        "REQUIREMENT_ID": manifest.get("requirementId", ""),
+        "REQUIREMENT_NAME": manifest.get("requirementName", ""),
+        "REQUEST_ID": manifest.get("requestId", ""),
+        "CALLBACK_URL": manifest.get("callbackUrl", ""),
+        "TEST_CASE_IDS": " ".join(manifest["testCases"]),
+    })
+    # Shards on one machine keep their session snapshots and traces apart
+    os.environ.setdefault("QT_WORKER_ID", f"shard-{manifest.get('shard', 0)}")
+    results_dir = results_dir or os.path.join("test-results", f"shard-{manifest.get('shard', 0)}")
+    print(f"📋 Shard {manifest.get('shard', 0) + 1}/{manifest.get('shardCount', 1)}: "
+          f"{len(manifest['testCases'])} test cases, ~{manifest.get('expectedSeconds', 0):.0f}s expected")
+    return runner.main(["--results-dir", results_dir, "--results-file", "", *runner_args])
+
+
+def _shard_logs(result_dirs):
+    for directory in result_dirs:
+        path = os.path.join(directory, "results.jsonl")
+        if os.path.exists(path):
+            yield directory, path
+
+
+def merge_logs(result_dirs, output_log, plan_document=None):
+    """Combine the shards' event logs into one log with one status per TC ID.
+
+    Returns ``(order, {results dir: status counts}, duplicates)`` where
+    ``duplicates`` counts TC IDs that more than one shard finished.  Logs of
+    another request than the plan's are skipped.
+    """
+    request_id = (plan_document or {}).get("requestId", "")
+    requirement_id = (plan_document or {}).get("requirementId", "")
+    order = list((plan_document or {}).get("testCases", ()))
+    known = set(order)
+    chosen = {}
+    finished_by = {}
+    merged_dirs = []
+    for shard, (directory, path) in enumerate(_shard_logs(result_dirs)):
+        for offset, event in iter_events(path):
+            if event.get("event") == "run":
+                log_request = event.get("requestId", "")
+                if request_id and log_request and log_request != request_id:
+                    print(f"❌ Skipping {path}: request {log_request}, not {request_id}")
+                    break
+                request_id = request_id or log_request
+                requirement_id = requirement_id or event.get("requirementId", "")
+                ids = event.get("testIds", [])
+            elif event.get("event") == "status":
+                test_id = event["id"]
+                ids = [test_id]
+                final = event["status"] in FINAL_STATUSES
+                if final:
+                    finished_by.setdefault(test_id, set()).add(shard)
+                rank = _FINAL_RANK if final else _STATUS_RANK.get(event["status"], 0)
+                key = (rank, event.get("timestamp", ""), shard, offset)
+                if test_id not in chosen or key > chosen[test_id][0]:
+                    chosen[test_id] = (key, event, directory)
+            else:
+                continue
+            for test_id in ids:
+                if test_id not in known:
+                    known.add(test_id)
+                    order.append(test_id)
+        else:
+            merged_dirs.append(directory)
+
+    log = ResultsLog(output_log)
+    log.reset()
+    log.begin(requirement_id, request_id, order)
+    shards = {directory: {} for directory in merged_dirs}
+    for test_id in order:
+        if test_id in chosen:
+            _, event, directory = chosen[test_id]
+            log.append(event)
+            shards[directory][event["status"]] = shards[directory].get(event["status"], 0) + 1
+    log.close()
+    duplicates = sum(1 for shard_set in finished_by.values() if len(shard_set) > 1)
+    return order, shards, duplicates
+
+
+def _junit_files(directory):
+    return sorted(glob.glob(os.path.join(directory, "junit-batch.xml"))
+                  + glob.glob(os.path.join(directory, "worker-*", "junit-batch.xml")))
+
+
+def merge_junit(result_dirs, output, order=()):
+    """One JUnit report of every shard's testcases, in dispatch order, without duplicates.
+
+    A testcase reported by several files (a shard that ran twice) keeps the
+    record of the most recently written file.  Returns the testcase count.
+    """
+    files = [path for directory in result_dirs for path in _junit_files(directory)]
+    files.sort(key=os.path.getmtime)
+    records = {}
+    for path in files:
+        for record in iter_testcases(path):
+            records.pop((record["classname"], record["name"]), None)
+            records[(record["classname"], record["name"])] = record
+    position = {test_id: index for index, test_id in enumerate(order)}
+
+    def dispatch_position(record):
+        ids = find_ids(f"{record['classname']}.{record['name']}")
+        return min((position[i] for i in ids if i in position), default=len(position))
+
+    ordered = sorted(records.values(), key=dispatch_position)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(payloads.junit_document(ordered))
+    return len(ordered)
+
+
+def merge(result_dirs, results_path="current_results.json", summary_path=None, junit_path=None,
+          plan_document=None, mode=payloads.ENHANCED, merged_log=None, run_id=""):
+    """Merge shard result directories into the consolidated documents; returns the summary."""
+    merged_log = merged_log or os.path.join(os.path.dirname(results_path) or ".", "results-merged.jsonl")
+    order, shards, duplicates = merge_logs(result_dirs, merged_log, plan_document)
+    callback_stats = load_callback_stats(
+        path for directory in result_dirs
+        for path in glob.glob(os.path.join(directory, "**", "callback-stats.json"), recursive=True)
+    )
+    summary = compact(merged_log, results_path, summary_path=None, mode=mode, run_id=run_id,
+                      callback_stats=callback_stats)
+    summary["shards"] = [{"resultsDir": directory, "statusSummary": counts} for directory, counts in shards.items()]
+    summary["duplicateResults"] = duplicates
+    if junit_path:
+        summary["junitTestcases"] = merge_junit(result_dirs, junit_path, order)
+    bundles = [path for path in (os.path.join(d, "artifacts.qtb") for d in result_dirs) if os.path.exists(path)]
+    if bundles:
+        # References in the merged results resolve against one bundle
+        bundle = os.path.join(os.path.dirname(results_path) or ".", "artifacts.qtb")
+        summary["artifactBundle"] = bundle
+        write_bundle(bundle, (pair for path in bundles for pair in read_bundle(path).items()))
+    if summary_path:
+        _write_json(summary_path, summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.shards", description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_parser = commands.add_parser("plan", help="split a dispatch into shard manifests")
+    plan_parser.add_argument("--payload", help="dispatch payload or event JSON (default: environment)")
+    plan_parser.add_argument("--shards", type=int, required=True, help="number of shards")
+    plan_parser.add_argument("--output-dir", default="shards")
+    plan_parser.add_argument("--catalog", default=TEST_CASES_FILE)
+    plan_parser.add_argument("--matrix", action="store_true",
+                             help="print the manifest paths as a JSON list (for a CI job matrix)")
+    run_parser = commands.add_parser("run", help="execute one shard manifest")
+    run_parser.add_argument("manifest")
+    run_parser.add_argument("--results-dir", help="default: test-results/shard-<n>")
+    merge_parser = commands.add_parser("merge", help="combine shard results")
+    merge_parser.add_argument("result_dirs", nargs="+", help="the shards' results directories")
+    merge_parser.add_argument("--plan", help="plan.json, for the dispatch order and request ID")
+    merge_parser.add_argument("--results", default="current_results.json")
+    merge_parser.add_argument("--summary", help="write execution_summary.json here")
+    merge_parser.add_argument("--junit", help="write the merged JUnit report here")
+    merge_parser.add_argument("--mode", choices=payloads.PAYLOAD_MODES, default=payloads.ENHANCED)
+    # Everything after the first "--" goes to the runner unchanged (its own
+    # "--" and pytest arguments included)
+    argv = list(sys.argv[1:] if argv is None else argv)
+    runner_args = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, runner_args = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        context = load_dispatch(args.payload)
+        if not context.test_ids:
+            print("❌ The dispatch has no test cases")
+            return 4
+        document = plan(context, args.shards, args.output_dir, args.catalog)
+        if args.matrix:
+            print(json.dumps([os.path.join(args.output_dir, shard["manifest"]) for shard in document["shards"]]))
+            return 0
+        print(f"📋 {len(context.test_ids)} test cases in {len(document['shards'])} shards "
+              f"(planned makespan {document['plannedMakespanSeconds']:.0f}s "
+              f"vs serial {document['serialEstimateSeconds']:.0f}s)")
+        for shard in document["shards"]:
+            print(f"   {shard['manifest']}: ~{shard['expectedSeconds']:.0f}s {' '.join(shard['testCases'])}")
+        return 0
+
+    if args.command == "run":
+        return run_manifest(args.manifest, args.results_dir, runner_args)
+
+    plan_document = None
+    if args.plan:
+        with open(args.plan, encoding="utf-8") as f:
+            plan_document = json.load(f)
+    summary = merge(args.result_dirs, args.results, args.summary, args.junit, plan_document, args.mode,
+                    run_id=os.environ.get("GITHUB_RUN_ID", ""))
+    print(f"📋 Merged {len(summary['shards'])} shards: {summary['totalTests']} tests"
+          + (f", {summary['duplicateResults']} duplicate results dropped" if summary["duplicateResults"] else ""))
+    for status, count in summary["statusSummary"].items():
+        print(f"  {status}: {count}")
+    unfinished = sum(count for status, count in summary["statusSummary"].items()
+                     if status not in FINAL_STATUSES)
+    if unfinished:
+        print(f"❌ {unfinished} test cases have no final result")
+    print(f"✅ Results written to {args.results}")
+    return 1 if unfinished else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""pytest plugin that selects requested TC IDs and reports their status.
+
+The plugin is loaded by :mod:`quality_tracker.runner` into a single pytest
+session.  A TC ID selects exactly the tests the static TC index (see
+:mod:`quality_tracker.tc_index`) says implement it, a TC ID that selects
+nothing is reported as ``Not Found``, and every TC ID gets a ``Not Started``,
+a ``Running`` and a final status event.
+
+For faster feedback the plugin can also run the selected tests failure-first
+(see :mod:`quality_tracker.ordering`), run the items of failed TC IDs again in
+a fresh browser once the run is over (a TC that passes on rerun is reported
+as ``flaky``, one that fails again as ``deterministic``; the terminal and the
+JUnit report only show the rerun, the final attempt), and skip the rest of
+a requirement's test cases once a number of them have failed (fail-fast).
+A TC whose tests were all skipped, by fail-fast or ``pytest.skip``, is
+reported as ``Skipped``.  With ``timeouts`` on, a test that runs longer than
+its TC IDs' history-derived timeout (see :meth:`DurationHistory.timeout
+<quality_tracker.history.DurationHistory.timeout>`) is failed instead of
+holding up the batch; this uses ``SIGALRM``, so it needs a POSIX main thread.
+"""
+
+import signal
+import threading
+from collections import Counter
+
+import pytest
+from _pytest.runner import runtestprotocol
+
+from .ordering import GROUP_NAMES, order_items
+from .tc_index import normalize
+
+
+def crash_message(report):
+    """The one-line failure message pytest puts in JUnit's ``message`` attribute."""
+    crash = getattr(report.longrepr, "reprcrash", None)
+    if crash is not None:
+        return crash.message
+    lines = report.longreprtext.strip().splitlines()
+    return lines[-1] if lines else ""
+
+
+def junit_record(nodeid, location, reports):
+    """Summarize an item's setup/call/teardown reports like a JUnit testcase."""
+    path, *names = nodeid.split("::")
+    module = path[:-3] if path.endswith(".py") else path
+    record = {
+        "nodeid": nodeid,
+        "classname": ".".join([module.replace("/", ".")] + names[:-1]),
+        "name": names[-1] if names else path,
+        "file": location[0] if location else path,
+        "line": location[1] if location and location[1] is not None else 0,
+        "time": sum(report.duration for report in reports),
+        "outcome": "passed",
+    }
+    for report in reports:
+        if report.failed:
+            record["outcome"] = "failed"
+            record["failure_message"] = crash_message(report)
+            record["failure_text"] = report.longreprtext
+            break
+        if report.skipped and record["outcome"] == "passed":
+            record["outcome"] = "skipped"
+            record["failure_message"] = report.longreprtext
+    return record
+
+
+def report_output(nodeid, record, reports):
+    """Readable output for one item (outcome, traceback, captured sections), in pieces."""
+    yield f"{nodeid} {record['outcome'].upper()}\n"
+    if record.get("failure_text"):
+        yield "\n"
+        yield record["failure_text"]
+        yield "\n"
+    # Each phase's report repeats the sections captured by earlier phases,
+    # so the last report holds them all.
+    for title, content in reports[-1].sections if reports else ():
+        yield f"\n{'-' * 20} {title} {'-' * 20}\n"
+        yield content
+        yield "\n"
+
+
+def _log(item, reports, skip_plugins=()):
+    """Report an item's phases to the plugins, as pytest's own protocol does."""
+    manager = item.config.pluginmanager
+
+    def hook(name):
+        return manager.subset_hook_caller(name, skip_plugins) if skip_plugins else getattr(item.ihook, name)
+
+    hook("pytest_runtest_logstart")(nodeid=item.nodeid, location=item.location)
+    for report in reports:
+        hook("pytest_runtest_logreport")(report=report)
+    hook("pytest_runtest_logfinish")(nodeid=item.nodeid, location=item.location)
+
+
+class StatusEvents:
+    """Selects the requested TC IDs and forwards status changes to a reporter."""
+
+    def __init__(self, test_ids, reporter, index, order="dispatch", history=None, rerun_failures=False,
+                 timeouts=False, fail_fast=0, requirements=None, changed_files=None):
+        self.test_ids = list(test_ids)
+        self.reporter = reporter
+        # The static TC index; requested IDs are looked up in any spelling
+        self.index = index
+        self._requested = {}
+        for test_id in self.test_ids:
+            self._requested.setdefault(normalize(test_id), []).append(test_id)
+        self.order = order
+        self.history = history
+        self.changed_files = changed_files
+        self.rerun_failures = rerun_failures
+        self.timeouts = timeouts and hasattr(signal, "SIGALRM")
+        # Fail-fast: after this many failed TC IDs of a requirement, skip the
+        # requirement's remaining ones; ``requirements`` maps TC ID -> requirement IDs
+        self.fail_fast = fail_fast
+        self.requirements = requirements or {}
+        self._requirement_failures = Counter()
+        self._stopped = {}
+        self._items = {}
+        self._rerun_queue = []
+        # First attempts that failed, held back from the other plugins until rerun
+        self._deferred = {}
+        self._rerunning = False
+        self._rerun_records = {}
+        self._item_tests = {}
+        self._pending = {}
+        self._records = {}
+        self._outputs = {}
+        self._reports = {}
+        self._running = set()
+        self._collect_errors = []
+
+    def pytest_configure(self, config):
+        terminal = config.pluginmanager.get_plugin("terminalreporter")
+        if terminal is not None:
+            self.reporter.log = terminal.write_line
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self._collect_errors.append(f"ERROR collecting {report.nodeid}\n{report.longreprtext}")
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        selected, deselected = [], []
+        for item in items:
+            tests = [test_id for implemented in self.index.test_ids(self.index.item_nodeid(item))
+                     for test_id in self._requested.get(implemented, ())]
+            if tests:
+                selected.append(item)
+                self._items[item.nodeid] = item
+                self._item_tests[item.nodeid] = tests
+                for test_id in tests:
+                    self._pending.setdefault(test_id, set()).add(item.nodeid)
+            else:
+                deselected.append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        if self.order == "failures-first" and self.history is not None:
+            selected, groups = order_items(selected, self._item_tests, self.history, self.changed_files)
+            counts = Counter(GROUP_NAMES[group] for group in groups.values())
+            self.reporter.log("🔀 Failure-first order: " + ", ".join(
+                f"{counts[name]} {name}" for name in GROUP_NAMES.values() if counts[name]))
+        items[:] = selected
+
+    def pytest_collection_finish(self, session):
+        self.reporter.start(self.test_ids)
+        for test_id in self.test_ids:
+            self.reporter.status(test_id, "Not Started")
+        for test_id in self.test_ids:
+            if test_id not in self._pending:
+                output = self.reporter.output(test_id)
+                output.write(f"collected 0 items implementing {test_id} (see python -m quality_tracker.tc_index)\n")
+                if self._collect_errors:
+                    output.write("\n" + "\n".join(self._collect_errors))
+                self.reporter.status(test_id, "Running")
+                self.reporter.finished(test_id, "Not Found", 0, output)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        if self._rerunning or not self._stopped:
+            return
+        tests = self._item_tests.get(item.nodeid, ())
+        blocked = [test_id for test_id in tests if self._requirements_of(test_id)
+                   and all(req in self._stopped for req in self._requirements_of(test_id))]
+        if tests and len(blocked) == len(tests):
+            reasons = sorted({req for test_id in blocked for req in self._requirements_of(test_id)})
+            pytest.skip(f"fail-fast: too many failures in {', '.join(reasons)}")
+
+    def item_timeout(self, item):
+        """Seconds ``item`` may run: the longest timeout of its TC IDs, None without history."""
+        if self.history is None:
+            return None
+        timeouts = [self.history.timeout(test_id) for test_id in self._item_tests.get(item.nodeid, ())]
+        return max(filter(None, timeouts), default=None)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        seconds = self.item_timeout(item) if self.timeouts else None
+        if seconds is None or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        def expire(signum, frame):
+            pytest.fail(f"Timeout: still running after {seconds:.0f}s (from its duration history)", pytrace=False)
+
+        previous = signal.signal(signal.SIGALRM, expire)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if not self.rerun_failures or self._rerunning or item.nodeid not in self._item_tests:
+            return None
+        # Run the item without logging it, so a failure that will be rerun does
+        # not reach the terminal, JUnit report and failure count twice
+        self.pytest_runtest_logstart(item.nodeid, item.location)
+        reports = runtestprotocol(item, nextitem=nextitem, log=False)
+        if any(report.failed for report in reports):
+            self._deferred[item.nodeid] = reports
+            self._reports[item.nodeid] = list(reports)
+            self.pytest_runtest_logfinish(item.nodeid, item.location)
+        else:
+            _log(item, reports)
+        return True
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtestloop(self, session):
+        outcome = yield
+        if not self._rerun_queue or outcome.excinfo or session.shouldfail or session.shouldstop:
+            # No rerun after all: the first attempts are the final ones (this
+            # plugin has handled them already)
+            for item in self._rerun_queue:
+                _log(item, self._deferred.pop(item.nodeid, ()), skip_plugins=[self])
+            self._rerun_queue = []
+            return outcome
+        # Rerun the failed TC IDs' items in a fresh browser each
+        self.reporter.log(f"🔁 Rerunning {len(self._rerun_queue)} failed tests in a fresh browser")
+        self._rerunning = True
+        queue, self._rerun_queue = self._rerun_queue, []
+        self._deferred = {}
+        for index, item in enumerate(queue):
+            item.add_marker(pytest.mark.fresh_browser)
+            next_item = queue[index + 1] if index + 1 < len(queue) else None
+            item.config.hook.pytest_runtest_protocol(item=item, nextitem=next_item)
+        self._rerunning = False
+        for test_id, records in self._rerun_records.items():
+            failed = any(r["outcome"] == "failed" for r in records)
+            self.reporter.rerun(test_id, "deterministic" if failed else "flaky", records)
+        return outcome
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        if self._rerunning:
+            return
+        for test_id in self._item_tests.get(nodeid, ()):
+            if test_id not in self._running:
+                self._running.add(test_id)
+                self.reporter.status(test_id, "Running")
+
+    def pytest_runtest_logreport(self, report):
+        if report.nodeid in self._item_tests:
+            self._reports.setdefault(report.nodeid, []).append(report)
+
+    def pytest_runtest_logfinish(self, nodeid, location):
+        tests = self._item_tests.get(nodeid)
+        if not tests:
+            return
+        reports = self._reports.pop(nodeid, [])
+        record = junit_record(nodeid, location, reports)
+        if self._rerunning:
+            for test_id in tests:
+                self._rerun_records.setdefault(test_id, []).append(record)
+            return
+        if self.rerun_failures and record["outcome"] == "failed":
+            self._rerun_queue.append(self._items[nodeid])
+        parts = list(report_output(nodeid, record, reports))
+        for test_id in tests:
+            self._records.setdefault(test_id, []).append(record)
+            self._write_output(test_id, parts)
+            pending = self._pending[test_id]
+            pending.discard(nodeid)
+            if not pending:
+                self._finish(test_id)
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionfinish(self, session, exitstatus):
+        # Anything still pending never ran to completion (collection errors,
+        # interrupts, -x); report it so no TC ID is left "Running".
+        for test_id in self.test_ids:
+            if self._pending.get(test_id):
+                if test_id not in self._running:
+                    self._running.add(test_id)
+                    self.reporter.status(test_id, "Running")
+                self._write_output(test_id, [
+                    "\n".join(self._collect_errors) or f"session ended early (exit status {int(exitstatus)})\n"
+                ])
+                self._records.setdefault(test_id, [])
+                self._finish(test_id, force_status="Failed")
+        self.reporter.close()
+
+    def _write_output(self, test_id, parts):
+        # Items of the same TC ID are separated by a blank line
+        output = self._outputs.get(test_id)
+        if output is None:
+            output = self._outputs[test_id] = self.reporter.output(test_id)
+        else:
+            output.write("\n")
+        for part in parts:
+            output.write(part)
+
+    def _requirements_of(self, test_id):
+        return self.requirements.get(test_id, ())
+
+    def _finish(self, test_id, force_status=None):
+        records = self._records.get(test_id, [])
+        self._pending[test_id] = set()
+        if force_status:
+            status = force_status
+        elif any(r["outcome"] == "failed" for r in records):
+            status = "Failed"
+        elif records and all(r["outcome"] == "skipped" for r in records):
+            status = "Skipped"
+        else:
+            status = "Passed"
+        if status == "Failed" and self.fail_fast:
+            for req in self._requirements_of(test_id):
+                self._requirement_failures[req] += 1
+                if self._requirement_failures[req] >= self.fail_fast and req not in self._stopped:
+                    self._stopped[req] = test_id
+                    self.reporter.log(f"⛔ Fail-fast: {self._requirement_failures[req]} failed test cases "
+                                      f"in {req}, skipping the rest of it")
+        duration = round(sum(r["time"] for r in records), 2)
+        output = self._outputs.pop(test_id, None) or self.reporter.output(test_id)
+        self.reporter.finished(test_id, status, duration, output, records)
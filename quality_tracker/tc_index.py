@@ -0,0 +1,270 @@
+"""Static index of which test functions implement which TC IDs.
+
+The test files are parsed with :mod:`ast` -- nothing is imported -- and every
+test function pytest would collect (``test*`` functions, ``test*`` methods of
+``Test*`` classes without ``__init__``) is mapped to the TC IDs in its name,
+its class names and its docstring.  TC IDs are normalized, so
+``test_remove_from_wishlistTC_006``, ``test_x_tc_6`` and a ``[TC-006]``
+docstring all implement ``TC_006``.
+
+The runner selects tests by exact lookup in this index and hands pytest only
+the node IDs it needs, so modules of unrelated tests are never imported.
+Parsed files are cached in ``.quality-tracker/tc-index.json`` by mtime and
+size, falling back to a content hash, so an unchanged tree is not re-parsed::
+
+    python -m quality_tracker.tc_index show [TC_002 ...]
+    python -m quality_tracker.tc_index check [--json] [--strict]
+
+``check`` compares the index with the catalog: automated test cases without a
+test, TC IDs in code that the catalog does not know, ``automationPath`` values
+that do not point at the implementing file, and functions whose name and
+docstring disagree.
+"""
+
+import argparse
+import ast
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+
+from .catalog import ROOT, TEST_CASES_FILE, iter_test_cases
+
+INDEX_CACHE_FILE = os.environ.get(
+    "QT_TC_INDEX_CACHE", os.path.join(ROOT, ".quality-tracker", "tc-index.json")
+)
+CACHE_VERSION = 1
+
+# pytest's default python_files
+TEST_FILE_PATTERNS = ("test_*.py", "*_test.py")
+
+_NUMERIC_ID = re.compile(r"TC[-_]?(\d+)", re.IGNORECASE)
+# Non-numeric IDs (TC_BENCH) need a separator and upper case, so words like
+# "BATCH" do not count
+_NAMED_ID = re.compile(r"(?:^|(?<=[^A-Za-z]))TC[-_]([A-Z][A-Z0-9]*)(?![a-z])")
+
+
+def normalize(test_id):
+    """Canonical form of a TC ID: ``TC-7``, ``tc_007`` and ``TC007`` are ``TC_007``."""
+    match = _NUMERIC_ID.fullmatch(test_id.strip())
+    if match:
+        return f"TC_{match.group(1).zfill(3)}"
+    return test_id.strip().upper().replace("-", "_")
+
+
+def find_ids(text):
+    """Normalized TC IDs mentioned in a name or docstring, in order."""
+    found = [normalize(f"TC_{digits}") for digits in _NUMERIC_ID.findall(text or "")]
+    found += [f"TC_{name}" for name in _NAMED_ID.findall(text or "")]
+    return list(dict.fromkeys(found))
+
+
+def _is_test_file(name):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in TEST_FILE_PATTERNS)
+
+
+def iter_test_files(tests_path):
+    if os.path.isfile(tests_path):
+        yield tests_path
+        return
+    for directory, subdirectories, files in os.walk(tests_path):
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith((".", "__")))
+        for name in sorted(files):
+            if _is_test_file(name):
+                yield os.path.join(directory, name)
+
+
+def _is_test_class(node):
+    return node.name.startswith("Test") and not any(
+        isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)) and child.name == "__init__"
+        for child in node.body
+    )
+
+
+def scan_source(source, filename="<test>"):
+    """``[qualified name, TC IDs, line, name/docstring conflicts]`` per test function."""
+    tests = []
+
+    def visit(body, classes):
+        for node in body:
+            if isinstance(node, ast.ClassDef) and _is_test_class(node):
+                visit(node.body, classes + [node.name])
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+                named = find_ids(" ".join(classes + [node.name]))
+                documented = find_ids(ast.get_docstring(node))
+                conflict = bool(named and documented and set(named) != set(documented))
+                tests.append(["::".join(classes + [node.name]), list(dict.fromkeys(named + documented)),
+                              node.lineno, conflict])
+
+    visit(ast.parse(source, filename).body, [])
+    return tests
+
+
+def _digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+class TestIndex:
+    """TC ID -> pytest node IDs, and node ID -> TC IDs, for a test tree."""
+
+    # Not a pytest test class, despite the name
+    __test__ = False
+
+    def __init__(self, files):
+        # files: path -> [[qualified name, TC IDs, line, conflict], ...]
+        self.files = files
+        self.nodes = {}
+        self.tests = {}
+        self.lines = {}
+        self.conflicts = []
+        for path, tests in files.items():
+            for qualname, test_ids, line, conflict in tests:
+                nodeid = f"{path}::{qualname}"
+                self.nodes[nodeid] = test_ids
+                self.lines[nodeid] = line
+                if conflict:
+                    self.conflicts.append(nodeid)
+                for test_id in test_ids:
+                    self.tests.setdefault(test_id, []).append(nodeid)
+
+    def node_ids(self, test_id):
+        """Node IDs implementing a TC ID (in any spelling)."""
+        return list(self.tests.get(normalize(test_id), ()))
+
+    def test_ids(self, nodeid):
+        """Normalized TC IDs a node implements; parametrized IDs count as their function."""
+        return self.nodes.get(nodeid.split("[", 1)[0], [])
+
+    def item_nodeid(self, item):
+        """The index's node ID for a collected pytest item (paths relative to the CWD)."""
+        path = os.path.relpath(str(getattr(item, "path", None) or item.fspath))
+        _, _, names = item.nodeid.partition("::")
+        return f"{path}::{names.split('[', 1)[0]}"
+
+    def select(self, test_ids):
+        """Node IDs to run for ``test_ids`` (first occurrence order) and the IDs with none."""
+        selected, missing = {}, []
+        for test_id in test_ids:
+            nodes = self.node_ids(test_id)
+            if not nodes:
+                missing.append(test_id)
+            selected.update(dict.fromkeys(nodes))
+        return list(selected), missing
+
+
+def build_index(tests_path="tests", cache_path=INDEX_CACHE_FILE):
+    """Scan ``tests_path``, re-parsing only files that changed since the cached scan."""
+    cached = {}
+    if cache_path:
+        try:
+            with open(cache_path) as f:
+                document = json.load(f)
+            if document.get("version") == CACHE_VERSION:
+                cached = document.get("files", {})
+        except (OSError, ValueError):
+            pass
+
+    # The cache is keyed by absolute path, the index by path relative to the CWD
+    entries, changed = {}, False
+    for path in iter_test_files(tests_path):
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = cached.get(key)
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            entries[key] = entry
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = _digest(data)
+        if entry is None or entry["sha1"] != digest:
+            try:
+                tests = scan_source(data, path)
+            except SyntaxError:
+                # pytest reports the collection error; the file implements nothing
+                tests = []
+            entry = {"tests": tests}
+        entries[key] = dict(entry, mtime=stat.st_mtime_ns, size=stat.st_size, sha1=digest)
+        changed = True
+
+    # Cached files that are gone are dropped; other test trees' files stay
+    root = os.path.abspath(tests_path)
+    removed = [key for key in cached if key not in entries
+               and (key == root or key.startswith(root + os.sep) or not os.path.exists(key))]
+    if cache_path and (changed or removed):
+        document = {key: entry for key, entry in cached.items() if key not in removed}
+        document.update(entries)
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": CACHE_VERSION, "files": document}, f)
+        os.replace(tmp_path, cache_path)
+    return TestIndex({os.path.relpath(key): entry["tests"] for key, entry in entries.items()})
+
+
+def mismatches(index, catalog=TEST_CASES_FILE):
+    """Differences between the catalog and the tests that actually exist."""
+    known = set()
+    missing, wrong_paths = [], []
+    for test_case in iter_test_cases(catalog):
+        test_id = normalize(test_case.id)
+        known.add(test_id)
+        nodes = index.node_ids(test_id)
+        if not nodes:
+            if test_case.automationStatus == "Automated":
+                missing.append(test_case.id)
+            continue
+        files = sorted({nodeid.split("::", 1)[0] for nodeid in nodes})
+        path = os.path.normpath(test_case.automationPath) if test_case.automationPath else ""
+        if path not in files:
+            wrong_paths.append({"id": test_case.id, "automationPath": test_case.automationPath or "",
+                                "exists": bool(path) and os.path.exists(path), "implementedIn": files})
+    unknown = sorted(test_id for test_id in index.tests if test_id not in known)
+    return {
+        "missingTests": missing,
+        "unknownIds": {test_id: index.tests[test_id] for test_id in unknown},
+        "wrongAutomationPaths": wrong_paths,
+        "nameDocstringConflicts": {nodeid: index.nodes[nodeid] for nodeid in index.conflicts},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.tc_index", description=__doc__.split("\n")[0])
+    parser.add_argument("--tests-path", default="tests", help="test tree to scan (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="re-parse every file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="node IDs implementing some or all TC IDs")
+    show.add_argument("test_ids", nargs="*")
+    check = commands.add_parser("check", help="compare the index with the catalog")
+    check.add_argument("--catalog", default=TEST_CASES_FILE)
+    check.add_argument("--json", action="store_true", help="print JSON instead of a summary")
+    check.add_argument("--strict", action="store_true", help="exit 1 if anything does not match")
+    args = parser.parse_args(argv)
+
+    index = build_index(args.tests_path, cache_path=None if args.no_cache else INDEX_CACHE_FILE)
+    if args.command == "show":
+        for test_id in args.test_ids or sorted(index.tests):
+            print(f"{normalize(test_id)}: {' '.join(index.node_ids(test_id)) or '-'}")
+        return 0
+
+    report = mismatches(index, args.catalog)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"📋 {len(index.tests)} TC IDs in {len(index.nodes)} tests across {len(index.files)} files")
+        print(f"❌ Automated test cases without a test: {' '.join(report['missingTests']) or '-'}")
+        print(f"❌ TC IDs not in the catalog: {' '.join(report['unknownIds']) or '-'}")
+        wrong = report["wrongAutomationPaths"]
+        missing_files = sum(not entry["exists"] for entry in wrong)
+        print(f"❌ automationPath not the implementing file: {len(wrong)} ({missing_files} pointing at no file)")
+        for entry in wrong[:10]:
+            print(f"   {entry['id']}: {entry['automationPath'] or '-'} -> {' '.join(entry['implementedIn'])}")
+        for nodeid, test_ids in report["nameDocstringConflicts"].items():
+            print(f"❌ Name and docstring disagree: {nodeid} ({' '.join(test_ids)})")
+    found = any(report[key] for key in report)
+    return 1 if args.strict and found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Indexed traceability model over the requirement and test-case catalogs.
+
+Both catalogs are loaded once into a :class:`TraceabilityIndex` with forward
+(requirement -> test cases) and reverse (test case -> requirements) maps, and
+inverted indexes on the attributes people filter by.  Lookups are dictionary
+hits and compound filters intersect the smallest candidate sets first.
+
+Built indexes are pickled under ``.quality-tracker/`` keyed by a hash of the
+two catalog files, so CLI queries start without re-parsing the JSON::
+
+    python -m quality_tracker.traceability covers REQ-001
+    python -m quality_tracker.traceability requirements TC_004
+    python -m quality_tracker.traceability test-cases --tag Login --priority High
+    python -m quality_tracker.traceability stats
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+
+from .catalog import REQUIREMENTS_FILE, ROOT, TEST_CASES_FILE, load_requirements, load_test_cases
+
+CACHE_DIR = os.path.join(ROOT, ".quality-tracker")
+CACHE_VERSION = 2
+
+# Test-case fields with an inverted index; "owner" is inherited from the
+# requirements a test case covers.
+TEST_CASE_FIELDS = ("tags", "priority", "version", "owner", "status", "automationStatus")
+REQUIREMENT_FIELDS = ("tags", "priority", "versions", "owner", "status", "type")
+
+
+def field_key(value):
+    """How a field value is compared in filters: as text, ignoring case."""
+    return str(value).casefold()
+
+
+def field_values(record, field):
+    """A record's values of ``field`` as a tuple (list fields and scalars alike)."""
+    value = record.get(field)
+    if value is None or value == "":
+        return ()
+    return value if isinstance(value, (list, tuple)) else (value,)
+
+
+class TraceabilityIndex:
+    """Requirements, test cases and the indexes between them."""
+
+    def __init__(self, requirements, test_cases):
+        self.requirements = {r["id"]: r for r in requirements}
+        self.test_cases = {tc["id"]: tc for tc in test_cases}
+
+        self.covered_by = {req_id: [] for req_id in self.requirements}
+        self.covers = {}
+        for tc_id, test_case in self.test_cases.items():
+            req_ids = tuple(test_case.get("requirementIds") or ())
+            self.covers[tc_id] = req_ids
+            for req_id in req_ids:
+                self.covered_by.setdefault(req_id, []).append(tc_id)
+
+        self.test_case_index = {field: {} for field in TEST_CASE_FIELDS}
+        for tc_id, test_case in self.test_cases.items():
+            for field in TEST_CASE_FIELDS:
+                if field == "owner":
+                    values = {self.requirements[r]["owner"] for r in self.covers[tc_id]
+                              if self.requirements.get(r, {}).get("owner")}
+                else:
+                    values = field_values(test_case, field)
+                for value in values:
+                    self.test_case_index[field].setdefault(field_key(value), set()).add(tc_id)
+
+        self.requirement_index = {field: {} for field in REQUIREMENT_FIELDS}
+        for req_id, requirement in self.requirements.items():
+            for field in REQUIREMENT_FIELDS:
+                for value in field_values(requirement, field):
+                    self.requirement_index[field].setdefault(field_key(value), set()).add(req_id)
+
+    def test_cases_for(self, req_id):
+        """TC IDs covering a requirement, in catalog order."""
+        return list(self.covered_by.get(req_id, ()))
+
+    def requirements_for(self, tc_id):
+        """Requirement IDs a test case covers."""
+        return list(self.covers.get(tc_id, ()))
+
+    @staticmethod
+    def _filter(universe, index, filters):
+        candidates = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in index:
+                raise ValueError(f"Unknown filter field: {field}")
+            values = value if isinstance(value, (list, tuple, set)) else (value,)
+            # Several values for one field mean "any of them"
+            matched = set()
+            for item in values:
+                matched |= index[field].get(field_key(item), set())
+            candidates.append(matched)
+        if not candidates:
+            return set(universe)
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for other in candidates[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+    def find_test_cases(self, requirement=None, **filters):
+        """TC IDs matching every given filter, in catalog order.
+
+        ``requirement`` restricts to test cases covering that requirement (or
+        any of a list of requirements); other keyword arguments are
+        :data:`TEST_CASE_FIELDS`, each taking a value or a list of values.
+        """
+        matched = self._filter(self.test_cases, self.test_case_index, filters)
+        if requirement is not None:
+            req_ids = requirement if isinstance(requirement, (list, tuple, set)) else (requirement,)
+            covering = set()
+            for req_id in req_ids:
+                covering.update(self.covered_by.get(req_id, ()))
+            matched &= covering
+        return [tc_id for tc_id in self.test_cases if tc_id in matched]
+
+    def find_requirements(self, **filters):
+        """Requirement IDs matching every filter on :data:`REQUIREMENT_FIELDS`."""
+        matched = self._filter(self.requirements, self.requirement_index, filters)
+        return [req_id for req_id in self.requirements if req_id in matched]
+
+    def uncovered_requirements(self):
+        return [req_id for req_id in self.requirements if not self.covered_by.get(req_id)]
+
+    def dangling_references(self):
+        """``(tc_id, req_id)`` pairs pointing at requirements that do not exist."""
+        return [(tc_id, req_id) for tc_id, req_ids in self.covers.items()
+                for req_id in req_ids if req_id not in self.requirements]
+
+
+def _file_digest(*paths):
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_index(requirements_path=REQUIREMENTS_FILE, test_cases_path=TEST_CASES_FILE, cache_dir=CACHE_DIR):
+    """Return the index for two catalog files, using the on-disk cache when valid."""
+    cache_path = None
+    if cache_dir:
+        digest = _file_digest(requirements_path, test_cases_path)
+        cache_path = os.path.join(cache_dir, f"traceability-{digest[:16]}.pickle")
+        try:
+            with open(cache_path, "rb") as f:
+                state = pickle.load(f)
+            index = TraceabilityIndex.__new__(TraceabilityIndex)
+            index.__dict__.update(state)
+            return index
+        except Exception:  # noqa: BLE001 - a stale or unreadable cache is rebuilt
+            # Besides I/O and truncation errors this covers pickles that name
+            # catalog classes which have since moved or been renamed
+            pass
+
+    index = TraceabilityIndex(load_requirements(requirements_path), load_test_cases(test_cases_path))
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in os.listdir(cache_dir):
+            if name.startswith("traceability-") and name.endswith(".pickle"):
+                os.remove(os.path.join(cache_dir, name))
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            # The index's own class is not pickled, but its records are
+            # catalog.TestCase/Requirement objects, so the cache depends on
+            # that module; loading a stale one falls back to a rebuild above
+            pickle.dump(index.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quality_tracker.traceability",
+                                     description=__doc__.split("\n")[0])
+    parser.add_argument("--requirements", default=REQUIREMENTS_FILE)
+    parser.add_argument("--test-cases", default=TEST_CASES_FILE)
+    parser.add_argument("--no-cache", action="store_true", help="rebuild the index without the disk cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+    covers = commands.add_parser("covers", help="test cases covering requirements")
+    covers.add_argument("requirement_ids", nargs="+")
+    reverse = commands.add_parser("requirements", help="requirements covered by test cases")
+    reverse.add_argument("test_case_ids", nargs="+")
+    query = commands.add_parser("test-cases", help="test cases matching filters")
+    query.add_argument("--requirement", action="append")
+    for field in TEST_CASE_FIELDS:
+        query.add_argument(f"--{field.rstrip('s') if field == 'tags' else field}", dest=field, action="append")
+    commands.add_parser("stats", help="catalog and coverage overview")
+    args = parser.parse_args(argv)
+
+    index = load_index(args.requirements, args.test_cases, cache_dir=None if args.no_cache else CACHE_DIR)
+    if args.command == "covers":
+        for req_id in args.requirement_ids:
+            print(f"{req_id}: {' '.join(index.test_cases_for(req_id)) or '-'}")
+    elif args.command == "requirements":
+        for tc_id in args.test_case_ids:
+            print(f"{tc_id}: {' '.join(index.requirements_for(tc_id)) or '-'}")
+    elif args.command == "test-cases":
+        filters = {field: getattr(args, field) for field in TEST_CASE_FIELDS}
+        print(" ".join(index.find_test_cases(requirement=args.requirement, **filters)))
+    else:
+        print(f"Requirements: {len(index.requirements)}")
+        print(f"Test cases: {len(index.test_cases)}")
+        print(f"Uncovered requirements: {' '.join(index.uncovered_requirements()) or '-'}")
+        dangling = index.dangling_references()
+        print(f"Dangling requirement references: {len(dangling)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Timed spans of where a test's time goes, exported as Chrome trace events.
+
+With ``QT_TRACE_FILE`` set, :class:`TraceReport` (a pytest plugin registered
+by ``tests/conftest.py``) records a span for
+
+* each test's setup, call and teardown phases,
+* every fixture's setup and teardown,
+* browser launch, reset and quit in :mod:`quality_tracker.browser_pool`,
+* every WebDriver command (``get`` counted as navigation) of an
+  :func:`quality_tracker.commands.instrument`-ed driver,
+* every :func:`quality_tracker.waits.wait_until`,
+* every ``time.sleep`` on the test thread outside those waits,
+
+attributed to the test and its TC IDs.  At the end of the session the spans
+are written to ``QT_TRACE_FILE`` in the Chrome trace-event format (open it in
+Perfetto or ``chrome://tracing``), and a per-TC table of time by phase is
+printed.  Parallel workers write ``<name>-<worker id>.json`` next to it.
+
+When tracing is off nothing is registered or patched; the instrumented code
+paths only check the module-level :data:`_tracer` for None.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import pytest
+
+from .tc_index import find_ids
+
+PHASES = ("setup", "call", "teardown")
+# What the phases' time went to.  Time inside one of these belongs to it, so
+# e.g. the commands a wait polls with or a browser reset sends are not
+# counted again; fixture spans only appear in the trace.
+PARTS = ("browser", "navigation", "webdriver", "wait", "sleep")
+SUMMARY_CATEGORIES = PHASES + PARTS
+
+_tracer = None
+
+
+def tracer():
+    """The active :class:`Tracer`, or None when tracing is off."""
+    return _tracer
+
+
+def tc_ids(nodeid):
+    """The normalized TC IDs in a node ID (see :func:`quality_tracker.tc_index.find_ids`)."""
+    return sorted(find_ids(nodeid))
+
+
+class Tracer:
+    """Collects spans as Chrome trace "complete" events."""
+
+    def __init__(self):
+        self.events = []
+        self.test = None
+        self.totals = defaultdict(lambda: defaultdict(float))
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def inside(self, category):
+        return category in self._stack()
+
+    def begin(self, category):
+        self._stack().append(category)
+        return time.perf_counter()
+
+    def end(self, name, category, started, counted=True, **args):
+        finished = time.perf_counter()
+        stack = self._stack()
+        if stack:
+            stack.pop()
+        test = self.test
+        if test is not None:
+            args["test"] = test
+            args["tcIds"] = tc_ids(test)
+            if counted and category in SUMMARY_CATEGORIES:
+                self.totals[test][category] += finished - started
+        self.events.append({
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((started - self._origin) * 1e6, 1),
+            "dur": round((finished - started) * 1e6, 1),
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    @contextmanager
+    def span(self, name, category, **args):
+        counted = category in PHASES or not any(part in self._stack() for part in PARTS)
+        started = self.begin(category)
+        try:
+            yield
+        finally:
+            self.end(name, category, started, counted, **args)
+
+    def trace_document(self):
+        names = [{"name": "process_name", "ph": "M", "pid": self._pid,
+                  "args": {"name": os.environ.get("QT_WORKER_ID", "pytest")}}]
+        return {"traceEvents": names + self.events, "displayTimeUnit": "ms"}
+
+    def by_tc(self):
+        """Seconds per summary category, summed over each TC ID's tests."""
+        rows = defaultdict(lambda: defaultdict(float))
+        for test, totals in self.totals.items():
+            for tc_id in tc_ids(test) or [test]:
+                for category, seconds in totals.items():
+                    rows[tc_id][category] += seconds
+        return rows
+
+
+@contextmanager
+def _no_span():
+    yield
+
+
+def span(name, category, **args):
+    """Time a block as a span when tracing is on; costs one global lookup otherwise."""
+    active = _tracer
+    if active is None:
+        return _no_span()
+    return active.span(name, category, **args)
+
+
+def trace_path(path):
+    worker = os.environ.get("QT_WORKER_ID")
+    if not worker:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{worker}{ext or '.json'}"
+
+
+class TraceReport:
+    """pytest plugin: phase spans per test, the trace file and a summary table."""
+
+    def __init__(self, path):
+        self.path = trace_path(path)
+        self.tracer = Tracer()
+        self._sleep = None
+
+    def pytest_configure(self, config):
+        global _tracer
+        _tracer = self.tracer
+        # Sleeps on the test thread become spans (waits poll with their own)
+        sleep = self._sleep = time.sleep
+        main_thread = threading.main_thread()
+        tracer_ = self.tracer
+
+        def traced_sleep(seconds):
+            if threading.current_thread() is not main_thread or tracer_.inside("wait"):
+                return sleep(seconds)
+            with tracer_.span("time.sleep", "sleep", seconds=seconds):
+                return sleep(seconds)
+
+        time.sleep = traced_sleep
+
+    def pytest_unconfigure(self, config):
+        global _tracer
+        if self._sleep is not None:
+            time.sleep = self._sleep
+            self._sleep = None
+        _tracer = None
+
+    def _phase(self, item, phase):
+        self.tracer.test = item.nodeid
+        return self.tracer.span(f"{phase} {item.name}", phase)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        with self._phase(item, "setup"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        with self._phase(item, "call"):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item):
+        with self._phase(item, "teardown"):
+            yield
+        self.tracer.test = None
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        with self.tracer.span(f"setup {fixturedef.argname}", "fixture", scope=fixturedef.scope):
+            yield
+        # Finalizers run last-in first-out, so this one runs first and marks
+        # the start of the fixture's teardown; pytest_fixture_post_finalizer
+        # closes the span
+        fixturedef.addfinalizer(lambda: self._teardown_started(fixturedef))
+
+    def _teardown_started(self, fixturedef):
+        fixturedef._quality_tracker_teardown = self.tracer.begin("fixture")
+
+    def pytest_fixture_post_finalizer(self, fixturedef, request):
+        started = getattr(fixturedef, "_quality_tracker_teardown", None)
+        if started is not None:
+            fixturedef._quality_tracker_teardown = None
+            self.tracer.end(f"teardown {fixturedef.argname}", "fixture", started, scope=fixturedef.scope)
+
+    def pytest_sessionfinish(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.tracer.trace_document(), f)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        rows = self.tracer.by_tc()
+        if not rows:
+            return
+        terminalreporter.section("trace")
+        terminalreporter.write_line(f"{len(self.tracer.events)} spans written to {self.path}")
+        terminalreporter.write_line(
+            f"  {'':<12}" + "".join(f"{category:>11}" for category in SUMMARY_CATEGORIES)
+        )
+        for tc_id, totals in sorted(rows.items()):
+            terminalreporter.write_line(
+                f"  {tc_id:<12}" + "".join(f"{totals.get(category, 0.0):>10.2f}s" for category in SUMMARY_CATEGORIES)
+            )
+
+
+def report_from_env():
+    path = os.environ.get("QT_TRACE_FILE")
+    return TraceReport(path) if path else None
@@ -0,0 +1,388 @@
+"""Condition-based waits for the storefront tests.
+
+Instead of sleeping for a guessed number of seconds after a click, a test
+waits for the thing it actually needs::
+
+    before = cart_count(browser)
+    button.click()
+    wait_until(browser, any_of(success_alert(), cart_count_changed(before)))
+
+A condition is any callable taking the driver and returning a truthy value
+once satisfied (so Selenium's ``expected_conditions`` work too).  The ones
+here carry a ``name`` used to key their history and a default timeout.
+
+Polling is adaptive: it starts at a fraction of the condition's typical wait
+and backs off geometrically, so fast conditions are noticed quickly and slow
+ones do not flood the browser with commands.  Timeouts come from history:
+once a condition has a few samples, its timeout is a multiple of the slowest
+observed wait, but never below the condition's own default (and at most
+``MAX_TIMEOUT``).  A wait that times out is recorded at its full timeout, so
+the next wait for that condition gets longer instead of flaking again.
+History is kept in ``.quality-tracker/waits.json``.
+
+:class:`WaitReport` is a pytest plugin that measures how much of each test's
+call phase is spent waiting and how much working.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from . import tracing
+from .catalog import ROOT
+
+WAIT_HISTORY_FILE = os.environ.get(
+    "QT_WAIT_HISTORY_FILE", os.path.join(ROOT, ".quality-tracker", "waits.json")
+)
+
+DEFAULT_TIMEOUT = 10.0
+MAX_TIMEOUT = 30.0
+# Timeout = TIMEOUT_FACTOR x slowest observed wait, once MIN_SAMPLES are known,
+# but never below the condition's default
+TIMEOUT_FACTOR = 3.0
+MIN_SAMPLES = 5
+MAX_SAMPLES = 50
+
+POLL_MIN = 0.05
+POLL_MAX = 0.5
+POLL_GROWTH = 1.5
+
+
+class WaitHistory:
+    """Recent wait durations per condition name, kept in a JSON file.
+
+    A timed-out wait is stored as its timeout: a lower bound of how long the
+    condition really took.
+    """
+
+    def __init__(self, path=WAIT_HISTORY_FILE):
+        self.path = path
+        self.samples = self._read()
+        self._new = {}
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def timeout(self, name, default=DEFAULT_TIMEOUT):
+        """The timeout for a wait on ``name``: ``default`` or more, never less."""
+        samples = self.samples.get(name, ())
+        if len(samples) < MIN_SAMPLES:
+            return default
+        return max(default, min(MAX_TIMEOUT, TIMEOUT_FACTOR * max(samples)))
+
+    def typical(self, name):
+        samples = sorted(self.samples.get(name, ()))
+        return samples[len(samples) // 2] if samples else None
+
+    def interval(self, name):
+        """First polling interval for ``name``: a quarter of its typical wait, within bounds."""
+        typical = self.typical(name)
+        return min(POLL_MAX, max(POLL_MIN, typical / 4)) if typical else POLL_MIN
+
+    def record(self, name, seconds):
+        with self._lock:
+            for samples in (self.samples.setdefault(name, []), self._new.setdefault(name, [])):
+                samples.append(round(seconds, 3))
+                del samples[:-MAX_SAMPLES]
+
+    def save(self):
+        """Merge this process's samples into the file (workers share it)."""
+        with self._lock:
+            if not self._new:
+                return
+            merged = self._read()
+            for name, samples in self._new.items():
+                merged[name] = (merged.get(name, []) + samples)[-MAX_SAMPLES:]
+            self._new = {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+_history = None
+
+
+def history():
+    """The process-wide :class:`WaitHistory`, loaded on first use."""
+    global _history
+    if _history is None:
+        _history = WaitHistory()
+    return _history
+
+
+class WaitRecorder:
+    """Time spent in :func:`wait_until` while it is the active recorder."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.waits = 0
+        self.timeouts = 0
+        self.polls = 0
+
+
+_recorder = None
+
+
+def _ignored_exceptions():
+    from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
+    return NoSuchElementException, StaleElementReferenceException
+
+
+def wait_until(driver, condition, timeout=None, required=True, message=""):
+    """Poll ``condition(driver)`` until it returns a truthy value and return it.
+
+    ``timeout`` defaults to the history-derived one for the condition.  When
+    the condition is not met in time, a Selenium ``TimeoutException`` is
+    raised, or None is returned if the wait is not ``required``.
+    """
+    name = getattr(condition, "name", getattr(condition, "__name__", type(condition).__name__))
+    waits = history()
+    if timeout is None:
+        timeout = waits.timeout(name, getattr(condition, "timeout", DEFAULT_TIMEOUT))
+    interval = waits.interval(name)
+    ignored = _ignored_exceptions()
+
+    with tracing.span(f"wait {name}", "wait", timeout=round(timeout, 2)):
+        value, polls, elapsed = _poll(driver, condition, timeout, interval, ignored)
+
+    recorder = _recorder
+    if recorder is not None:
+        recorder.seconds += elapsed
+        recorder.waits += 1
+        recorder.polls += polls
+        recorder.timeouts += not value
+    # A timeout is recorded too, so the learned timeout can grow again
+    waits.record(name, elapsed)
+    if value:
+        return value
+    if not required:
+        return None
+    from selenium.common.exceptions import TimeoutException
+
+    raise TimeoutException(message or f"{name} not met within {timeout:.1f}s")
+
+
+def _poll(driver, condition, timeout, interval, ignored):
+    started = time.monotonic()
+    deadline = started + timeout
+    polls = 0
+    while True:
+        polls += 1
+        try:
+            value = condition(driver)
+        except ignored:
+            value = None
+        now = time.monotonic()
+        if value or now >= deadline:
+            break
+        time.sleep(min(interval, deadline - now))
+        interval = min(POLL_MAX, interval * POLL_GROWTH)
+    return value, polls, time.monotonic() - started
+
+
+def _condition(name, timeout=DEFAULT_TIMEOUT):
+    def decorate(function):
+        function.name = name
+        function.timeout = timeout
+        return function
+
+    return decorate
+
+
+def _locator_name(locator):
+    by, value = locator
+    return f"{by}={value}"
+
+
+# --- Conditions -------------------------------------------------------------
+
+
+def element_present(locator):
+    """First element matching ``(By, value)``; replaces ``presence_of_element_located``."""
+
+    @_condition(f"present:{_locator_name(locator)}")
+    def condition(driver):
+        elements = driver.find_elements(*locator)
+        return elements[0] if elements else False
+
+    return condition
+
+
+def element_count_below(locator, count):
+    """Fewer than ``count`` elements match, e.g. after removing a table row."""
+
+    @_condition(f"count-below:{_locator_name(locator)}", timeout=5.0)
+    def condition(driver):
+        return len(driver.find_elements(*locator)) < count
+
+    return condition
+
+
+@_condition("page-ready", timeout=5.0)
+def page_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+_SUCCESS_ALERTS_JS = """
+return Array.prototype.filter.call(document.querySelectorAll('.alert'), function (alert) {
+    return (alert.className || '').toLowerCase().indexOf('success') !== -1;
+}).map(function (alert) { return alert.innerText || ''; });
+"""
+
+
+def success_alert(text=None):
+    """Text of an ``.alert`` with a success class (containing ``text``, if given)."""
+
+    @_condition(f"success-alert:{text}" if text else "success-alert", timeout=5.0)
+    def condition(driver):
+        for alert_text in driver.execute_script(_SUCCESS_ALERTS_JS) or ():
+            if text is None or text.lower() in alert_text.lower():
+                return alert_text or True
+        return False
+
+    return condition
+
+
+_CART_TOTAL_JS = "var e = document.querySelector('#cart-total'); return e ? e.textContent : null;"
+_ITEM_COUNT = re.compile(r"(\d+)\s*item", re.IGNORECASE)
+
+
+def cart_count(driver):
+    """Item count shown by the header cart button, or None if it cannot be read."""
+    text = driver.execute_script(_CART_TOTAL_JS)
+    match = _ITEM_COUNT.search(text or "")
+    return int(match.group(1)) if match else None
+
+
+def cart_count_changed(before):
+    """The header cart count differs from ``before``; returns the new count."""
+
+    @_condition("cart-count-changed", timeout=5.0)
+    def condition(driver):
+        count = cart_count(driver)
+        if count is None or count == before:
+            return False
+        # A cart of zero items would be falsy
+        return str(count)
+
+    return condition
+
+
+_VISIBLE_JS = """
+return Array.prototype.some.call(document.querySelectorAll(arguments[0]), function (e) {
+    return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length);
+});
+"""
+
+
+def dropdown_visible(selector=".dropdown-menu"):
+    """An element matching the CSS ``selector`` is displayed (an opened dropdown)."""
+
+    @_condition(f"visible:{selector}", timeout=3.0)
+    def condition(driver):
+        return driver.execute_script(_VISIBLE_JS, selector)
+
+    return condition
+
+
+def route(url):
+    """OpenCart route of a URL (``?route=account/login``), or its path without one."""
+    parts = urlsplit(url)
+    return parse_qs(parts.query).get("route", [parts.path])[0]
+
+
+def route_changed(from_url):
+    """The browser left the route of ``from_url``; returns the new URL."""
+    before = route(from_url)
+
+    @_condition("route-changed")
+    def condition(driver):
+        url = driver.current_url
+        return url if route(url) != before else False
+
+    return condition
+
+
+def any_of(*conditions):
+    """The first satisfied condition's value."""
+
+    @_condition("any:" + "|".join(getattr(c, "name", "?") for c in conditions),
+                timeout=max(getattr(c, "timeout", DEFAULT_TIMEOUT) for c in conditions))
+    def condition(driver):
+        for candidate in conditions:
+            value = candidate(driver)
+            if value:
+                return value
+        return False
+
+    return condition
+
+
+# --- Reporting --------------------------------------------------------------
+
+
+class WaitReport:
+    """pytest plugin: wait vs. work time per test, and saving the history."""
+
+    def __init__(self):
+        self.tests = {}
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        global _recorder
+        recorder = _recorder = WaitRecorder()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            _recorder = None
+        self.tests[item.nodeid] = {
+            "seconds": round(elapsed, 3),
+            "waitSeconds": round(recorder.seconds, 3),
+            "workSeconds": round(max(0.0, elapsed - recorder.seconds), 3),
+            "waits": recorder.waits,
+            "timeouts": recorder.timeouts,
+            "polls": recorder.polls,
+        }
+        item.user_properties.append(("waitSeconds", round(recorder.seconds, 3)))
+
+    def pytest_sessionfinish(self):
+        if _history is not None:
+            _history.save()
+
+    def pytest_terminal_summary(self, terminalreporter):
+        waited = {nodeid: entry for nodeid, entry in self.tests.items() if entry["waits"]}
+        if not waited:
+            return
+        total = sum(entry["seconds"] for entry in self.tests.values())
+        wait = sum(entry["waitSeconds"] for entry in self.tests.values())
+        terminalreporter.section("waits")
+        terminalreporter.write_line(
+            f"waiting {wait:.1f}s of {total:.1f}s in test calls ({wait / total:.0%})" if total
+            else f"waiting {wait:.1f}s"
+        )
+        slowest = sorted(waited.items(), key=lambda pair: -pair[1]["waitSeconds"])[:10]
+        for nodeid, entry in slowest:
+            terminalreporter.write_line(
+                f"  {entry['waitSeconds']:7.2f}s wait {entry['workSeconds']:7.2f}s work "
+                f"{entry['waits']:3d} waits {entry['timeouts']:2d} timed out  {nodeid}"
+            )
+
+        report_path = os.environ.get("QT_WAIT_REPORT")
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(self.tests, f, indent=2)
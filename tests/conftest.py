@@ -0,0 +1,159 @@
+import json
+import os
+
+import pytest
+
+from quality_tracker import base_url, locators
+from quality_tracker.http_cache import CacheReport, proxy_from_env
+from quality_tracker.browser_pool import BrowserPool, chrome_factory
+from quality_tracker.commands import CommandReport, instrument
+from quality_tracker.contexts import SHARED_CHROME, ContextPool
+from quality_tracker.evidence import capture_from_env
+from quality_tracker.sessions import cache_from_env
+from quality_tracker.tracing import report_from_env
+from quality_tracker.waits import WaitReport
+
+_browser_pools_key = pytest.StashKey[dict]()
+_contexts_key = pytest.StashKey[object]()
+_http_cache_key = pytest.StashKey[object]()
+_sessions_key = pytest.StashKey[object]()
+
+
+def pytest_configure(config):
+    config.stash[_browser_pools_key] = {}
+    config.stash[_sessions_key] = cache_from_env()
+    # QT_HTTP_CACHE=record|replay puts a local record/replay proxy in front of
+    # the storefront; everything built on base_url() then goes through it
+    proxy = proxy_from_env()
+    if proxy is not None:
+        config.stash[_http_cache_key] = proxy
+        os.environ["QT_STOREFRONT_URL"] = proxy.upstream_url
+        os.environ["QT_BASE_URL"] = proxy.url
+        config.pluginmanager.register(CacheReport(proxy), "quality-tracker-http-cache")
+    # Wait vs. work time per test, and the history wait timeouts derive from
+    config.pluginmanager.register(WaitReport(), "quality-tracker-waits")
+    # WebDriver commands (chromedriver round trips) per test
+    config.pluginmanager.register(CommandReport(), "quality-tracker-commands")
+    # Screenshot, DOM and console log of failing tests, written in the background
+    evidence = capture_from_env()
+    if evidence is not None:
+        config.pluginmanager.register(evidence, "quality-tracker-evidence")
+    # QT_TRACE_FILE=trace.json records timed spans per test (Perfetto format)
+    trace = report_from_env()
+    if trace is not None:
+        config.pluginmanager.register(trace, "quality-tracker-trace")
+
+
+@pytest.fixture(scope="session")
+def browser_pools(pytestconfig):
+    """Warm browsers shared by every test in this worker process."""
+    pools = {
+        # Storefront tests run in a visible, maximized window on the home page
+        "storefront": BrowserPool(
+            chrome_factory(maximize=True), start_url=base_url(), name="storefront"
+        ),
+        # Admin tests use headless Chrome with CI-friendly flags
+        "admin": BrowserPool(
+            chrome_factory(headless=True, arguments=("--no-sandbox", "--disable-dev-shm-usage")),
+            name="admin",
+        ),
+    }
+    pytestconfig.stash[_browser_pools_key] = pools
+    yield pools
+    for pool in pools.values():
+        pool.close()
+
+
+@pytest.fixture(scope="session")
+def browser_contexts(pytestconfig):
+    """Host browser for @pytest.mark.shared_browser tests (off unless QT_SHARED_CONTEXTS=on)."""
+    contexts = ContextPool(
+        # Maximized like the storefront pool; QT_SHARED_CHROME=host:port (set by
+        # parallel runs) attaches every worker to one running Chrome instead
+        chrome_factory(maximize=True, debugger_address=SHARED_CHROME or None),
+        start_url=base_url(),
+        name="storefront",
+        attached=bool(SHARED_CHROME),
+    )
+    pytestconfig.stash[_contexts_key] = contexts
+    yield contexts
+    contexts.quit()
+
+
+def _wants_fresh(request):
+    # @pytest.mark.fresh_browser asks for a brand-new Chrome process
+    return request.node.get_closest_marker("fresh_browser") is not None
+
+
+def _authenticate(request, driver):
+    # @pytest.mark.session("customer") starts the test logged in; the closest
+    # marker wins, so session(None) opts a login-flow test out again
+    marker = request.node.get_closest_marker("session")
+    role = marker.args[0] if marker is not None and marker.args else None
+    if role is not None:
+        request.config.stash[_sessions_key].authenticate(driver, role)
+    return driver
+
+
+@pytest.fixture
+def storefront_browser(request, browser_pools, browser_contexts):
+    """Pooled browser sitting on the storefront home page.
+
+    Tests marked shared_browser get an isolated context of a shared Chrome
+    instead when shared contexts are on (see quality_tracker/contexts.py).
+    """
+    lease = browser_contexts.lease(request.node, browser_pools["storefront"], fresh=_wants_fresh(request))
+    with lease as driver:
+        yield _authenticate(request, instrument(driver))
+
+
+@pytest.fixture
+def admin_browser(request, browser_pools):
+    """Pooled headless browser for the admin tests."""
+    with browser_pools["admin"].lease(fresh=_wants_fresh(request)) as driver:
+        yield _authenticate(request, instrument(driver))
+
+
+def pytest_sessionfinish(session):
+    # Keep the selectors that matched for the next run
+    locators.save()
+
+
+def pytest_unconfigure(config):
+    proxy = config.stash.get(_http_cache_key, None)
+    if proxy is not None:
+        proxy.stop()
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    locator_summary = locators.summary_line()
+    if locator_summary:
+        terminalreporter.section("locators")
+        terminalreporter.write_line(locator_summary)
+
+    sessions = config.stash.get(_sessions_key, None)
+    if sessions is not None and (sessions.logins or sessions.restored):
+        terminalreporter.section("sessions")
+        terminalreporter.write_line(sessions.summary_line())
+
+    contexts = config.stash.get(_contexts_key, None)
+    if contexts is not None and contexts.enabled and (contexts.stats.leases or contexts.stats.dedicated):
+        terminalreporter.section("browser contexts")
+        terminalreporter.write_line(contexts.summary_line())
+        report_path = os.environ.get("QT_CONTEXT_REPORT")
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(contexts.stats.as_dict(), f, indent=2)
+
+    pools = config.stash.get(_browser_pools_key, {})
+    used = {name: pool for name, pool in pools.items() if pool.stats.leases}
+    if not used:
+        return
+    terminalreporter.section("browser pool")
+    for pool in used.values():
+        terminalreporter.write_line(pool.summary_line())
+
+    report_path = os.environ.get("QT_BROWSER_POOL_REPORT")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump({name: pool.stats.as_dict() for name, pool in used.items()}, f, indent=2)
@@ -1,98 +1,73 @@
 import pytest
-from selenium import webdriver
-import time
-from selenium.webdriver.chrome.options import Options
 
 @pytest.fixture
-def driver():
-    # Set up Chrome options with headless mode for speed
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    
-    # Initialize Chrome with these options
-    driver = webdriver.Chrome(options=options)
-    
-    # Return the driver for test use
-    yield driver
-    
-    # Always quit the driver after test completion
-    driver.quit()
+def driver(admin_browser):
+    # Headless Chrome leased from the worker's browser pool (see tests/conftest.py)
+    # instead of launching and quitting a new process for every test
+    yield admin_browser
 
 
 def test_admin_login_TC_007(driver):
     """[TC-007] Verify admin login functionality"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_delete_product_TC_009(driver):
     """[TC-009] Verify product deletion functionality"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_admin_logout_TC_008(driver):
     """[TC-008] Verify admin logout functionality"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_add_new_category_TC_010(driver):
     """[TC-010] Verify category creation functionality"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_admin_login_invalid_credentials_TC_011(driver):
     """[TC-011] Verify admin login with invalid credentials"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_admin_login_invalid_username_TC_012(driver):
     """[TC-012] Verify admin login with invalid username"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_admin_login_invalid_password_TC_013(driver):
     """[TC-013] Verify admin login with invalid password"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_admin_login_empty_fields_TC_014(driver):
     """[TC-014] Verify admin login with empty fields"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_admin_redirect_to_dashboard_TC_015(driver):
     """[TC-015] Verify admin redirect to dashboard after login"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_password_masking_during_admin_login_TC_016(driver):
     """[TC-016] Verify password masking during admin login"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
 
 
 def test_browser_back_button_after_logout_TC_017(driver):
     """[TC-017] Verify browser back button after logout"""
-    # Wait 3 seconds and then pass
-    time.sleep(3)
+    # Placeholder: the admin UI is not driven yet
     assert True
\ No newline at end of file
@@ -0,0 +1,430 @@
+"""Unit tests of the harness itself (quality_tracker), no browser needed.
+
+    python -m pytest tests/test_harness.py
+"""
+
+import json
+
+import pytest
+
+from quality_tracker.artifacts import (
+    ArtifactStore,
+    bundle_store,
+    chunk,
+    expand,
+    externalize,
+    read_bundle,
+    verify,
+)
+from quality_tracker.capture import ELISION_MARKER, OutputCapture, decompress, log_suffix
+from quality_tracker.catalog import iter_array, iter_test_cases
+from quality_tracker.dispatcher import CallbackDispatcher, DispatchStats, merge_latency_samples
+from quality_tracker.parallel import plan_shards
+from quality_tracker.payloads import result_entry
+from quality_tracker.receiver import StandInReceiver
+from quality_tracker.results_store import (
+    LogIndex,
+    ResultsLog,
+    build_summary,
+    compact,
+    finished_ids,
+    iter_events,
+    load_callback_stats,
+)
+from quality_tracker.shards import merge_logs
+from quality_tracker.tc_index import build_index, find_ids, normalize, scan_source
+
+
+def test_plan_shards_puts_longest_first_on_least_loaded_worker():
+    durations = {"TC_001": 10, "TC_002": 7, "TC_003": 5, "TC_004": 3, "TC_005": 1}
+    shards = plan_shards(list(durations), durations, 2)
+    assert shards == [(13, ["TC_001", "TC_004"]), (13, ["TC_002", "TC_003", "TC_005"])]
+
+
+def test_plan_shards_keeps_dispatch_order_between_equal_durations():
+    durations = {"TC_003": 2, "TC_001": 2, "TC_002": 2}
+    shards = plan_shards(list(durations), durations, 1)
+    assert shards == [(6, ["TC_003", "TC_001", "TC_002"])]
+
+
+def test_plan_shards_drops_empty_shards():
+    durations = {"TC_001": 1, "TC_002": 1}
+    assert [shard for _, shard in plan_shards(list(durations), durations, 5)] == [["TC_001"], ["TC_002"]]
+    assert plan_shards(["TC_001"], {"TC_001": 1}, 0) == [(1, ["TC_001"])]
+
+
+def test_capture_keeps_head_and_tail_and_marks_the_gap():
+    capture = OutputCapture(head=5, tail=5)
+    for piece in ("abc", "defgh", "ijklmnop", "qrst"):
+        capture.write(piece)
+    assert capture.total == 20
+    assert capture.elided == 10
+    assert capture.text() == "abcde" + ELISION_MARKER.format(elided=10) + "pqrst"
+
+
+def test_capture_bounds_a_single_oversized_write():
+    capture = OutputCapture(head=4, tail=6)
+    capture.write("x" * 4 + "y" * 100_000 + "tail!!")
+    assert capture._tail_size == 6
+    assert capture.text() == "xxxx" + ELISION_MARKER.format(elided=100_000) + "tail!!"
+
+
+def test_capture_short_output_is_unchanged_and_logged_in_full(tmp_path):
+    log_path = str(tmp_path / f"output.log{log_suffix()}")
+    with OutputCapture(log_path, head=3, tail=3) as capture:
+        capture.write("short")
+        assert capture.text() == "short"
+        capture.write("-and-much-longer")
+    with open(log_path, "rb") as f:
+        assert decompress(f.read()).decode() == "short-and-much-longer"
+
+
+def test_dispatcher_coalesces_unsent_updates_and_batches():
+    with StandInReceiver() as receiver:
+        dispatcher = CallbackDispatcher(receiver.url, {}, request_id="req-1", flush_interval=0.2, max_batch=10)
+        for test_id in ("TC_001", "TC_002"):
+            for status in ("Not Started", "Running", "Passed"):
+                dispatcher.submit(result_entry(test_id, status))
+        dispatcher.close()
+    assert [(r["id"], r["status"]) for r in receiver.results] == [("TC_001", "Passed"), ("TC_002", "Passed")]
+    assert receiver.requests == 1
+    assert receiver.payloads[0]["requestId"] == "req-1"
+    assert dispatcher.stats.coalesced == 4
+    assert dispatcher.stats.sent == 2
+
+
+def test_dispatcher_retries_server_errors():
+    with StandInReceiver(fail_every=2) as receiver:
+        dispatcher = CallbackDispatcher(receiver.url, {}, senders=1, flush_interval=0, max_batch=1, backoff=0.01)
+        for test_id in ("TC_001", "TC_002", "TC_003"):
+            dispatcher.submit(result_entry(test_id, "Failed"))
+        dispatcher.close()
+    assert sorted(r["id"] for r in receiver.results) == ["TC_001", "TC_002", "TC_003"]
+    assert dispatcher.stats.retries >= 1
+    assert dispatcher.stats.failed == 0
+
+
+def test_dispatcher_never_drops_a_final_status_for_room():
+    with StandInReceiver() as receiver:
+        dispatcher = CallbackDispatcher(receiver.url, {}, senders=1, flush_interval=0.2, max_queue=2)
+        for test_id, status in [("TC_001", "Not Started"), ("TC_002", "Not Started"), ("TC_003", "Passed"),
+                                ("TC_004", "Failed"), ("TC_005", "Running"), ("TC_006", "Passed")]:
+            dispatcher.submit(result_entry(test_id, status))
+        dispatcher.close()
+    # Intermediate statuses made room or were dropped; TC_006 waited for the first batch
+    assert sorted((r["id"], r["status"]) for r in receiver.results) == [
+        ("TC_003", "Passed"), ("TC_004", "Failed"), ("TC_006", "Passed")]
+    assert (dispatcher.stats.dropped, dispatcher.stats.blocked) == (3, 1)
+
+
+def test_dispatcher_latency_samples_are_bounded():
+    stats = DispatchStats(max_samples=50)
+    for ms in range(1, 2001):
+        stats.record_request(ms / 1000)
+    assert (stats.requests, len(stats.latencies)) == (2000, 50)
+    # A uniform sample of the whole run, not its first 50 requests
+    assert max(stats.latencies) > 0.05
+    fields = stats.as_dict()
+    assert fields["latencyMaxMs"] == 2000.0 and len(fields["latencySamplesMs"]) == 50
+    # Merged workers are weighted by the requests their samples stand for
+    merged = merge_latency_samples([(1000, [1.0] * 50), (10, [900.0] * 50)], limit=50)
+    assert merged == [1.0] * 50
+
+
+def test_results_log_repairs_a_torn_last_line(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    log = ResultsLog(path)
+    log.reset()
+    log.begin("REQ-001", "req-1", ["TC_001", "TC_002"])
+    log.status("TC_001", "Passed", 1.5)
+    log.close()
+    with open(path, "a") as f:
+        f.write('{"event":"status","id":"TC_002","sta')
+    log = ResultsLog(path)
+    log.status("TC_002", "Failed", 2.0)
+    log.close()
+
+    events = [event for _, event in iter_events(path)]
+    assert [event.get("id") for event in events] == [None, "TC_001", "TC_002"]
+    assert finished_ids(path) == {"TC_001", "TC_002"}
+
+
+def test_compact_writes_latest_status_in_dispatch_order(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    log = ResultsLog(path)
+    log.reset()
+    log.begin("REQ-001", "req-1", ["TC_003", "TC_001", "TC_002"])
+    log.status("TC_001", "Running")
+    log.status("TC_003", "Failed", 3)
+    log.status("TC_001", "Passed", 1, raw_output="ok")
+    log.close()
+
+    results_path = str(tmp_path / "current_results.json")
+    summary = compact(path, results_path, copy_to=str(tmp_path / "copy.json"),
+                      summary_path=str(tmp_path / "summary.json"))
+    with open(results_path) as f:
+        document = json.load(f)
+    assert (document["requirementId"], document["requestId"]) == ("REQ-001", "req-1")
+    assert [(r["id"], r["status"]) for r in document["results"]] == [
+        ("TC_003", "Failed"), ("TC_001", "Passed"), ("TC_002", "Not Started")]
+    assert document["results"][1]["rawOutput"] == "ok"
+    assert summary["statusSummary"] == {"Failed": 1, "Passed": 1, "Not Started": 1}
+    with open(tmp_path / "copy.json") as f:
+        assert json.load(f) == document
+
+
+def test_compact_of_an_empty_log_is_valid_json(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    ResultsLog(path).reset()
+    compact(path, str(tmp_path / "current_results.json"))
+    with open(tmp_path / "current_results.json") as f:
+        assert json.load(f)["results"] == []
+    assert LogIndex(path).order == []
+
+
+def test_skipped_is_a_final_status(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    log = ResultsLog(path)
+    log.reset()
+    log.begin("REQ-001", "req-1", ["TC_001", "TC_002"])
+    log.status("TC_001", "Skipped")
+    log.status("TC_002", "Running")
+    log.close()
+    assert finished_ids(path) == {"TC_001"}
+
+
+def test_summary_counts_webhooks_from_the_dispatcher_stats(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    log = ResultsLog(path)
+    log.reset()
+    log.begin("REQ-001", "req-1", ["TC_001", "TC_002", "TC_003", "TC_004"])
+    log.close()
+    index = LogIndex(path)
+    assert "webhooksPerTest" not in build_summary(index)
+    summary = build_summary(index, callback_stats={"sent": 6, "latencySamplesMs": [1.0]})
+    assert (summary["webhooksPerTest"], summary["totalWebhooks"]) == (1.5, 6)
+    assert summary["callbacks"] == {"sent": 6}
+
+
+def test_callback_stats_merge_tolerates_missing_keys_and_recomputes_percentiles(tmp_path):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    first.write_text(json.dumps({"sent": 3, "maxQueueDepth": 2, "latencyP50Ms": 10.0, "latencyP95Ms": 10.0,
+                                 "latencyMaxMs": 10.0, "latencySamplesMs": [10.0] * 10}))
+    second.write_text(json.dumps({"sent": 2, "retries": 1, "maxQueueDepth": 5, "latencyP50Ms": 100.0,
+                                  "latencyP95Ms": 100.0, "latencyMaxMs": 250.0, "latencySamplesMs": [100.0] * 2}))
+    stats = load_callback_stats([str(first), str(second), str(tmp_path / "missing.json")])
+    assert (stats["sent"], stats["retries"], stats["maxQueueDepth"]) == (5, 1, 5)
+    # 10 fast samples and 2 slow ones: the median is fast, not the max of the medians
+    assert (stats["latencyP50Ms"], stats["latencyP95Ms"], stats["latencyMaxMs"]) == (10.0, 100.0, 250.0)
+    assert len(stats["latencySamplesMs"]) == 12
+    assert load_callback_stats([str(tmp_path / "missing.json")]) is None
+
+
+def _write_catalog(path, elements):
+    # Indented and non-ASCII, so byte offsets and character positions differ
+    path.write_text("\ufeff" + json.dumps(elements, indent=2, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_iter_array_offsets_read_back_each_element_across_chunks(tmp_path):
+    elements = [{"id": f"TC_{n:03d}", "name": "Prüfung ✓ " * n} for n in range(1, 40)]
+    path = _write_catalog(tmp_path / "cases.json", elements)
+    found = list(iter_array(path, chunk_size=64))
+    assert [element for _, _, element in found] == elements
+    with open(path, "rb") as f:
+        raw = f.read()
+    for offset, length, element in found:
+        assert json.loads(raw[offset:offset + length]) == element
+
+
+def test_iter_array_rejects_non_arrays(tmp_path):
+    (tmp_path / "object.json").write_text('{"id": 1}')
+    with pytest.raises(ValueError):
+        list(iter_array(str(tmp_path / "object.json")))
+    (tmp_path / "open.json").write_text('[{"id": 1}, ')
+    with pytest.raises(ValueError):
+        list(iter_array(str(tmp_path / "open.json")))
+
+
+def test_test_case_records_load_text_fields_lazily(tmp_path):
+    path = _write_catalog(tmp_path / "cases.json", [
+        {"id": "TC_001", "name": "Search", "tags": ["smoke"], "description": "Finds ✓ phones",
+         "steps": ["open", "search"], "custom": 7},
+        {"id": "TC_002", "name": "Cart"},
+    ])
+    first, second = iter_test_cases(path)
+    assert first.tags == ("smoke",)
+    assert first["custom"] == 7
+    assert first.description == "Finds ✓ phones"
+    assert first["steps"] == ["open", "search"]
+    assert "expectedResult" not in first
+    assert first.to_dict()["name"] == "Search"
+    assert second.get("description") is None and "description" not in second.keys()
+
+    _write_catalog(tmp_path / "cases.json", [{"id": "TC_009", "name": "Moved", "description": "x"}])
+    with pytest.raises(RuntimeError):
+        first.description
+
+
+def test_normalize_spellings_of_a_tc_id():
+    assert {normalize(spelling) for spelling in ("TC-7", "tc_007", "TC007", " TC_7 ")} == {"TC_007"}
+    assert normalize("tc-bench") == "TC_BENCH"
+
+
+def test_find_ids_in_names_and_docstrings():
+    assert find_ids("test_remove_from_wishlistTC_006") == ["TC_006"]
+    assert find_ids("[TC-2] and TC_002 again, then TC-10") == ["TC_002", "TC_010"]
+    assert find_ids("test_BATCH_upload TC_BENCH") == ["TC_BENCH"]
+    assert find_ids("etc 5") == [] and find_ids(None) == []
+
+
+SAMPLE_TESTS = '''
+def helper_TC_001():
+    pass
+
+def test_plain_TC_002():
+    """[TC-002] docstring agrees"""
+
+class TestShop:
+    def test_cart_TC_003(self):
+        """[TC-004] docstring disagrees"""
+
+class TestWithInit:
+    def __init__(self):
+        pass
+
+    def test_hidden_TC_005(self):
+        pass
+
+class TestTagged_TC_006:
+    async def test_any(self):
+        pass
+'''
+
+
+def test_scan_source_maps_collected_tests_only():
+    assert scan_source(SAMPLE_TESTS) == [
+        ["test_plain_TC_002", ["TC_002"], 5, False],
+        ["TestShop::test_cart_TC_003", ["TC_003", "TC_004"], 9, True],
+        ["TestTagged_TC_006::test_any", ["TC_006"], 20, False],
+    ]
+
+
+def test_build_index_selects_node_ids_and_reuses_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "t").mkdir()
+    (tmp_path / "t" / "test_sample.py").write_text(SAMPLE_TESTS)
+    (tmp_path / "t" / "helpers.py").write_text("def test_not_collected_TC_002(): pass\n")
+    cache = str(tmp_path / "cache.json")
+
+    index = build_index("t", cache)
+    assert index.select(["tc-3", "TC_002", "TC_099"]) == (
+        ["t/test_sample.py::TestShop::test_cart_TC_003", "t/test_sample.py::test_plain_TC_002"], ["TC_099"])
+    assert index.test_ids("t/test_sample.py::test_plain_TC_002[param]") == ["TC_002"]
+    assert index.conflicts == ["t/test_sample.py::TestShop::test_cart_TC_003"]
+
+    with open(cache) as f:
+        assert len(json.load(f)["files"]) == 1
+    monkeypatch.setattr("quality_tracker.tc_index.scan_source", None)
+    assert build_index("t", cache).nodes == index.nodes
+
+
+def _shard_log(directory, request_id, test_ids, statuses):
+    log = ResultsLog(str(directory / "results.jsonl"))
+    log.reset()
+    log.begin("REQ-001", request_id, test_ids)
+    for test_id, status, timestamp in statuses:
+        log.append({"event": "status", "id": test_id, "status": status, "duration": 1, "timestamp": timestamp})
+    log.close()
+    return str(directory)
+
+
+def test_merge_logs_keeps_one_status_per_id_and_skips_other_requests(tmp_path, capsys):
+    for name in ("shard-0", "shard-0-rerun", "shard-1", "stale"):
+        (tmp_path / name).mkdir()
+    shard_dirs = [
+        _shard_log(tmp_path / "shard-0", "req-1", ["TC_001", "TC_002"],
+                   [("TC_001", "Failed", "2026-01-01T10:00:00Z"), ("TC_002", "Running", "2026-01-01T10:00:01Z")]),
+        # The same shard run again: its later final status wins
+        _shard_log(tmp_path / "shard-0-rerun", "req-1", ["TC_001", "TC_002"],
+                   [("TC_001", "Passed", "2026-01-01T11:00:00Z"), ("TC_002", "Skipped", "2026-01-01T11:00:01Z")]),
+        _shard_log(tmp_path / "shard-1", "req-1", ["TC_003"], []),
+        _shard_log(tmp_path / "stale", "req-0", ["TC_001", "TC_004"],
+                   [("TC_001", "Failed", "2026-01-01T12:00:00Z"), ("TC_004", "Passed", "2026-01-01T12:00:00Z")]),
+    ]
+    output = str(tmp_path / "merged.jsonl")
+    plan = {"requestId": "req-1", "requirementId": "REQ-001", "testCases": ["TC_003", "TC_002", "TC_001"]}
+
+    order, shards, duplicates = merge_logs(shard_dirs, output, plan)
+
+    assert order == ["TC_003", "TC_002", "TC_001"]
+    # TC_001 was finished by both runs of shard 0; the stale request does not count
+    assert duplicates == 1
+    assert shards == {shard_dirs[0]: {}, shard_dirs[1]: {"Skipped": 1, "Passed": 1}, shard_dirs[2]: {}}
+    assert "Skipping" in capsys.readouterr().out
+    index = LogIndex(output)
+    assert index.request_id == "req-1"
+    assert index.statuses == {"TC_002": "Skipped", "TC_001": "Passed"}
+
+
+def test_merge_logs_counts_ids_finished_by_several_shards(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    shard_dirs = [
+        _shard_log(tmp_path / "a", "req-1", ["TC_001"], [("TC_001", "Failed", "2026-01-01T10:00:00Z")]),
+        _shard_log(tmp_path / "b", "req-1", ["TC_001"], [("TC_001", "Passed", "2026-01-01T10:00:05Z")]),
+    ]
+    order, _, duplicates = merge_logs(shard_dirs, str(tmp_path / "merged.jsonl"))
+    assert (order, duplicates) == (["TC_001"], 1)
+    assert LogIndex(str(tmp_path / "merged.jsonl")).statuses == {"TC_001": "Passed"}
+
+
+def _traceback(frames):
+    return "".join(f'  File "tests/test_user.py", line {n}, in step_{n}\n    do_step({n})\n' for n in range(frames))
+
+
+def test_chunks_are_line_aligned_bounded_and_shared_by_repeated_text():
+    shared = _traceback(400).encode()
+    first = chunk(b"header one\n" * 50 + shared)
+    second = chunk(b"another header\n" * 70 + shared)
+    assert b"".join(first) == b"header one\n" * 50 + shared
+    assert all(len(piece) <= 16384 for piece in first)
+    assert all(piece.endswith(b"\n") for piece in first)
+    assert len(set(first) & set(second)) >= len(first) - 3
+
+
+def test_artifact_round_trip_through_a_bundle(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    trace = _traceback(200)
+    results = [
+        {"id": "TC_001", "status": "Failed", "rawOutput": "short", "failure": {"stackTrace": trace}},
+        {"id": "TC_002", "status": "Failed", "rawOutput": "log\n" * 300 + trace,
+         "junitXml": {"content": "<testsuite/>"}},
+    ]
+    original = json.loads(json.dumps(results))
+    document = {"results": [externalize(result, store) for result in results]}
+    assert document["results"][0]["rawOutput"] == "short"
+    assert document["results"][1]["junitXml"]["content"] == "<testsuite/>"
+    assert set(document["results"][0]["failure"]["stackTrace"]) == {"artifact", "size", "chunks"}
+    assert store.new_bytes < store.logical_bytes
+
+    bundle = str(tmp_path / "artifacts.qtb")
+    bundle_store(store, bundle)
+    results_path = tmp_path / "current_results.json"
+    results_path.write_text(json.dumps(document))
+    count, refs, problems = verify(bundle, [str(results_path)])
+    assert (refs, problems) == (2, []) and count == len(list(store.keys()))
+    assert expand(document, read_bundle(bundle))["results"] == original
+
+
+def test_verify_reports_missing_and_corrupt_chunks(tmp_path):
+    store = ArtifactStore(str(tmp_path / "store"))
+    ref = store.put(_traceback(100))
+    bundle = str(tmp_path / "artifacts.qtb")
+    bundle_store(store, bundle)
+    document = tmp_path / "doc.json"
+    document.write_text(json.dumps({"rawOutput": dict(ref, chunks=ref["chunks"] + ["0" * 32])}))
+    _, _, problems = verify(bundle, [str(document)])
+    assert problems and "misses 1 chunks" in problems[0]
+    with pytest.raises(ValueError):
+        expand({"rawOutput": dict(ref, size=ref["size"] + 1)}, read_bundle(bundle))
@@ -0,0 +1,53 @@
+"""Unit tests of the benchmark comparison (quality_tracker.bench compare), no browser needed."""
+
+import json
+
+import pytest
+
+from quality_tracker.bench import compare, main
+
+
+def _results(**benchmarks):
+    return {"quick": False, "benchmarks": benchmarks}
+
+
+BASELINE = _results(
+    catalog={"x100": {"loadSeconds": 2.0, "peakBytes": 1000, "testCases": 500}},
+    callback_dispatch={"updatesPerSecond": 400.0, "p95LatencySeconds": 0.0},
+)
+
+
+def test_regressions_follow_the_direction_in_the_metric_name():
+    current = _results(
+        catalog={"x100": {"loadSeconds": 2.6, "peakBytes": 1100, "testCases": 5000}},
+        callback_dispatch={"updatesPerSecond": 300.0, "p95LatencySeconds": 0.5},
+    )
+    assert compare(BASELINE, current, threshold=0.2) == [
+        ("catalog.x100.loadSeconds", 2.0, 2.6, pytest.approx(0.3)),
+        ("callback_dispatch.updatesPerSecond", 400.0, 300.0, -0.25),
+    ]
+    # peakBytes is 10% worse; testCases only describes the workload; a zero
+    # baseline has no relative change to judge
+    assert [metric for metric, *_ in compare(BASELINE, current, threshold=0.05)] == [
+        "catalog.x100.loadSeconds", "catalog.x100.peakBytes", "callback_dispatch.updatesPerSecond"]
+
+
+def test_improvements_new_metrics_and_changes_at_the_threshold_pass():
+    current = _results(
+        catalog={"x100": {"loadSeconds": 1.0, "peakBytes": 1200, "parseSeconds": 9.0}},
+        callback_dispatch={"updatesPerSecond": 800.0},
+    )
+    assert compare(BASELINE, current, threshold=0.2) == []
+    assert compare(BASELINE, _results(catalog={"x100": {"loadSeconds": 2.5}}), threshold=0.25) == []
+    assert compare(BASELINE, _results(), threshold=0.0) == []
+
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(BASELINE))
+    current.write_text(json.dumps(_results(catalog={"x100": {"loadSeconds": 3.0}})))
+    assert main(["compare", str(baseline), str(current), "--threshold", "0.6"]) == 0
+    assert "No regressions above 60%" in capsys.readouterr().out
+    assert main(["compare", str(baseline), str(current)]) == 1
+    out = capsys.readouterr().out
+    assert "1 regressions above 20%" in out and "catalog.x100.loadSeconds" in out and "(+50%)" in out
@@ -0,0 +1,116 @@
+"""Unit tests of the warm browser pool (quality_tracker.browser_pool), with a fake driver."""
+
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from quality_tracker import browser_pool
+from quality_tracker.browser_pool import BrowserPool
+
+START_URL = "https://shop.test/"
+
+
+class FakeDriver:
+    """Tabs, cookies, storage and the URL, as far as a reset touches them."""
+
+    def __init__(self, number):
+        self.number = number
+        self.window_handles = ["main"]
+        self.current = "main"
+        self.cookies = {}
+        self.storage = {}
+        self.url = "data:,"
+        self.quit_called = False
+        self.dead = False
+        self.switch_to = SimpleNamespace(window=self._switch)
+
+    def _switch(self, handle):
+        if self.dead:
+            raise RuntimeError("invalid session id")
+        self.current = handle
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def get(self, url):
+        self.url = url
+
+    def execute_script(self, script):
+        assert script == browser_pool._CLEAR_STORAGE_JS
+        self.storage.clear()
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def launched():
+    return []
+
+
+@pytest.fixture
+def pool(launched):
+    numbers = itertools.count(1)
+
+    def factory():
+        launched.append(FakeDriver(next(numbers)))
+        return launched[-1]
+
+    return BrowserPool(factory, start_url=START_URL, size=1, name="storefront")
+
+
+def test_a_released_browser_is_reset_and_reused(pool, launched):
+    with pool.lease() as driver:
+        driver.window_handles.append("popup")
+        driver.cookies["OCSESSID"] = "abc"
+        driver.storage["wishlist"] = "[40]"
+        driver.url = f"{START_URL}index.php?route=checkout/cart"
+    with pool.lease() as again:
+        assert again is driver
+        assert (again.window_handles, again.current) == (["main"], "main")
+        assert again.cookies == {} and again.storage == {}
+        assert again.url == START_URL
+    assert len(launched) == 1 and not driver.quit_called
+    assert (pool.stats.hits, pool.stats.misses, pool.stats.resets) == (1, 1, 2)
+
+
+def test_fresh_leases_get_their_own_browser_and_quit_it(pool, launched):
+    with pool.lease() as pooled:
+        pass
+    with pool.lease(fresh=True) as fresh:
+        assert fresh is not pooled
+    assert fresh.quit_called and not pooled.quit_called
+    assert pool.stats.fresh == 1
+    # The pooled browser is still there for the next lease
+    with pool.lease() as driver:
+        assert driver is pooled
+
+
+def test_browsers_beyond_the_pool_size_or_broken_ones_are_quit(pool, launched):
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert second.quit_called and not first.quit_called
+    assert pool.stats.discarded == 1
+
+    broken = pool.acquire()
+    assert broken is first
+    broken.window_handles.append("popup")
+    broken.dead = True
+    pool.release(broken)
+    assert broken.quit_called and pool.stats.discarded == 2
+    # Nothing is idle any more, so the next lease launches
+    assert pool.acquire() is launched[-1] and len(launched) == 3
+
+
+def test_close_quits_the_idle_browsers(pool, launched):
+    with pool.lease():
+        pass
+    pool.close()
+    assert [driver.quit_called for driver in launched] == [True]
+    assert "storefront: 0 hits, 1 misses, 0 fresh, 0 discarded" in pool.summary_line()
@@ -0,0 +1,93 @@
+"""Unit tests of the WebDriver command counter (quality_tracker.commands), with a fake driver."""
+
+import json
+import xml.etree.ElementTree as ET
+
+from quality_tracker import commands, tracing
+from quality_tracker.commands import CommandCounter, instrument
+
+pytest_plugins = ["pytester"]
+
+
+class FakeDriver:
+    def __init__(self):
+        self.sent = []
+
+    def execute(self, driver_command, params=None):
+        self.sent.append((driver_command, params))
+        return {"value": driver_command}
+
+
+def test_commands_are_counted_only_while_a_counter_is_active(monkeypatch):
+    driver = instrument(FakeDriver())
+    assert instrument(driver) is driver
+    driver.execute("get", {"url": "https://shop.test/"})
+
+    counter = CommandCounter()
+    monkeypatch.setattr(commands, "_counter", counter)
+    assert driver.execute("findElement", {"using": "css selector"}) == {"value": "findElement"}
+    driver.execute("findElement")
+    driver.execute("clickElement")
+    assert counter.commands == {"findElement": 2, "clickElement": 1}
+    assert counter.total == 3
+    # Instrumenting twice does not count twice, and every command still reaches the driver
+    assert len(driver.sent) == 4
+
+
+def test_commands_are_spans_when_tracing(monkeypatch):
+    tracer = tracing.Tracer()
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    driver = instrument(FakeDriver())
+    driver.execute("get", {"url": "https://shop.test/"})
+    driver.execute("executeScript")
+    assert [(event["name"], event["cat"]) for event in tracer.events] == [
+        ("get", "navigation"), ("executeScript", "webdriver")]
+
+
+def test_command_report_attributes_commands_to_each_test(pytester, monkeypatch):
+    report_path = pytester.path / "commands.json"
+    monkeypatch.setenv("QT_COMMAND_REPORT", str(report_path))
+    pytester.makeconftest("""
+        import pytest
+
+        from quality_tracker.commands import CommandReport, instrument
+
+
+        class Driver:
+            def execute(self, driver_command, params=None):
+                return None
+
+
+        def pytest_configure(config):
+            config.pluginmanager.register(CommandReport(), "commands")
+
+
+        @pytest.fixture
+        def driver():
+            driver = instrument(Driver())
+            # Setup commands are not the test's
+            driver.execute("newSession")
+            return driver
+    """)
+    pytester.makepyfile("""
+        def test_search(driver):
+            for _ in range(3):
+                driver.execute("findElement")
+            driver.execute("get")
+
+
+        def test_nothing(driver):
+            pass
+    """)
+    result = pytester.runpytest("-p", "no:cacheprovider", "--junit-xml=junit.xml")
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["*webdriver commands*", "4 commands in 1 tests; most used: findElement 3, get 1"])
+
+    with open(report_path) as f:
+        tests = json.load(f)
+    assert tests["test_command_report_attributes_commands_to_each_test.py::test_search"] == {
+        "total": 4, "commands": {"findElement": 3, "get": 1}}
+    assert tests["test_command_report_attributes_commands_to_each_test.py::test_nothing"]["total"] == 0
+    properties = {case.get("name"): [p.get("value") for p in case.iter("property")]
+                  for case in ET.parse(str(pytester.path / "junit.xml")).getroot().iter("testcase")}
+    assert properties == {"test_search": ["4"], "test_nothing": ["0"]}
@@ -0,0 +1,134 @@
+"""Unit tests of shared browser contexts (quality_tracker.contexts), with a fake driver."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from quality_tracker.contexts import ContextPool, refusal
+
+
+class FakeItem:
+    def __init__(self, nodeid="tests/test_user.py::test_search", **markers):
+        self.nodeid = nodeid
+        self.markers = markers
+
+    def get_closest_marker(self, name):
+        if name not in self.markers:
+            return None
+        return SimpleNamespace(args=self.markers[name])
+
+
+class FakeHost:
+    """A Chrome that answers the CDP commands ContextPool sends."""
+
+    def __init__(self, contexts=True):
+        self.contexts = contexts
+        self.commands = []
+        self.created = 0
+        self.window_handles = ["home"]
+        self.current_window_handle = "home"
+        self.switch_to = SimpleNamespace(window=self._switch)
+
+    def _switch(self, handle):
+        self.current_window_handle = handle
+
+    def get_window_size(self):
+        return {"width": 1920, "height": 1080}
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+        if command == "Target.createBrowserContext":
+            if not self.contexts:
+                raise RuntimeError("unknown command: Target.createBrowserContext\nmore detail")
+            self.created += 1
+            return {"browserContextId": f"context-{self.created}"}
+        if command == "Target.createTarget":
+            target_id = f"T{len(self.commands)}"
+            self.window_handles.append(f"CDwindow-{target_id}")
+            return {"targetId": target_id}
+        if command == "Performance.getMetrics":
+            return {"metrics": [{"name": "JSHeapUsedSize", "value": 2097152.0}, {"name": "Nodes", "value": 800}]}
+        return {}
+
+    def quit(self):
+        pass
+
+
+class FakePool:
+    """Stands in for BrowserPool and counts its leases."""
+
+    def __init__(self):
+        self.driver = object()
+        self.leases = []
+
+    @contextmanager
+    def lease(self, fresh=False):
+        self.leases.append(fresh)
+        yield self.driver
+
+
+def test_refusal_reasons():
+    assert refusal(FakeItem(shared_browser=())) is None
+    assert refusal(FakeItem()) == "not marked shared_browser"
+    assert refusal(FakeItem(shared_browser=(), fresh_browser=())) == "fresh_browser"
+    assert refusal(FakeItem(shared_browser=(), session=("customer",))) == "logged-in session"
+    # session(None) opts a test out of a class-level login again
+    assert refusal(FakeItem(shared_browser=(), session=(None,))) is None
+
+
+def test_a_shared_test_runs_in_a_context_that_is_disposed_after_it():
+    host = FakeHost()
+    contexts = ContextPool(lambda: host, start_url="https://shop.test/", enabled=True)
+    fallback = FakePool()
+    for _ in range(2):
+        with contexts.lease(FakeItem(shared_browser=()), fallback) as driver:
+            assert driver is host
+            assert host.current_window_handle == host.window_handles[-1]
+        assert host.current_window_handle == "home"
+    assert fallback.leases == []
+    created = [params for command, params in host.commands if command == "Target.createTarget"]
+    assert created[0] == {"url": "https://shop.test/", "browserContextId": "context-1", "newWindow": True,
+                          "width": 1920, "height": 1080}
+    disposed = [params["browserContextId"] for command, params in host.commands
+                if command == "Target.disposeBrowserContext"]
+    assert disposed == ["context-1", "context-2"]
+    assert [record["jsHeapBytes"] for record in contexts.stats.contexts] == [2097152, 2097152]
+    assert "2 tests in contexts" in contexts.summary_line()
+
+
+def test_other_tests_lease_a_dedicated_browser():
+    contexts = ContextPool(FakeHost, enabled=True)
+    fallback = FakePool()
+    with contexts.lease(FakeItem(), fallback) as driver:
+        assert driver is fallback.driver
+    with contexts.lease(FakeItem(shared_browser=(), fresh_browser=()), fallback, fresh=True):
+        pass
+    assert fallback.leases == [False, True]
+    assert contexts.host is None
+    assert dict(contexts.stats.dedicated) == {"not marked shared_browser": 1, "fresh_browser": 1}
+
+
+def test_a_browser_without_contexts_falls_back_once_and_for_good():
+    launched = []
+
+    def factory():
+        launched.append(FakeHost(contexts=False))
+        return launched[-1]
+
+    contexts = ContextPool(factory, enabled=True)
+    fallback = FakePool()
+    for _ in range(3):
+        with contexts.lease(FakeItem(shared_browser=()), fallback) as driver:
+            assert driver is fallback.driver
+    assert len(launched) == 1 and len(launched[0].commands) == 1
+    assert dict(contexts.stats.dedicated) == {"no contexts: unknown command: Target.createBrowserContext": 3}
+
+
+def test_disabled_pool_never_starts_a_host():
+    contexts = ContextPool(lambda: pytest.fail("host started"), enabled=False)
+    fallback = FakePool()
+    with contexts.lease(FakeItem(shared_browser=()), fallback):
+        pass
+    assert fallback.leases == [False]
+    assert not contexts.stats.dedicated
@@ -0,0 +1,103 @@
+"""Unit tests of the incremental coverage matrix (quality_tracker.coverage), no browser needed."""
+
+import json
+
+import numpy as np
+import pytest
+
+from quality_tracker.coverage import STATUS_CODES, CoverageMatrix
+from quality_tracker.results_store import ResultsLog
+from quality_tracker.traceability import load_index
+
+OWNERS = ("Authentication Team", "Checkout Team", "Admin Team")
+STATUSES = ("Passed", "Failed", "Not Found", "Skipped", "Running")
+
+
+@pytest.fixture
+def index(tmp_path):
+    rng = np.random.default_rng(20)
+    requirements = [
+        {"id": f"REQ-{r:03d}", "priority": ("High", "Medium", "Low")[r % 3], "owner": OWNERS[r % 3],
+         "versions": ["v1.0"] + (["v1.1"] if r % 2 else []), "tags": [f"tag{t}" for t in range(r % 4)]}
+        for r in range(1, 13)
+    ]
+    test_cases = [
+        # Some test cases cover nothing, some cover a requirement that does not exist
+        {"id": f"TC_{t:03d}", "requirementIds": sorted({f"REQ-{r:03d}" for r in rng.integers(1, 15, t % 4)})}
+        for t in range(1, 41)
+    ]
+    (tmp_path / "requirements.json").write_text(json.dumps(requirements))
+    (tmp_path / "test-cases.json").write_text(json.dumps(test_cases))
+    return load_index(str(tmp_path / "requirements.json"), str(tmp_path / "test-cases.json"), cache_dir=None)
+
+
+def _rebuilt(index, matrix):
+    fresh = CoverageMatrix(index)
+    fresh.status[:] = matrix.status
+    fresh._recount()
+    return fresh
+
+
+def test_incremental_counts_match_a_full_rebuild(index):
+    matrix = CoverageMatrix(index)
+    rng = np.random.default_rng(3)
+    for step in range(300):
+        tc_id = f"TC_{rng.integers(1, 45):03d}"
+        status = STATUSES[rng.integers(len(STATUSES))]
+        known = tc_id in index.test_cases and status in STATUS_CODES
+        assert matrix.update(tc_id, status) == known
+        if step % 50 == 0:
+            np.testing.assert_array_equal(matrix.counts, _rebuilt(index, matrix).counts)
+    np.testing.assert_array_equal(matrix.counts, _rebuilt(index, matrix).counts)
+
+    # Every requirement's row counts exactly its own cells by status
+    for row in matrix.requirement_rows():
+        cells = matrix.cells(row["id"])
+        assert row["testCases"] == len(cells)
+        assert row["passed"] == sum(status == "passed" for status in cells.values())
+        assert row["notRun"] == sum(status == "notRun" for status in cells.values())
+    # A group row is the sum of its requirements' rows
+    owners = matrix.group_rows("owner")
+    for owner in OWNERS:
+        rows = [row for row in matrix.requirement_rows() if row["owner"] == owner]
+        assert owners[owner]["cells"] == sum(row["testCases"] for row in rows)
+        assert owners[owner]["failed"] == sum(row["failed"] for row in rows)
+
+
+def test_rates_and_query(index):
+    matrix = CoverageMatrix(index)
+    covered = index.test_cases_for("REQ-001")
+    assert len(covered) >= 2
+    matrix.update(covered[0], "Passed")
+    matrix.update(covered[1], "Failed")
+    [row] = matrix.requirement_rows(["REQ-001"])
+    assert row["coverage"] == pytest.approx(round(2 / len(covered), 4))
+    assert row["passRate"] == pytest.approx(round(1 / len(covered), 4))
+    assert "REQ-001" in matrix.query(priority="Medium", below=0.9)
+    assert "REQ-001" not in matrix.query(priority="High", below=0.9)
+    # Requirements without test cases have no rates to be below anything
+    empty = [row["id"] for row in matrix.requirement_rows() if row["testCases"] == 0]
+    assert not set(empty) & set(matrix.query(below=1.0))
+
+
+def test_state_round_trip_and_log_replay(index, tmp_path):
+    log = ResultsLog(str(tmp_path / "results.jsonl"))
+    log.reset()
+    log.begin("REQ-001", "request-1", ["TC_001", "TC_002", "TC_404"])
+    log.status("TC_001", "Running")
+    log.status("TC_001", "Failed")
+    log.status("TC_002", "Passed")
+    log.status("TC_404", "Passed")
+    log.status("TC_001", "Passed")
+    log.close()
+
+    matrix = CoverageMatrix(index)
+    assert matrix.apply_log(log.path) == 3
+    state = str(tmp_path / "state" / "coverage.npz")
+    matrix.save(state)
+
+    restored = CoverageMatrix(index)
+    assert restored.load(state) == 2
+    assert restored.status.tolist() == matrix.status.tolist()
+    np.testing.assert_array_equal(restored.counts, matrix.counts)
+    assert CoverageMatrix(index).load(str(tmp_path / "missing.npz")) == 0
@@ -0,0 +1,115 @@
+"""Unit tests of the failure evidence capture (quality_tracker.evidence), with a fake driver."""
+
+import base64
+import json
+import pathlib
+import threading
+from types import SimpleNamespace
+
+from quality_tracker.capture import log_suffix
+from quality_tracker.evidence import EvidenceCapture, grab
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(200))
+
+
+class FakeDriver:
+    def __init__(self, broken=False):
+        self.broken = broken
+
+    def get_screenshot_as_base64(self):
+        if self.broken:
+            raise RuntimeError("chrome not reachable\n  (Session info: chrome=120)")
+        return base64.b64encode(PNG).decode()
+
+    def execute_script(self, script):
+        return ["https://shop.test/index.php?route=checkout/cart", "<html>" + "cart " * 500 + "</html>"]
+
+    def get_log(self, kind):
+        return [{"level": "SEVERE", "message": "cart.js 404"}]
+
+
+class FakeItem:
+    def __init__(self, name, **funcargs):
+        self.nodeid = f"tests/test_user.py::{name}"
+        self.funcargs = funcargs
+        self.sections = []
+
+    def add_report_section(self, when, key, content):
+        self.sections.append(content)
+
+
+def _fail(plugin, item, when="call"):
+    """Drive the makereport wrapper as pytest would for a failed phase."""
+    report = SimpleNamespace(failed=True, when=when, user_properties=[])
+    wrapper = plugin.pytest_runtest_makereport(item, None)
+    next(wrapper)
+    try:
+        wrapper.send(SimpleNamespace(get_result=lambda: report))
+    except StopIteration:
+        pass
+    return report
+
+
+def _index(directory):
+    with open(directory / "index.json") as f:
+        return json.load(f)
+
+
+def test_grab_records_what_failed_instead_of_raising():
+    evidence = grab(FakeDriver(broken=True))
+    assert evidence["errors"] == {"screenshot": "chrome not reachable"}
+    assert evidence["url"].endswith("checkout/cart") and evidence["console"][0]["level"] == "SEVERE"
+
+
+def test_a_failure_is_written_in_the_background(tmp_path):
+    plugin = EvidenceCapture(str(tmp_path))
+    item = FakeItem("test_cart", browser=FakeDriver(), product="not a driver")
+    report = _fail(plugin, item)
+    # Teardown failures are not captured
+    _fail(plugin, FakeItem("test_other", browser=FakeDriver()), when="teardown")
+    plugin.pytest_sessionfinish()
+
+    [entry] = _index(tmp_path)["captures"]
+    assert entry["files"] == ["browser-screenshot.png", f"browser-page.html{log_suffix()}", "browser-meta.json"]
+    directory = pathlib.Path(entry["directory"])
+    assert directory.parent == tmp_path
+    assert (directory / "browser-screenshot.png").read_bytes() == PNG
+    with open(directory / "browser-meta.json") as f:
+        assert json.load(f)["console"] == [{"level": "SEVERE", "message": "cart.js 404"}]
+    assert [name for name, _ in report.user_properties] == ["evidenceCaptureSeconds"]
+    assert item.sections[0].startswith(f"evidence in {entry['directory']}")
+
+
+def test_a_full_queue_drops_captures_instead_of_waiting(tmp_path):
+    plugin = EvidenceCapture(str(tmp_path), workers=1, queue_size=1)
+    gate = threading.Event()
+    write_file = plugin._write_file
+
+    def blocked_write_file(*args):
+        gate.wait(5)
+        write_file(*args)
+
+    plugin._write_file = blocked_write_file
+    first, second = FakeItem("test_first", browser=FakeDriver()), FakeItem("test_second", browser=FakeDriver())
+    _fail(plugin, first)
+    _fail(plugin, second)
+    assert second.sections == ["evidence dropped: capture queue full\n"]
+    gate.set()
+    plugin.pytest_sessionfinish()
+
+    index = _index(tmp_path)
+    assert [entry["nodeid"] for entry in index["captures"]] == [first.nodeid]
+    assert (index["stats"]["captures"], index["stats"]["dropped"]) == (2, 1)
+
+
+def test_files_over_the_disk_limit_are_skipped(tmp_path):
+    plugin = EvidenceCapture(str(tmp_path), max_bytes=len(PNG) + 10, workers=1)
+    _fail(plugin, FakeItem("test_cart", browser=FakeDriver()))
+    _fail(plugin, FakeItem("test_wishlist", browser=FakeDriver()))
+    plugin.pytest_sessionfinish()
+
+    index = _index(tmp_path)
+    assert [entry["files"] for entry in index["captures"]] == [["browser-screenshot.png"], []]
+    assert index["stats"]["bytesWritten"] == len(PNG)
+    assert index["stats"]["filesOverCap"] == 5
+    assert "(5 files over the cap)" in plugin.summary_line()
@@ -0,0 +1,137 @@
+"""Unit tests of the duration history (quality_tracker.history), no browser needed."""
+
+import json
+import signal
+import statistics
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from quality_tracker import history as history_module
+from quality_tracker.catalog import ESTIMATE_UNIT_SECONDS
+from quality_tracker.history import EWMA_ALPHA, MAX_SAMPLES, MIN_TIMEOUT, TIMEOUT_FACTOR, DurationHistory
+from quality_tracker.status_events import StatusEvents
+
+
+@pytest.fixture
+def history():
+    store = DurationHistory(":memory:")
+    yield store
+    store.close()
+
+
+def test_ewma_weights_the_newest_sample(history):
+    for seconds in (10.0, 20.0, 5.0):
+        history.record("TC_001", seconds)
+    expected = 10.0
+    for seconds in (20.0, 5.0):
+        expected = EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * expected
+    assert history.expected("TC_001") == pytest.approx(expected)
+    assert history.expected("TC_999") is None
+
+
+def test_welford_mean_and_variance_match_the_two_pass_formulas(history):
+    samples = [2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0]
+    for seconds in samples:
+        history.record("TC_002", seconds, "Failed" if seconds > 6 else "Passed")
+    entry = history.stats("TC_002")
+    assert (entry.runs, entry.failures) == (8, 2)
+    assert entry.mean == pytest.approx(statistics.mean(samples))
+    assert entry.variance == pytest.approx(statistics.variance(samples))
+    assert entry.stdev == pytest.approx(statistics.stdev(samples))
+
+
+def test_percentiles_cover_only_the_most_recent_samples(history):
+    for seconds in range(1, 21):
+        history.record("TC_003", float(seconds))
+    entry = history.stats("TC_003")
+    assert entry.p50 == pytest.approx(10.5)
+    assert entry.p95 == pytest.approx(19.05)
+
+    for _ in range(MAX_SAMPLES):
+        history.record("TC_003", 100.0)
+    entry = history.stats("TC_003")
+    assert (entry.p50, entry.p95) == (100.0, 100.0)
+    assert entry.runs == 20 + MAX_SAMPLES
+
+
+def test_stats_are_shared_between_connections(tmp_path):
+    path = str(tmp_path / "durations.sqlite")
+    first, second = DurationHistory(path), DurationHistory(path)
+    first.record("TC_001", 3.0)
+    second.record("TC_001", 5.0)
+    third = DurationHistory(path)
+    assert third.stats("TC_001").runs == 2
+    for store in (first, second, third):
+        store.close()
+
+
+def test_timeout_is_a_multiple_of_p95_with_a_floor(history):
+    assert history.timeout("TC_001") is None
+    assert history.timeout("TC_001", default=15.0) == 15.0
+    history.record("TC_001", 2.0)
+    assert history.timeout("TC_001") == MIN_TIMEOUT
+    history.record("TC_002", 40.0)
+    assert history.timeout("TC_002") == pytest.approx(40.0 * TIMEOUT_FACTOR)
+
+
+def test_eta_sums_expected_durations_and_counts_unknown_ids(history):
+    history.record("TC_001", 4.0)
+    history.record("TC_002", 6.0)
+    assert history.eta(["TC_001", "TC_002", "TC_404"], default=10.0) == (20.0, 1)
+
+
+def test_export_catalog_writes_learned_estimates(tmp_path, capsys):
+    db = str(tmp_path / "durations.sqlite")
+    source, output = tmp_path / "catalog.json", tmp_path / "refreshed.json"
+    source.write_text(json.dumps([
+        {"id": "TC_001", "estimatedDuration": 1, "lastExecuted": ""},
+        {"id": "TC_002", "estimatedDuration": 2, "lastExecuted": ""},
+    ]))
+    store = DurationHistory(db)
+    store.record("TC_001", 90.0)
+    store.close()
+
+    assert history_module.main(["--db", db, "export-catalog", "--source", str(source), "--output", str(output)]) == 0
+    assert "Refreshed 1 test cases" in capsys.readouterr().out
+    refreshed = json.loads(output.read_text())
+    assert refreshed[0]["estimatedDuration"] == round(90.0 / ESTIMATE_UNIT_SECONDS, 2)
+    assert refreshed[0]["lastExecuted"].endswith("Z")
+    assert refreshed[1] == {"id": "TC_002", "estimatedDuration": 2, "lastExecuted": ""}
+    assert not (tmp_path / "refreshed.json.tmp").exists()
+
+
+def test_catalog_estimates_are_minutes_until_the_history_calibrates_them(tmp_path, history):
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(json.dumps([{"id": f"TC_00{n}", "estimatedDuration": n} for n in range(1, 8)]
+                                  + [{"id": "TC_010", "estimatedDuration": "n/a"}]))
+    assert history.estimated_seconds(str(catalog))["TC_002"] == 2 * ESTIMATE_UNIT_SECONDS == 120
+    # These tests run at 10 to 14 seconds per estimated minute
+    for n, seconds_per_unit in zip(range(1, 6), (10.0, 11.0, 12.0, 13.0, 14.0)):
+        history.record(f"TC_00{n}", n * seconds_per_unit)
+    assert history.estimate_unit({"TC_001": 1, "TC_002": 2}) == ESTIMATE_UNIT_SECONDS
+    seconds = history.estimated_seconds(str(catalog))
+    assert seconds["TC_007"] == pytest.approx(7 * 12.0)
+    assert "TC_010" not in seconds
+
+
+def test_item_timeout_uses_the_longest_timeout_of_the_items_ids(history):
+    history.record("TC_001", 30.0)
+    history.record("TC_002", 50.0)
+    plugin = StatusEvents(["TC_001", "TC_002", "TC_003"], reporter=None, index=None, history=history, timeouts=True)
+    plugin._item_tests = {"both": ["TC_001", "TC_002"], "new": ["TC_003"]}
+    assert plugin.item_timeout(SimpleNamespace(nodeid="both")) == pytest.approx(150.0)
+    assert plugin.item_timeout(SimpleNamespace(nodeid="new")) is None
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGALRM"), reason="needs SIGALRM")
+def test_a_test_running_past_its_timeout_is_failed():
+    plugin = StatusEvents(["TC_001"], reporter=None, index=None,
+                          history=SimpleNamespace(timeout=lambda test_id: 0.05), timeouts=True)
+    plugin._item_tests = {"slow": ["TC_001"]}
+    call = plugin.pytest_runtest_call(SimpleNamespace(nodeid="slow"))
+    next(call)
+    with pytest.raises(pytest.fail.Exception, match="still running after"):
+        time.sleep(2)
+    call.close()
@@ -0,0 +1,127 @@
+"""Unit tests of the record/replay proxy (quality_tracker.http_cache) against a local storefront."""
+
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from quality_tracker.http_cache import RECORD, REPLAY, HttpStore, RecordReplayProxy, request_key
+
+
+class Storefront(BaseHTTPRequestHandler):
+    """Answers every page with how often it was asked for, linking back to itself."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.hits[self.path] = count = self.server.hits.get(self.path, 0) + 1
+        origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+        if self.path == "/moved":
+            self.send_response(302)
+            self.send_header("Location", f"{origin}/index.php")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = f'<a href="{origin}/index.php">visit {count}</a>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Set-Cookie", "OCSESSID=abc; Domain=shop.test; Secure; path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def storefront():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Storefront)
+    server.daemon_threads = True
+    server.hits = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proxies(tmp_path, storefront):
+    started = []
+
+    def make(mode, store=None):
+        upstream = f"http://127.0.0.1:{storefront.server_address[1]}/"
+        proxy = RecordReplayProxy(mode, upstream, store or HttpStore(str(tmp_path)))
+        started.append(proxy)
+        return proxy
+
+    yield make
+    for proxy in started:
+        proxy._server.server_close()
+
+
+def _get(proxy, path, test):
+    proxy.current_test = test
+    status, headers, body = proxy.respond("GET", path, {}, b"")
+    return status, dict(headers), body.decode()
+
+
+def test_request_key_ignores_session_tokens_and_parameter_order():
+    assert request_key("GET", "/index.php?route=a&user_token=x&b=2") == "GET /index.php?b=2&route=a"
+    assert request_key("GET", "/index.php?b=2&route=a") == request_key("GET", "/index.php?route=a&b=2")
+    assert request_key("POST", "/login", b"email=a") != request_key("POST", "/login", b"email=b")
+
+
+def test_replay_answers_in_recorded_order_per_test(proxies, tmp_path, storefront):
+    recorder = proxies(RECORD)
+    for _ in range(2):
+        _get(recorder, "/index.php", "test_a")
+    _get(recorder, "/index.php", "test_b")
+    recorder.store.save()
+
+    replayer = proxies(REPLAY, HttpStore(str(tmp_path)))
+    assert [_get(replayer, "/index.php", "test_a")[2] for _ in range(3)] == [
+        f'<a href="{replayer.origin}/index.php">visit {n}</a>' for n in (1, 2, 2)]
+    # A test that recorded nothing gets the latest recording of the request
+    assert "visit 3" in _get(replayer, "/index.php", "test_c")[2]
+    status, _, body = _get(replayer, "/account", "test_a")
+    assert (status, body) == (504, "Not recorded: GET /account")
+    assert storefront.hits == {"/index.php": 3}
+    assert dict(replayer.stats["test_a"]) == {"hits": 3, "misses": 1}
+
+
+def test_redirects_and_cookies_are_rewritten_for_the_proxy(proxies):
+    proxy = proxies(RECORD)
+    status, headers, _ = _get(proxy, "/moved", "test_a")
+    assert (status, headers["Location"]) == (302, f"{proxy.origin}/index.php")
+    _, headers, _ = _get(proxy, "/index.php", "test_a")
+    assert headers["Set-Cookie"] == "OCSESSID=abc; path=/"
+
+
+class DroppedConnection:
+    """An upstream connection the storefront has closed."""
+
+    def __init__(self, sent):
+        self.sent = sent
+
+    def request(self, method, path, body=None, headers=None):
+        self.sent.append(method)
+
+    def getresponse(self):
+        raise http.client.RemoteDisconnected("closed")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("method, attempts", [("GET", 2), ("HEAD", 2), ("POST", 1)])
+def test_only_get_and_head_are_retried_upstream(proxies, monkeypatch, method, attempts):
+    proxy = proxies(RECORD)
+    sent = []
+    monkeypatch.setattr(proxy, "_connection", lambda fresh=False: DroppedConnection(sent))
+    status, _, _ = proxy.respond(method, "/index.php?route=account/login", {}, b"email=a")
+    assert status == 502
+    assert sent == [method] * attempts
+    assert proxy.store.entries == {}
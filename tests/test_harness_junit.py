@@ -0,0 +1,150 @@
+"""Unit tests of the streaming JUnit extraction (quality_tracker.junit), no browser needed."""
+
+import io
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from quality_tracker import payloads
+from quality_tracker.junit import ResultIndex, iter_testcases, result_entry, result_payloads
+from quality_tracker.payloads import categorize_failure
+
+REPORT = b"""<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="3">
+    <testcase classname="tests.test_user" name="test_login_TC_001" file="tests/test_user.py" line="10" time="1.5"/>
+    <testcase classname="tests.test_user" name="test_cart_TC_010" file="tests/test_user.py" line="40" time="2.0">
+      <failure type="AssertionError" message="assert 3 == 4">def test_cart_TC_010():
+&gt;       assert 3 == 4
+E       assert 3 == 4</failure>
+    </testcase>
+    <testcase classname="tests.test_user.TestSearch" name="test_search_tc_1" file="tests/test_user.py" line="80"
+              time="0.25">
+      <skipped type="pytest.skip" message="not today">skipped</skipped>
+    </testcase>
+  </testsuite>
+  <testsuite name="pytest-admin" tests="3">
+    <testcase classname="tests.test_admin" name="test_orders_TC_002" file="tests/test_admin.py" line="7" time="30.0">
+      <failure type="selenium.common.exceptions.TimeoutException" message="Message: page did not load">trace</failure>
+    </testcase>
+    <testcase classname="tests.test_admin" name="test_menu_TC_003" file="tests/test_admin.py" line="20" time="1.0">
+      <failure type="selenium.common.exceptions.NoSuchElementException" message="no such element: #menu">trace
+      </failure>
+    </testcase>
+    <testcase classname="tests.test_admin" name="test_login_TC-4" file="tests/test_admin.py" line="30" time="0.5">
+      <failure type="urllib3.exceptions.MaxRetryError" message="Connection refused">trace</failure>
+    </testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+def _legacy_enhanced(case):
+    """The failure, execution and framework blocks the old inline ind03 script built for a <testcase>."""
+    failure_element = case.find("failure")
+    failure_type = failure_element.get("type", "TestFailure")
+    failure_message = failure_element.get("message", "")
+    failure_content = failure_element.text or ""
+    file_path, line_num = case.get("file", ""), case.get("line", "0")
+    failure_data = {
+        "type": failure_type,
+        "message": failure_message,
+        "file": file_path.split("/")[-1] if file_path else "",
+        "line": int(line_num) if line_num.isdigit() else 0,
+        "classname": case.get("classname", ""),
+        "method": case.get("name", ""),
+        "stackTrace": failure_content,
+        "parsingSource": "junit-xml",
+        "parsingConfidence": "high",
+    }
+    if "assert" in failure_message.lower() or failure_type == "AssertionError":
+        match = (re.search(r"assert\s+(.+?)\s*(==|!=|<|>|<=|>=)\s*(.+?)(?:\s|$)", failure_message)
+                 or re.search(r"assert\s+(.+?)\s*(==|!=|<|>|<=|>=)\s*(.+?)(?:\n|$)", failure_content))
+        actual, operator, expected = ((match.group(1).strip(), match.group(2), match.group(3).strip())
+                                      if match else ("", "", ""))
+        failure_data["assertion"] = {"available": True, "expression": failure_message, "actual": actual,
+                                     "expected": expected, "operator": operator}
+        failure_data["category"] = "assertion"
+    elif "timeout" in failure_type.lower() or "timeout" in failure_message.lower():
+        failure_data["category"] = "timeout"
+    elif "element" in failure_type.lower() or "element" in failure_message.lower():
+        failure_data["category"] = "element"
+    elif "network" in failure_type.lower() or "connection" in failure_message.lower():
+        failure_data["category"] = "network"
+    else:
+        failure_data["category"] = "general"
+    return {
+        "failure": failure_data,
+        "execution": {"framework": "pytest", "testSuite": case.get("classname", ""),
+                      "totalTime": float(case.get("time") or 0), "junitSource": True},
+        "framework": {"name": "pytest", "detected": True, "junitSupported": True},
+    }
+
+
+def test_iter_testcases_reads_every_suite_in_order():
+    records = list(iter_testcases(io.BytesIO(REPORT)))
+    assert [r["name"] for r in records] == [
+        "test_login_TC_001", "test_cart_TC_010", "test_search_tc_1",
+        "test_orders_TC_002", "test_menu_TC_003", "test_login_TC-4",
+    ]
+    assert [r["outcome"] for r in records] == ["passed", "failed", "skipped", "failed", "failed", "failed"]
+    assert records[1]["failure_message"] == "assert 3 == 4"
+    assert records[2]["failure_message"] == "not today"
+
+
+def test_result_index_matches_exact_ids_in_any_spelling():
+    index = ResultIndex(io.BytesIO(REPORT), ["TC_1", "TC_010", "TC-004", "TC_404"])
+    assert index.testcases == 6
+    assert [r["name"] for r in index.records["TC_1"]] == ["test_login_TC_001", "test_search_tc_1"]
+    assert [r["name"] for r in index.records["TC_010"]] == ["test_cart_TC_010"]
+    assert [r["name"] for r in index.records["TC-004"]] == ["test_login_TC-4"]
+    assert [index.status(t) for t in index.test_ids] == ["Passed", "Failed", "Failed", "Not Found"]
+
+
+@pytest.mark.parametrize("failure_type, message, category", [
+    ("AssertionError", "assert 3 == 4", "assertion"),
+    ("Failed", "AssertionError: totals differ", "assertion"),
+    ("selenium.common.exceptions.TimeoutException", "Message: ", "timeout"),
+    ("RuntimeError", "gave up after a 30s timeout", "timeout"),
+    ("selenium.common.exceptions.NoSuchElementException", "no such element", "element"),
+    ("NetworkError", "unreachable", "network"),
+    ("OSError", "Connection refused", "network"),
+    ("ValueError", "bad price", "general"),
+])
+def test_categorize_failure(failure_type, message, category):
+    assert categorize_failure(failure_type, message, "")[0] == category
+
+
+def test_assertion_details_come_from_the_message_or_the_trace():
+    _, assertion = categorize_failure("AssertionError", "assert 3 == 4", "")
+    assert (assertion["actual"], assertion["operator"], assertion["expected"]) == ("3", "==", "4")
+    _, assertion = categorize_failure("AssertionError", "totals differ", ">   assert total != 0\n")
+    assert (assertion["actual"], assertion["operator"], assertion["expected"]) == ("total", "!=", "0")
+    _, assertion = categorize_failure("AssertionError", "totals differ", "")
+    assert assertion["operator"] == "" and assertion["expression"] == "totals differ"
+
+
+def test_enhanced_payloads_match_the_old_inline_script():
+    cases = {case.get("name"): case for case in ET.fromstring(REPORT).iter("testcase")}
+    test_ids = ["TC_010", "TC_002", "TC_003", "TC_004"]
+    results = list(result_payloads(io.BytesIO(REPORT), test_ids))
+    for result, name in zip(results, ["test_cart_TC_010", "test_orders_TC_002", "test_menu_TC_003",
+                                      "test_login_TC-4"]):
+        assert result["status"] == "Failed"
+        legacy = _legacy_enhanced(cases[name])
+        assert {key: result[key] for key in legacy} == legacy
+    assert [r["failure"]["category"] for r in results] == ["assertion", "timeout", "element", "network"]
+
+
+def test_failed_only_and_raw_xml_payloads():
+    results = list(result_payloads(io.BytesIO(REPORT), ["TC_001", "TC_002"], failed_only=True))
+    assert [r["id"] for r in results] == ["TC_002"]
+
+    index = ResultIndex(io.BytesIO(REPORT), ["TC_001", "TC_404"])
+    found = result_entry(index, "TC_001", payloads.RAW_XML, "junit-batch.xml")
+    document = ET.fromstring(found["junitXml"]["content"].split("?>", 1)[1])
+    assert [case.get("name") for case in document.iter("testcase")] == ["test_login_TC_001", "test_search_tc_1"]
+    assert document.find("testsuite").get("skipped") == "1"
+    missing = result_entry(index, "TC_404", payloads.RAW_XML, "junit-batch.xml")
+    assert missing["junitXml"] == {"available": False, "reason": "file_not_found"}
@@ -0,0 +1,118 @@
+"""Unit tests of the locator resolver and its cache (quality_tracker.locators), with a fake driver."""
+
+import json
+
+import pytest
+
+from quality_tracker.locators import Locator, LocatorCache, LocatorResolver
+
+BUTTON = Locator("buy-button", "#buy", ".btn-buy", "//button[@name='buy']")
+SITE = "shop.test|journal3"
+
+
+class FakeElement:
+    def __init__(self, name, broken=False):
+        self.name = name
+        self.broken = broken
+        self.clicks = 0
+
+    def click(self):
+        if self.broken:
+            from selenium.common.exceptions import ElementClickInterceptedException
+
+            raise ElementClickInterceptedException(f"{self.name} is covered")
+        self.clicks += 1
+
+
+class FakePage:
+    """Runs the resolver script against a page given as selector -> elements."""
+
+    def __init__(self, elements, host="shop.test", theme="journal3"):
+        self.elements = elements
+        self.host, self.theme = host, theme
+        self.calls = []
+
+    def execute_script(self, script, candidates, all_matches):
+        self.calls.append([selector for _, selector in candidates])
+        for index, (_, selector) in enumerate(candidates):
+            found = self.elements.get(selector)
+            if found:
+                return [index, found if all_matches else found[:1], self.host, self.theme]
+        return [-1, None, self.host, self.theme]
+
+
+@pytest.fixture
+def resolver(tmp_path):
+    return LocatorResolver(LocatorCache(str(tmp_path / "locators.json")))
+
+
+def test_the_winning_selector_is_cached_and_tried_first(resolver):
+    button = FakeElement("button")
+    page = FakePage({".btn-buy": [button]})
+    assert resolver.find(page, BUTTON) is button
+    assert resolver.cache.get(f"{SITE}|buy-button") == ".btn-buy"
+    assert resolver.find(page, BUTTON) is button
+    assert page.calls[1] == [".btn-buy", "#buy", "//button[@name='buy']"]
+    assert (resolver.hits, resolver.misses, resolver.invalidations) == (1, 1, 0)
+
+
+def test_a_cached_selector_that_stops_matching_is_replaced_in_the_same_call(resolver):
+    resolver.find(FakePage({".btn-buy": [FakeElement("old")]}), BUTTON)
+    new = FakeElement("new")
+    page = FakePage({"//button[@name='buy']": [new]})
+    assert resolver.find(page, BUTTON) is new
+    assert len(page.calls) == 1
+    assert resolver.cache.get(f"{SITE}|buy-button") == "//button[@name='buy']"
+    assert resolver.invalidations == 1
+
+
+def test_an_entry_is_dropped_when_nothing_matches(resolver):
+    resolver.find(FakePage({"#buy": [FakeElement("button")]}), BUTTON)
+    assert resolver.find(FakePage({}), BUTTON) is None
+    assert resolver.cache.get(f"{SITE}|buy-button") is None
+    assert resolver.invalidations == 1
+
+
+def test_entries_are_kept_per_site_and_theme(resolver):
+    resolver.find(FakePage({"#buy": [FakeElement("a")]}), BUTTON)
+    resolver.find(FakePage({".btn-buy": [FakeElement("b")]}, theme="default"), BUTTON)
+    assert resolver.cache.entries == {f"{SITE}|buy-button": "#buy", "shop.test|default|buy-button": ".btn-buy"}
+
+
+def test_find_all_returns_every_match_of_the_winner(resolver):
+    tiles = [FakeElement(f"tile {n}") for n in range(3)]
+    assert resolver.find_all(FakePage({".btn-buy": tiles, "#buy": []}), BUTTON) == tiles
+
+
+def test_click_moves_on_to_a_candidate_that_works_and_caches_it(resolver):
+    pytest.importorskip("selenium")
+    covered, working = FakeElement("covered", broken=True), FakeElement("working")
+    page = FakePage({"#buy": [covered], ".btn-buy": [working]})
+    assert resolver.click(page, BUTTON)
+    assert working.clicks == 1
+    assert page.calls == [["#buy", ".btn-buy", "//button[@name='buy']"], [".btn-buy", "//button[@name='buy']"]]
+    assert resolver.cache.get(f"{SITE}|buy-button") == ".btn-buy"
+    assert not resolver.click(FakePage({"#buy": [covered]}), BUTTON)
+
+
+def test_save_merges_changes_with_other_workers(tmp_path):
+    path = str(tmp_path / "locators.json")
+    with open(path, "w") as f:
+        json.dump({f"{SITE}|a": "#a", f"{SITE}|b": "#b"}, f)
+    first, second = LocatorCache(path), LocatorCache(path)
+    first.put(f"{SITE}|c", "#c")
+    second.drop(f"{SITE}|a")
+    second.put(f"{SITE}|b", "#b2")
+    first.save()
+    second.save()
+    assert LocatorCache(path).entries == {f"{SITE}|b": "#b2", f"{SITE}|c": "#c"}
+
+
+def test_a_new_resolver_starts_from_the_most_common_site(tmp_path):
+    cache = LocatorCache(str(tmp_path / "locators.json"))
+    cache.entries = {f"{SITE}|a": "#a", f"{SITE}|b": "#b", "other.test|default|a": "#x"}
+    resolver = LocatorResolver(cache)
+    assert resolver.site == SITE
+    page = FakePage({})
+    resolver.find(page, Locator("a", "#x", "#a"))
+    assert page.calls == [["#a", "#x"]]
@@ -0,0 +1,77 @@
+"""Unit tests of failure-first ordering (quality_tracker.ordering), no browser needed."""
+
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from quality_tracker.history import DurationHistory
+from quality_tracker.ordering import CHANGED, FAILED, NEW, STABLE, order_items, read_changed_files
+
+
+@pytest.fixture
+def history():
+    store = DurationHistory(":memory:")
+    yield store
+    store.close()
+
+
+def _items(tmp_path, *names):
+    items = []
+    for name in names:
+        path = tmp_path / f"test_{name}.py"
+        path.touch()
+        items.append(SimpleNamespace(nodeid=f"test_{name}.py::test_{name}", path=path))
+    return items
+
+
+def test_failed_then_changed_then_new_then_stable(tmp_path, history):
+    for test_id, seconds, outcome in [("TC_001", 5.0, "Passed"), ("TC_002", 5.0, "Failed"),
+                                      ("TC_003", 5.0, "Passed"), ("TC_005", 9.0, "Passed"),
+                                      ("TC_006", 1.0, "Passed"), ("TC_007", 5.0, "Failed"),
+                                      ("TC_007", 5.0, "Passed")]:
+        history.record(test_id, seconds, outcome)
+    items = _items(tmp_path, "stable", "failed", "changed", "new", "slow", "fast", "flaky")
+    item_tests = {item.nodeid: [f"TC_00{n}"] for n, item in enumerate(items, 1)}
+    changed = {os.path.abspath(tmp_path / "test_changed.py")}
+
+    ordered, groups = order_items(items, item_tests, history, changed)
+    # Within the stable group: the one that failed before, then the shortest
+    assert [item.nodeid.split("::test_")[1] for item in ordered] == [
+        "failed", "changed", "new", "flaky", "fast", "stable", "slow"]
+    assert groups == {"TC_001": STABLE, "TC_002": FAILED, "TC_003": CHANGED, "TC_004": NEW,
+                      "TC_005": STABLE, "TC_006": STABLE, "TC_007": STABLE}
+
+
+def test_without_a_list_modification_times_tell_what_changed(tmp_path, history):
+    history.record("TC_001", 1.0)
+    history.record("TC_002", 1.0)
+    items = _items(tmp_path, "old", "edited")
+    last_run = history.stats("TC_001").last_executed
+    os.utime(items[0].path, (last_run - 60, last_run - 60))
+    os.utime(items[1].path, (time.time() + 60, time.time() + 60))
+    ordered, groups = order_items(items, {"test_old.py::test_old": ["TC_001"],
+                                          "test_edited.py::test_edited": ["TC_002"]}, history)
+    assert [item.nodeid for item in ordered] == ["test_edited.py::test_edited", "test_old.py::test_old"]
+    assert groups == {"TC_001": STABLE, "TC_002": CHANGED}
+    # A listed-files run ignores the fresh modification time
+    _, groups = order_items(items, {"test_edited.py::test_edited": ["TC_002"]}, history, set())
+    assert groups == {"TC_002": STABLE}
+
+
+def test_an_item_of_several_tc_ids_takes_the_most_urgent_group(tmp_path, history):
+    history.record("TC_001", 1.0)
+    history.record("TC_002", 1.0, "Failed")
+    items = _items(tmp_path, "first", "shared")
+    ordered, _ = order_items(items, {"test_first.py::test_first": ["TC_001"],
+                                     "test_shared.py::test_shared": ["TC_001", "TC_002"]}, history, set())
+    assert ordered[0].nodeid == "test_shared.py::test_shared"
+
+
+def test_changed_files_are_read_relative_to_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "changed.txt").write_text("tests/test_user.py\n\nquality_tracker/pages.py\n")
+    assert read_changed_files("changed.txt") == {
+        str(tmp_path / "tests" / "test_user.py"), str(tmp_path / "quality_tracker" / "pages.py")}
+    assert read_changed_files("missing.txt") == set()
@@ -0,0 +1,100 @@
+"""Unit tests of risk-weighted selection (quality_tracker.selection), no browser needed."""
+
+import itertools
+import json
+
+import numpy as np
+import pytest
+
+from quality_tracker import selection
+from quality_tracker.selection import RiskModel, knapsack, select
+from quality_tracker.traceability import load_index
+
+
+def _best_value(values, weights, budget):
+    # Brute force over every subset
+    best = 0.0
+    for size in range(len(values) + 1):
+        for subset in itertools.combinations(range(len(values)), size):
+            if sum(weights[i] for i in subset) <= budget:
+                best = max(best, sum(values[i] for i in subset))
+    return best
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_knapsack_is_exact_for_whole_minute_weights(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0.5, 20, 10)
+    weights = rng.integers(1, 8, 10).astype(np.float64) * 60
+    budget = 900.0
+    chosen = knapsack(values, weights, budget)
+    assert weights[chosen].sum() <= budget
+    assert values[chosen].sum() == pytest.approx(_best_value(values, weights, budget))
+
+
+def test_knapsack_takes_free_items_and_skips_oversized_ones():
+    values = np.array([5.0, 1.0, 9.0, 3.0])
+    weights = np.array([0.0, 10.0, 500.0, 20.0])
+    assert sorted(knapsack(values, weights, 100.0).tolist()) == [0, 1, 3]
+    assert knapsack(values, np.array([0.0, 200.0, 500.0, 300.0]), 100.0).tolist() == [0]
+
+
+def test_greedy_fallback_keeps_to_the_budget(monkeypatch):
+    monkeypatch.setattr(selection, "MAX_DP_CELLS", 0)
+    values = np.array([10.0, 6.0, 5.0, 1.0])
+    weights = np.array([100.0, 50.0, 60.0, 5.0])
+    # By density: 1/5, 6/50, 10/100 fit; 5/60 no longer does
+    chosen = knapsack(values, weights, 160.0)
+    assert sorted(chosen.tolist()) == [0, 1, 3]
+    assert weights[chosen].sum() <= 160.0
+
+
+def test_greedy_fallback_stays_close_to_the_optimum(monkeypatch):
+    rng = np.random.default_rng(7)
+    values = rng.uniform(1, 10, 12)
+    weights = rng.uniform(30, 300, 12)
+    optimum = _best_value(values, weights, 900.0)
+    monkeypatch.setattr(selection, "MAX_DP_CELLS", 0)
+    chosen = knapsack(values, weights, 900.0)
+    assert weights[chosen].sum() <= 900.0
+    assert values[chosen].sum() >= 0.8 * optimum
+
+
+@pytest.fixture
+def model(tmp_path):
+    requirements = [
+        {"id": "REQ-001", "businessImpact": 5, "regulatoryFactor": 5, "technicalComplexity": 4, "usageFrequency": 4},
+        {"id": "REQ-002", "businessImpact": 1, "regulatoryFactor": 1, "technicalComplexity": 2, "usageFrequency": 2,
+         "tags": ["Cart"]},
+    ]
+    test_cases = [
+        {"id": "TC_001", "requirementIds": ["REQ-001"], "priority": "High", "estimatedDuration": 3},
+        {"id": "TC_002", "requirementIds": ["REQ-001"], "priority": "Low", "estimatedDuration": 1},
+        {"id": "TC_003", "requirementIds": ["REQ-002"], "priority": "High", "estimatedDuration": 2},
+        {"id": "TC_004", "requirementIds": [], "priority": "Medium", "estimatedDuration": 1},
+    ]
+    (tmp_path / "requirements.json").write_text(json.dumps(requirements))
+    (tmp_path / "test-cases.json").write_text(json.dumps(test_cases))
+    index = load_index(str(tmp_path / "requirements.json"), str(tmp_path / "test-cases.json"), cache_dir=None)
+    return RiskModel(index)
+
+
+def test_scores_share_requirement_risk_and_weight_priority(model):
+    # REQ-001 risk 5 x 4 = 20, shared by two test cases; REQ-002 risk 1 x 2 = 2
+    assert model.scores().tolist() == [30.0, 10.0, 6.0, 0.0]
+    assert model.scores(["REQ-002"], boost=3.0).tolist() == [30.0, 10.0, 18.0, 0.0]
+
+
+def test_select_fits_the_budget_best_first(model):
+    chosen = select(model, budget=180)
+    assert chosen.test_ids == ["TC_001"]
+    assert chosen.duration == 180
+    assert chosen.risk_covered == pytest.approx(30 / 46)
+    assert select(model, budget=240).test_ids == ["TC_001", "TC_002"]
+    assert select(model).test_ids == ["TC_001", "TC_002", "TC_003", "TC_004"]
+
+
+def test_select_restricts_to_changed_requirements_and_tags(model):
+    assert select(model, changed_requirements=["REQ-002"]).test_ids == ["TC_003"]
+    assert select(model, tags=["Cart"]).test_ids == ["TC_003"]
+    assert select(model, budget=60, changed_requirements=["REQ-001"]).test_ids == ["TC_002"]
@@ -0,0 +1,181 @@
+"""Unit tests of the session snapshots (quality_tracker.sessions), with a fake driver."""
+
+import itertools
+import json
+import os
+
+import pytest
+
+from quality_tracker import base_url, sessions
+from quality_tracker.sessions import CUSTOMER, SessionCache
+
+ORIGIN = "https://shop.test/"
+
+
+class FakeServer:
+    """The storefront's side: which session cookies are logged in."""
+
+    def __init__(self):
+        self.sessions = set()
+        # False makes the login form fail
+        self.working = True
+        self._ids = itertools.count(1)
+
+    def new_session(self):
+        session_id = f"session-{next(self._ids)}"
+        self.sessions.add(session_id)
+        return session_id
+
+
+class FakeDriver:
+    """Just enough WebDriver for SessionCache: cookies, storage and the logout-link check."""
+
+    def __init__(self, server):
+        self.server = server
+        self.current_url = "data:,"
+        self.cookies = {}
+        self.local, self.session = {}, {}
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+        self.current_url = url
+
+    def add_cookie(self, cookie):
+        self.cookies[cookie["name"]] = dict(cookie)
+
+    def get_cookies(self):
+        return [dict(cookie) for cookie in self.cookies.values()]
+
+    def delete_all_cookies(self):
+        self.cookies.clear()
+
+    def execute_script(self, script, *args):
+        if script == sessions._STORAGE_JS:
+            return {"local": dict(self.local), "session": dict(self.session)}
+        if script == sessions._RESTORE_STORAGE_JS:
+            self.local.update(args[0]["local"])
+            self.session.update(args[0]["session"])
+        elif script == sessions._CLEAR_STORAGE_JS:
+            self.local.clear()
+            self.session.clear()
+        elif script == sessions._LOGGED_IN_JS[CUSTOMER]:
+            return self.cookies.get("OCSESSID", {}).get("value") in self.server.sessions
+        else:
+            raise AssertionError(f"unexpected script: {script}")
+        return None
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setenv("QT_BASE_URL", ORIGIN)
+
+    def ui_login(driver, role):
+        if server.working:
+            driver.add_cookie({"name": "OCSESSID", "value": server.new_session(), "sameSite": "Lax"})
+            driver.local["wishlist"] = "[40]"
+        driver.get(base_url())
+        return driver.current_url
+
+    monkeypatch.setattr(sessions, "ui_login", ui_login)
+    return server
+
+
+def _cache(tmp_path, **kwargs):
+    return SessionCache(str(tmp_path), worker="gw0", **kwargs)
+
+
+def test_first_login_is_captured_and_restored_in_the_next_browser(tmp_path, server):
+    cache = _cache(tmp_path)
+    cache.authenticate(FakeDriver(server), CUSTOMER)
+    snapshot = cache.load(CUSTOMER)
+    assert (cache.logins, cache.restored) == (1, 0)
+    assert snapshot["origin"] == ORIGIN and snapshot["storage"]["local"] == {"wishlist": "[40]"}
+
+    driver = FakeDriver(server)
+    cache.authenticate(driver, CUSTOMER)
+    assert (cache.logins, cache.restored, cache.rejected) == (1, 1, 0)
+    assert driver.cookies["OCSESSID"]["value"] == "session-1"
+    assert driver.local == {"wishlist": "[40]"}
+    assert driver.visited == [ORIGIN, ORIGIN]
+
+
+def test_snapshot_rejected_by_the_server_is_cleared_and_replaced(tmp_path, server):
+    cache = _cache(tmp_path)
+    cache.authenticate(FakeDriver(server), CUSTOMER)
+    server.sessions.clear()
+
+    driver = FakeDriver(server)
+    driver.session["stale"] = "1"
+    cache.authenticate(driver, CUSTOMER)
+    assert (cache.logins, cache.restored, cache.rejected) == (2, 0, 1)
+    # Nothing of the rejected snapshot survives next to the new login
+    assert driver.cookies["OCSESSID"]["value"] == "session-2"
+    assert driver.session == {}
+    assert cache.load(CUSTOMER)["cookies"][0]["value"] == "session-2"
+
+
+def test_stale_snapshot_is_refreshed_without_trying_it(tmp_path, server):
+    cache = _cache(tmp_path, max_age=60)
+    cache.authenticate(FakeDriver(server), CUSTOMER)
+    path = os.path.join(str(tmp_path), "gw0-customer.json")
+    with open(path) as f:
+        snapshot = json.load(f)
+    snapshot["created"] -= 120
+    with open(path, "w") as f:
+        json.dump(snapshot, f)
+
+    driver = FakeDriver(server)
+    cache.authenticate(driver, CUSTOMER)
+    assert (cache.logins, cache.restored, cache.rejected) == (2, 0, 1)
+    assert driver.visited == [ORIGIN]
+    assert cache.load(CUSTOMER)["created"] > snapshot["created"]
+
+
+def test_failed_ui_login_raises_and_is_not_saved(tmp_path, server):
+    server.working = False
+    cache = _cache(tmp_path)
+    with pytest.raises(RuntimeError, match="did not log in"):
+        cache.authenticate(FakeDriver(server), CUSTOMER)
+    assert cache.load(CUSTOMER) is None
+
+
+def test_fresh_enough_checks_origin_age_and_cookie_expiry(tmp_path, server):
+    cache = _cache(tmp_path, max_age=60)
+    snapshot = {"origin": ORIGIN, "host": "shop.test", "created": 1000, "cookies": [{"name": "a", "expiry": 2000}]}
+    assert cache.fresh_enough(snapshot, now=1030)
+    assert not cache.fresh_enough(snapshot, now=1100)
+    assert not cache.fresh_enough({**snapshot, "cookies": [{"name": "a", "expiry": 1020}]}, now=1030)
+    assert not cache.fresh_enough({**snapshot, "origin": "http://127.0.0.1:8080/"}, now=1030)
+
+
+def test_disabled_cache_logs_in_every_time(tmp_path, server):
+    cache = _cache(tmp_path, enabled=False)
+    for _ in range(2):
+        cache.authenticate(FakeDriver(server), CUSTOMER)
+    assert (cache.logins, cache.restored) == (2, 0)
+    assert cache.load(CUSTOMER) is None
+    with pytest.raises(ValueError):
+        cache.authenticate(FakeDriver(server), "guest")
+
+
+def test_snapshot_taken_behind_the_http_cache_survives_a_new_proxy_port(tmp_path, server, monkeypatch):
+    monkeypatch.setenv("QT_STOREFRONT_URL", ORIGIN)
+    monkeypatch.setenv("QT_BASE_URL", "http://127.0.0.1:41001/")
+    cache = _cache(tmp_path)
+    cache.authenticate(FakeDriver(server), CUSTOMER)
+    snapshot = cache.load(CUSTOMER)
+    assert (snapshot["origin"], snapshot["host"], snapshot["landingUrl"]) == (ORIGIN, "127.0.0.1", "")
+
+    # The next run's proxy listens elsewhere
+    monkeypatch.setenv("QT_BASE_URL", "http://127.0.0.1:41002/")
+    driver = FakeDriver(server)
+    cache.authenticate(driver, CUSTOMER)
+    assert (cache.logins, cache.restored) == (1, 1)
+    assert driver.visited == ["http://127.0.0.1:41002/", "http://127.0.0.1:41002/"]
+
+    # Without the proxy the cookies belong to another host
+    monkeypatch.delenv("QT_STOREFRONT_URL")
+    monkeypatch.setenv("QT_BASE_URL", ORIGIN)
+    assert not cache.fresh_enough(cache.load(CUSTOMER))
@@ -0,0 +1,175 @@
+"""Tests of the status plugin (quality_tracker.status_events) in pytester sessions, no browser needed."""
+
+import functools
+import io
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from quality_tracker import runner
+from quality_tracker.history import DurationHistory
+from quality_tracker.status_events import StatusEvents
+from quality_tracker.tc_index import build_index
+
+pytest_plugins = ["pytester"]
+
+TESTS = """
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def browser():
+    with open("sessions.txt", "a") as f:
+        f.write("session\\n")
+    return object()
+
+
+def test_login_TC_001(browser):
+    pass
+
+
+def test_cart_TC_002(browser):
+    assert 1 == 2
+
+
+def test_search_TC_003(browser):
+    pytest.skip("not on this storefront")
+
+
+def test_wishlist_TC_004(browser):
+    # Fails on the first attempt only
+    first = not os.path.exists("attempted")
+    open("attempted", "w").close()
+    assert not first
+
+
+def test_logout_TC_005(request):
+    request.session.shouldstop = "stopped by the test"
+"""
+
+
+class RecordingReporter:
+    """Stands in for RunReporter and keeps every event it is given."""
+
+    def __init__(self):
+        self.events = []
+        self.outputs = {}
+        self.reruns = {}
+        self.lines = []
+        self.started = self.closed = False
+
+    def log(self, line):
+        self.lines.append(line)
+
+    def start(self, test_ids):
+        self.started = True
+
+    def status(self, test_id, status):
+        self.events.append((test_id, status))
+
+    def output(self, test_id):
+        return io.StringIO()
+
+    def finished(self, test_id, status, duration, output, records=()):
+        self.events.append((test_id, status))
+        self.outputs[test_id] = output.getvalue()
+
+    def rerun(self, test_id, classification, records):
+        self.reruns[test_id] = classification
+
+    def close(self):
+        self.closed = True
+
+
+def _run(pytester, test_ids, **kwargs):
+    pytester.makepyfile(test_shop=TESTS)
+    reporter = RecordingReporter()
+    plugin = StatusEvents(test_ids, reporter, build_index(".", cache_path=None), **kwargs)
+    result = pytester.runpytest("-p", "no:cacheprovider", "--junit-xml=junit.xml", plugins=[plugin])
+    return reporter, result
+
+
+def _statuses(reporter, test_id):
+    return [status for event_id, status in reporter.events if event_id == test_id]
+
+
+def test_every_tc_id_goes_through_not_started_running_and_a_final_status(pytester):
+    reporter, result = _run(pytester, ["TC_001", "TC-2", "TC_003", "TC_404"])
+    assert _statuses(reporter, "TC_001") == ["Not Started", "Running", "Passed"]
+    assert _statuses(reporter, "TC-2") == ["Not Started", "Running", "Failed"]
+    assert _statuses(reporter, "TC_003") == ["Not Started", "Running", "Skipped"]
+    assert _statuses(reporter, "TC_404") == ["Not Started", "Running", "Not Found"]
+    assert reporter.started and reporter.closed
+    assert "assert 1 == 2" in reporter.outputs["TC-2"]
+    # Only the requested tests ran, all in one session
+    result.assert_outcomes(passed=1, failed=1, skipped=1, deselected=2)
+    assert (pytester.path / "sessions.txt").read_text() == "session\n"
+
+
+def test_rerun_reports_only_the_final_attempt(pytester):
+    reporter, result = _run(pytester, ["TC_002", "TC_004"], rerun_failures=True)
+    assert _statuses(reporter, "TC_004") == ["Not Started", "Running", "Failed"]
+    assert reporter.reruns == {"TC_002": "deterministic", "TC_004": "flaky"}
+    # The terminal and JUnit report count each test once, as its rerun did
+    result.assert_outcomes(passed=1, failed=1, deselected=3)
+    cases = ET.parse(str(pytester.path / "junit.xml")).getroot().iter("testcase")
+    outcomes = {case.get("name"): [child.tag for child in case if child.tag != "system-out"] for case in cases}
+    assert outcomes == {"test_cart_TC_002": ["failure"], "test_wishlist_TC_004": []}
+
+
+def test_first_attempts_are_reported_when_the_session_stops_before_reruns(pytester):
+    reporter, result = _run(pytester, ["TC_002", "TC_005"], rerun_failures=True)
+    assert reporter.reruns == {}
+    assert _statuses(reporter, "TC_002") == ["Not Started", "Running", "Failed"]
+    result.assert_outcomes(passed=1, failed=1, deselected=3)
+
+
+def test_runner_runs_the_batch_in_one_session(pytester, monkeypatch):
+    pytester.makepyfile(test_shop=TESTS)
+    for name in ("TEST_CASE_IDS", "CALLBACK_URL", "QT_SHARED_CONTEXTS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("QT_EVIDENCE_DIR", str(pytester.path / "evidence"))
+    monkeypatch.setattr(runner, "DurationHistory", lambda: DurationHistory(":memory:"))
+    monkeypatch.setattr(runner, "build_index", functools.partial(build_index, cache_path=None))
+
+    exit_code = runner.main(["--test-ids", "TC_001 TC_002 TC_003 TC_404", "--tests-path", ".",
+                             "--results-dir", "results", "--", "-p", "no:cacheprovider"])
+    assert exit_code == 1
+    assert (pytester.path / "sessions.txt").read_text() == "session\n"
+    with open(pytester.path / "current_results.json") as f:
+        results = {entry["id"]: entry["status"] for entry in json.load(f)["results"]}
+    assert results == {"TC_001": "Passed", "TC_002": "Failed", "TC_003": "Skipped", "TC_404": "Not Found"}
+
+
+@pytest.mark.parametrize("order", ["dispatch", "failures-first"])
+def test_order_option_keeps_one_event_per_tc(pytester, order):
+    reporter, _ = _run(pytester, ["TC_001", "TC_002"], order=order, history=DurationHistory(":memory:"))
+    finals = [event for event in reporter.events if event[1] in ("Passed", "Failed")]
+    assert sorted(finals) == [("TC_001", "Passed"), ("TC_002", "Failed")]
+
+
+def test_failures_first_runs_the_last_failure_before_the_rest(pytester):
+    history = DurationHistory(":memory:")
+    history.record("TC_001", 1.0)
+    history.record("TC_002", 1.0, "Failed")
+    reporter, _ = _run(pytester, ["TC_001", "TC_002"], order="failures-first", history=history, changed_files=set())
+    running = [test_id for test_id, status in reporter.events if status == "Running"]
+    assert running == ["TC_002", "TC_001"]
+    assert "🔀 Failure-first order: 1 failed last run, 1 stable" in reporter.lines
+
+
+@pytest.mark.parametrize("fail_fast, wishlist", [(1, "Skipped"), (2, "Failed")])
+def test_fail_fast_skips_the_rest_of_a_requirement(pytester, fail_fast, wishlist):
+    requirements = {"TC_001": ("REQ-001",), "TC_002": ("REQ-001",), "TC_004": ("REQ-001",), "TC_005": ("REQ-002",)}
+    reporter, _ = _run(pytester, ["TC_001", "TC_002", "TC_004", "TC_005"],
+                       fail_fast=fail_fast, requirements=requirements)
+    assert _statuses(reporter, "TC_002")[-1] == "Failed"
+    assert _statuses(reporter, "TC_004")[-1] == wishlist
+    # Other requirements go on
+    assert _statuses(reporter, "TC_005")[-1] == "Passed"
+    assert (pytester.path / "attempted").exists() == (wishlist == "Failed")
+    stopped = [line for line in reporter.lines if line.startswith("⛔")]
+    assert stopped == [f"⛔ Fail-fast: {fail_fast} failed test cases in REQ-001, skipping the rest of it"]
@@ -0,0 +1,92 @@
+"""Unit tests of the traceability index (quality_tracker.traceability), no browser needed."""
+
+import json
+
+import pytest
+
+from quality_tracker import traceability
+from quality_tracker.traceability import load_index
+
+REQUIREMENTS = [
+    {"id": "REQ-001", "name": "Login", "priority": "High", "type": "Security", "versions": ["v1.0"],
+     "status": "Active", "owner": "Authentication Team", "tags": ["Authentication"]},
+    {"id": "REQ-002", "name": "Cart", "priority": "Medium", "type": "Functional", "versions": ["v1.0", "v1.1"],
+     "status": "Active", "owner": "Checkout Team", "tags": ["Cart"]},
+    {"id": "REQ-003", "name": "Reports", "priority": "Low", "type": "Functional", "versions": ["v1.1"],
+     "status": "Draft", "owner": "Admin Team", "tags": []},
+]
+TEST_CASES = [
+    {"id": "TC_001", "name": "Login", "requirementIds": ["REQ-001"], "tags": ["Login", "Smoke"],
+     "priority": "High", "version": "v1.0", "status": "Passed", "automationStatus": "Automated"},
+    {"id": "TC_002", "name": "Add to cart", "requirementIds": ["REQ-002"], "tags": ["Cart", "Smoke"],
+     "priority": "High", "version": "v1.1", "status": "Failed", "automationStatus": "Automated"},
+    {"id": "TC_003", "name": "Login and cart", "requirementIds": ["REQ-001", "REQ-002"], "tags": ["Cart"],
+     "priority": "Low", "version": "v1.0", "status": "Not Run", "automationStatus": "Manual"},
+    {"id": "TC_004", "name": "Orphan", "requirementIds": ["REQ-404"], "tags": [],
+     "priority": "Medium", "version": "v1.0", "status": "Not Run", "automationStatus": "Manual"},
+]
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    requirements, test_cases = tmp_path / "requirements.json", tmp_path / "test-cases.json"
+    requirements.write_text(json.dumps(REQUIREMENTS))
+    test_cases.write_text(json.dumps(TEST_CASES))
+    return str(requirements), str(test_cases)
+
+
+def test_forward_and_reverse_maps(catalogs):
+    index = load_index(*catalogs, cache_dir=None)
+    assert index.test_cases_for("REQ-001") == ["TC_001", "TC_003"]
+    assert index.test_cases_for("REQ-404") == ["TC_004"]
+    assert index.test_cases_for("REQ-999") == []
+    assert index.requirements_for("TC_003") == ["REQ-001", "REQ-002"]
+    assert index.uncovered_requirements() == ["REQ-003"]
+    assert index.dangling_references() == [("TC_004", "REQ-404")]
+
+
+def test_compound_filters_intersect_and_ignore_case(catalogs):
+    index = load_index(*catalogs, cache_dir=None)
+    assert index.find_test_cases(tags="smoke", priority="HIGH") == ["TC_001", "TC_002"]
+    assert index.find_test_cases(tags=["Login", "Cart"], version="v1.0") == ["TC_001", "TC_003"]
+    # The owner comes from the covered requirements
+    assert index.find_test_cases(owner="checkout team") == ["TC_002", "TC_003"]
+    assert index.find_test_cases(requirement="REQ-001", automationStatus="Manual") == ["TC_003"]
+    assert index.find_test_cases(requirement=["REQ-001", "REQ-002"], tags="Smoke") == ["TC_001", "TC_002"]
+    assert index.find_test_cases(tags="Smoke", status="Draft") == []
+    assert index.find_requirements(versions="v1.1", type="functional") == ["REQ-002", "REQ-003"]
+    with pytest.raises(ValueError, match="Unknown filter field"):
+        index.find_test_cases(colour="red")
+
+
+def test_cached_index_is_reused_until_a_catalog_changes(catalogs, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    first = load_index(*catalogs, cache_dir=str(cache_dir))
+    [pickle_file] = cache_dir.iterdir()
+
+    def no_parsing(path):
+        raise AssertionError("the catalog was parsed again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(traceability, "load_test_cases", no_parsing)
+        cached = load_index(*catalogs, cache_dir=str(cache_dir))
+    assert cached.covered_by == first.covered_by
+    assert cached.find_test_cases(owner="Checkout Team") == ["TC_002", "TC_003"]
+
+    changed = [dict(TEST_CASES[0], requirementIds=["REQ-003"])] + TEST_CASES[1:]
+    with open(catalogs[1], "w") as f:
+        json.dump(changed, f)
+    rebuilt = load_index(*catalogs, cache_dir=str(cache_dir))
+    assert rebuilt.test_cases_for("REQ-003") == ["TC_001"]
+    # The old catalog's pickle is replaced, not kept next to the new one
+    [new_pickle] = cache_dir.iterdir()
+    assert new_pickle.name != pickle_file.name
+
+
+def test_unreadable_cache_is_rebuilt(catalogs, tmp_path):
+    cache_dir = tmp_path / "cache"
+    load_index(*catalogs, cache_dir=str(cache_dir))
+    [pickle_file] = cache_dir.iterdir()
+    pickle_file.write_bytes(b"not a pickle")
+    assert load_index(*catalogs, cache_dir=str(cache_dir)).test_cases_for("REQ-002") == ["TC_002", "TC_003"]
+    assert pickle_file.read_bytes() != b"not a pickle"
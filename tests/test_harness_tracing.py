@@ -0,0 +1,97 @@
+"""Unit tests of the trace-event export (quality_tracker.tracing), no browser needed."""
+
+import json
+
+from quality_tracker import tracing
+from quality_tracker.tracing import Tracer, tc_ids, trace_path
+
+pytest_plugins = ["pytester"]
+
+
+def test_tc_ids_are_normalized_like_the_index():
+    assert tc_ids("tests/test_user.py::TestOpenCart::test_cart_TC-3[tc_010]") == ["TC_003", "TC_010"]
+    assert tc_ids("tests/test_harness.py::test_plain") == []
+
+
+def test_time_inside_a_part_is_not_counted_again(monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(tracing.time, "perf_counter", lambda: float(next(clock)))
+    tracer = Tracer()
+    tracer.test = "tests/test_user.py::test_login_TC_001"
+    with tracer.span("call test_login", "call"):
+        with tracer.span("wait_until", "wait"):
+            with tracer.span("findElement", "webdriver"):
+                pass
+        with tracer.span("get", "navigation"):
+            pass
+    # The command the wait polled with is only in the trace
+    assert dict(tracer.totals[tracer.test]) == {"wait": 3.0, "navigation": 1.0, "call": 7.0}
+    assert [event["name"] for event in tracer.events] == ["findElement", "wait_until", "get", "call test_login"]
+    wait = tracer.events[1]
+    assert (wait["ph"], wait["ts"], wait["dur"]) == ("X", 2e6, 3e6)
+    assert wait["args"] == {"test": tracer.test, "tcIds": ["TC_001"]}
+    assert dict(tracer.by_tc()["TC_001"]) == {"wait": 3.0, "navigation": 1.0, "call": 7.0}
+
+
+def test_spans_outside_a_test_are_kept_but_not_summarized():
+    tracer = Tracer()
+    with tracer.span("launch", "browser", pool="storefront"):
+        pass
+    assert tracer.events[0]["args"] == {"pool": "storefront"}
+    assert tracer.by_tc() == {}
+
+
+def test_workers_write_their_own_trace(monkeypatch):
+    monkeypatch.delenv("QT_WORKER_ID", raising=False)
+    assert trace_path("trace.json") == "trace.json"
+    monkeypatch.setenv("QT_WORKER_ID", "worker-1")
+    assert trace_path("out/trace.json") == "out/trace-worker-1.json"
+    assert trace_path("out/trace") == "out/trace-worker-1.json"
+
+
+def test_trace_file_has_phase_fixture_and_sleep_spans(pytester, monkeypatch):
+    monkeypatch.delenv("QT_WORKER_ID", raising=False)
+    trace_file = pytester.path / "trace.json"
+    pytester.makeconftest("""
+        import pytest
+
+        from quality_tracker.tracing import TraceReport
+
+
+        def pytest_configure(config):
+            config.pluginmanager.register(TraceReport(%r), "trace")
+
+
+        @pytest.fixture
+        def browser():
+            yield "browser"
+    """ % str(trace_file))
+    pytester.makepyfile("""
+        import time
+
+
+        def test_login_TC_001(browser):
+            time.sleep(0.01)
+
+
+        def test_helper():
+            pass
+    """)
+    result = pytester.runpytest("-p", "no:cacheprovider")
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["*trace*", "* spans written to *trace.json", "  TC_001 *"])
+
+    with open(trace_file) as f:
+        document = json.load(f)
+    events = document["traceEvents"]
+    assert events[0] == {"name": "process_name", "ph": "M", "pid": events[1]["pid"], "args": {"name": "pytest"}}
+    login = [(event["name"], event["cat"]) for event in events[1:] if event["args"].get("tcIds") == ["TC_001"]]
+    assert login == [
+        ("setup browser", "fixture"), ("setup test_login_TC_001", "setup"),
+        ("time.sleep", "sleep"), ("call test_login_TC_001", "call"),
+        ("teardown browser", "fixture"), ("teardown test_login_TC_001", "teardown"),
+    ]
+    sleep = next(event for event in events[1:] if event["cat"] == "sleep")
+    assert sleep["dur"] >= 10000 and sleep["args"]["seconds"] == 0.01
+    # The plugin put time.sleep back and switched tracing off
+    assert tracing.tracer() is None
@@ -0,0 +1,114 @@
+"""Unit tests of the condition-based waits (quality_tracker.waits), no browser needed."""
+
+import pytest
+
+from quality_tracker import waits
+from quality_tracker.waits import DEFAULT_TIMEOUT, MAX_TIMEOUT, MIN_SAMPLES, POLL_MAX, POLL_MIN, WaitHistory
+
+
+class FakeClock:
+    """Stands in for the ``time`` module inside waits: sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 4))
+        self.now += seconds
+
+
+def _after(seconds, clock, name="sample condition", value="ready"):
+    # A condition met once the fake clock reaches ``seconds``
+    def condition(driver):
+        return value if clock.now >= seconds else None
+
+    condition.name = name
+    condition.timeout = 4.0
+    return condition
+
+
+def test_timeout_never_drops_below_the_condition_default(tmp_path):
+    history = WaitHistory(str(tmp_path / "waits.json"))
+    for _ in range(MIN_SAMPLES):
+        history.record("fast", 0.01)
+    assert history.timeout("fast", default=4.0) == 4.0
+    assert history.timeout("unknown") == DEFAULT_TIMEOUT
+
+
+def test_timeout_grows_after_a_recorded_timeout_and_is_capped(tmp_path):
+    history = WaitHistory(str(tmp_path / "waits.json"))
+    for _ in range(MIN_SAMPLES):
+        history.record("slow", 0.5)
+    assert history.timeout("slow", default=1.0) == 1.5
+    history.record("slow", 1.5)
+    assert history.timeout("slow", default=1.0) == 4.5
+    history.record("slow", 20.0)
+    assert history.timeout("slow", default=1.0) == MAX_TIMEOUT
+
+
+def test_interval_is_a_quarter_of_the_typical_wait_within_bounds(tmp_path):
+    history = WaitHistory(str(tmp_path / "waits.json"))
+    assert history.interval("new") == POLL_MIN
+    for seconds in (0.4, 0.8, 1.2):
+        history.record("medium", seconds)
+    assert history.interval("medium") == pytest.approx(0.2)
+    history.record("tiny", 0.01)
+    assert history.interval("tiny") == POLL_MIN
+    history.record("huge", 60)
+    assert history.interval("huge") == POLL_MAX
+
+
+def test_history_save_merges_with_other_workers(tmp_path):
+    path = str(tmp_path / "waits.json")
+    first, second = WaitHistory(path), WaitHistory(path)
+    first.record("shared", 1.0)
+    second.record("shared", 2.0)
+    first.save()
+    second.save()
+    assert WaitHistory(path).samples == {"shared": [1.0, 2.0]}
+
+
+def test_poll_backs_off_geometrically_up_to_the_deadline(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(waits, "time", clock)
+    value, polls, elapsed = waits._poll(None, _after(1.0, clock), 5.0, 0.1, ())
+    assert value == "ready"
+    assert clock.sleeps == [0.1, 0.15, 0.225, 0.3375, 0.5]
+    assert (polls, elapsed) == (6, pytest.approx(1.3125))
+
+    clock.now, clock.sleeps = 0.0, []
+    value, polls, elapsed = waits._poll(None, _after(99, clock), 0.3, 0.1, ())
+    assert value is None and elapsed == pytest.approx(0.3)
+    assert clock.sleeps == [0.1, 0.15, 0.05]
+
+
+def test_wait_until_records_timeouts_so_the_next_wait_is_longer(tmp_path, monkeypatch):
+    pytest.importorskip("selenium")
+    from selenium.common.exceptions import TimeoutException
+
+    clock = FakeClock()
+    monkeypatch.setattr(waits, "time", clock)
+    history = WaitHistory(str(tmp_path / "waits.json"))
+    monkeypatch.setattr(waits, "_history", history)
+    monkeypatch.setattr(waits, "_recorder", None)
+    condition = _after(0.5, clock, "fast condition")
+    for _ in range(MIN_SAMPLES):
+        clock.now = 0.0
+        assert waits.wait_until(None, condition) == "ready"
+    # Fast successes do not shorten the condition's own timeout
+    assert history.timeout(condition.name, condition.timeout) == condition.timeout
+
+    slow = _after(30.0, clock, "slow condition")
+    clock.now = 0.0
+    with pytest.raises(TimeoutException):
+        waits.wait_until(None, slow)
+    assert history.samples[slow.name] == [pytest.approx(4.0)]
+    for _ in range(MIN_SAMPLES - 1):
+        clock.now = 0.0
+        assert waits.wait_until(None, slow, required=False) is None
+    # Every timeout was recorded at 4s, so the learned timeout is 3 x 4s
+    assert history.timeout(slow.name, slow.timeout) == pytest.approx(12.0)
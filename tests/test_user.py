@@ -1,69 +1,45 @@
 import pytest
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
+from selenium.common.exceptions import TimeoutException
+
+from quality_tracker.locators import PRODUCT, click
+from quality_tracker.pages import HomePage, LoginPage, ProductPage, SearchResultsPage, WishlistPage
+from quality_tracker.waits import (
+    any_of,
+    cart_count_changed,
+    element_count_below,
+    element_present,
+    route_changed,
+    success_alert,
+    wait_until,
+)
 
 class TestOpenCart:
     @pytest.fixture
-    def browser(self):
-        # Setup - create a browser instance
-        driver = webdriver.Chrome()  # You can change to Firefox, Edge, etc.
-        driver.maximize_window()
-        driver.get("https://demo.opencart.com.gr/")  # Change URL if your OpenCart is hosted elsewhere
-        yield driver
-        # Teardown - close the browser
-        driver.quit()
+    def browser(self, storefront_browser):
+        # Setup - lease a warm browser from the worker's pool (see tests/conftest.py),
+        # already reset and sitting on the home page. Mark a test with
+        # @pytest.mark.fresh_browser if it needs a brand-new Chrome process.
+        yield storefront_browser
+        # Teardown - the pool resets the browser and keeps it for the next test
     
     
     def test_homepage_loads_TC_001(self):       
         assert 1==2
     
+    @pytest.mark.shared_browser
     def test_product_search_TC_002(self, browser):
         """[TC-002] Test the product search functionality"""
-        # Enter search term
+        # Enter search term and submit it (button, or Enter if no button works)
         search_term = "phone"
-        search_box = browser.find_element(By.NAME, "search")
-        search_box.clear()
-        search_box.send_keys(search_term)
-        
-        # Try different ways to submit the search
-        try:
-            # First try to find search button using various common selectors
-            for selector in [
-                "button[type='button'][class*='btn']",  # Common in newer versions
-                ".btn-default",  # Used in some themes
-                "button.btn",    # Generic bootstrap button
-                "#search button", # Button inside search element
-                "//div[@id='search']//button",  # XPath alternative
-            ]:
-                try:
-                    # Try CSS selector first
-                    if "//" not in selector:
-                        search_button = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        # If it contains //, treat as XPath
-                        search_button = browser.find_element(By.XPATH, selector)
-                    search_button.click()
-                    break
-                except NoSuchElementException:
-                    continue
-        except:
-            # If all button selectors fail, try pressing Enter
-            search_box.send_keys(Keys.RETURN)
+        results = SearchResultsPage(browser).search(search_term)
         
         # Wait for search results page to load
         try:
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "content"))
-            )
+            wait_until(browser, element_present((By.ID, "content")))
             
-            # Get the page source after search
-            page_source = browser.page_source.lower()
-            search_content = browser.find_element(By.ID, "content").text.lower()
+            # Get the results content after search
+            search_content = results.content_text().lower()
             
             # Check if either search term is in the results or we have search results page
             assert (search_term.lower() in search_content or 
@@ -74,95 +50,44 @@ class TestOpenCart:
             pytest.fail("Search results did not load within the timeout period")
     
     
+    # A guest cart lives in the browser context's own cookies, so this only
+    # reads the catalog as far as other tests can tell
+    @pytest.mark.shared_browser
     def test_add_to_cart_TC_003(self, browser):
         """[TC-003] Test adding a product to the cart"""
         try:
             # First try to navigate to a product category
-            category_links = browser.find_elements(By.CSS_SELECTOR, "#menu a")
-            for link in category_links:
-                try:
-                    if link.is_displayed():
-                        link.click()
-                        break
-                except:
-                    continue
+            home = HomePage(browser)
+            items_before = home.state.cart_items
+            home.open_category()
             
             # Wait for page to load
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "content"))
-            )
+            wait_until(browser, element_present((By.ID, "content")))
             
             # Try to find a product to click on
-            product_selectors = [
-                ".product-layout:first-child",
-                ".product-thumb:first-child",
-                ".product:first-child",
-                "//div[contains(@class, 'product')]"
-            ]
-            
-            for selector in product_selectors:
-                try:
-                    if "//" not in selector:
-                        browser.find_element(By.CSS_SELECTOR, selector).click()
-                    else:
-                        browser.find_element(By.XPATH, selector).click()
-                    break
-                except:
-                    continue
+            click(browser, PRODUCT)
                     
             # Wait for product page to load
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "product"))
-            )
+            wait_until(browser, element_present((By.ID, "product")))
             
-            # Get product name for verification later
-            try:
-                product_name = browser.find_element(By.CSS_SELECTOR, "h1").text
-            except:
-                product_name = "Product"  # Fallback if we can't get the name
+            # Get product name for verification later ("Product" if there is no heading)
+            product = ProductPage(browser)
+            product_name = product.name
             
             # Try to find and click the add to cart button
-            cart_button_selectors = [
-                "#button-cart",
-                "button[id*='cart']",
-                "//button[contains(@id, 'cart')]",
-                "//button[contains(text(), 'Add to Cart')]"
-            ]
-            
-            for selector in cart_button_selectors:
-                try:
-                    if "//" not in selector:
-                        add_to_cart_button = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        add_to_cart_button = browser.find_element(By.XPATH, selector)
-                    add_to_cart_button.click()
-                    break
-                except:
-                    continue
+            product.add_to_cart()
             
             # Wait for success message or cart update
-            time.sleep(2)  # Short wait for the cart to update
+            wait_until(browser, any_of(success_alert(), cart_count_changed(items_before)), required=False)
             
-            # Try to verify the cart was updated - either via alert or cart icon
-            success = False
-            try:
-                # Check for success message
-                alerts = browser.find_elements(By.CSS_SELECTOR, ".alert")
-                for alert in alerts:
-                    if "success" in alert.get_attribute("class").lower():
-                        success = True
-                        break
-            except:
-                pass
+            # Try to verify the cart was updated - either via alert or cart icon,
+            # both read in one snapshot of the page
+            state = product.refresh()
+            success = bool(state.success_alerts())
                 
             if not success:
                 # Check if cart has items
-                try:
-                    cart_total = browser.find_element(By.CSS_SELECTOR, "#cart-total")
-                    assert "0 item" not in cart_total.text.lower(), "Cart should contain items"
-                    success = True
-                except:
-                    pass
+                success = bool(state.cart_items)
                     
             # Final assertion
             assert success, "Should have evidence that product was added to cart"
@@ -175,126 +100,35 @@ class TestOpenCart:
         """[TC-004] Test the user login functionality"""
         try:
             # Navigate to account/login page
-            # First find the My Account dropdown
-            account_links = [
-                "#top-links a[title='My Account']",
-                ".dropdown:contains('My Account')",
-                "//a[contains(text(), 'My Account')]",
-                "//a[contains(@title, 'My Account')]"
-            ]
-            
-            # Try all possible selectors for My Account dropdown
-            for selector in account_links:
-                try:
-                    if "//" not in selector:
-                        my_account = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        my_account = browser.find_element(By.XPATH, selector)
-                    my_account.click()
-                    break
-                except:
-                    continue
-            
-            # Small wait for dropdown to appear
-            time.sleep(1)
-            
-            # Try to find and click Login
-            login_links = [
-                "a:contains('Login')",
-                "//a[contains(text(), 'Login')]",
-                "#top-links a[href*='login']",
-                "//a[contains(@href, 'login')]"
-            ]
-            
-            for selector in login_links:
-                try:
-                    if "//" not in selector:
-                        login_link = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        login_link = browser.find_element(By.XPATH, selector)
-                    login_link.click()
-                    break
-                except:
-                    continue
+            # Open the My Account dropdown and click Login
+            login_page = LoginPage(browser)
+            login_page.open_from_menu()
             
             # Alternative: Try direct navigation if dropdown approach fails
             try:
-                WebDriverWait(browser, 5).until(
-                    EC.presence_of_element_located((By.ID, "content"))
-                )
+                wait_until(browser, element_present((By.ID, "content")), timeout=5)
                 
                 # Check if we're on login page
                 if "login" not in browser.current_url:
-                    browser.get("https://demo.opencart.com.gr/index.php?route=account/login")
+                    login_page.open()
             except:
-                browser.get("https://demo.opencart.com.gr/index.php?route=account/login")
+                login_page.open()
             
             # Wait for login form to load
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "content"))
-            )
-            
-            # Fill out the login form - use demo account credentials
-            # Email - assuming default OpenCart demo credentials, adjust if needed
-            email_field = browser.find_element(By.ID, "input-email")
-            email_field.clear()
-            email_field.send_keys("demo@opencart.com")  # Replace with actual test account email
-            
-            # Password
-            password_field = browser.find_element(By.ID, "input-password")
-            password_field.clear() 
-            password_field.send_keys("demo1234")  # Replace with actual test account password
-            
-            # Submit the form
-            submit_button_selectors = [
-                "input[type='submit']",
-                ".btn-primary",
-                "button[type='submit']",
-                "//input[@type='submit']",
-                "//button[@type='submit']",
-                "//button[contains(text(), 'Login')]",
-                "//input[contains(@value, 'Login')]"
-            ]
-            
-            for selector in submit_button_selectors:
-                try:
-                    if "//" not in selector:
-                        submit_button = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        submit_button = browser.find_element(By.XPATH, selector)
-                    submit_button.click()
-                    break
-                except:
-                    continue
+            wait_until(browser, element_present((By.ID, "content")))
+            
+            # Fill out and submit the login form - use demo account credentials
+            # (assuming default OpenCart demo credentials, adjust if needed)
+            login_url = login_page.login("demo@opencart.com", "demo1234")
             
             # Wait for login to complete (success means being redirected to account page)
+            wait_until(browser, route_changed(login_url), required=False)
             try:
                 # Wait for page to load after form submission
-                WebDriverWait(browser, 10).until(
-                    EC.presence_of_element_located((By.ID, "content"))
-                )
+                wait_until(browser, element_present((By.ID, "content")))
                 
                 # Check for login success - either by URL or page content
-                success = False
-                
-                # Check URL for account area
-                if "account" in browser.current_url and "login" not in browser.current_url:
-                    success = True
-                
-                # Check page content for account page indicators
-                if not success:
-                    account_indicators = [
-                        "My Account",
-                        "Account Dashboard",
-                        "My Orders",
-                        "Logout"
-                    ]
-                    
-                    page_content = browser.find_element(By.ID, "content").text
-                    for indicator in account_indicators:
-                        if indicator in page_content:
-                            success = True
-                            break
+                success = login_page.logged_in()
                 
                 assert success, "Login should complete successfully and redirect to account area"
                 
@@ -307,131 +141,40 @@ class TestOpenCart:
         """Helper method to log in to OpenCart"""
         try:
             # Navigate to login page
-            # First find the My Account dropdown
-            account_links = [
-                "#top-links a[title='My Account']",
-                ".dropdown:contains('My Account')",
-                "//a[contains(text(), 'My Account')]",
-                "//a[contains(@title, 'My Account')]"
-            ]
-            
-            # Try all possible selectors for My Account dropdown
-            for selector in account_links:
-                try:
-                    if "//" not in selector:
-                        my_account = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        my_account = browser.find_element(By.XPATH, selector)
-                    my_account.click()
-                    break
-                except:
-                    continue
-            
-            # Small wait for dropdown to appear
-            time.sleep(1)
-            
-            # Try to find and click Login
-            login_links = [
-                "a:contains('Login')",
-                "//a[contains(text(), 'Login')]",
-                "#top-links a[href*='login']",
-                "//a[contains(@href, 'login')]"
-            ]
-            
-            for selector in login_links:
-                try:
-                    if "//" not in selector:
-                        login_link = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        login_link = browser.find_element(By.XPATH, selector)
-                    login_link.click()
-                    break
-                except:
-                    continue
+            # Open the My Account dropdown and click Login
+            login_page = LoginPage(browser)
+            login_page.open_from_menu()
             
             # Alternative: Try direct navigation if dropdown approach fails
             try:
-                WebDriverWait(browser, 5).until(
-                    EC.presence_of_element_located((By.ID, "content"))
-                )
+                wait_until(browser, element_present((By.ID, "content")), timeout=5)
                 
                 # Check if we're on login page
                 if "login" not in browser.current_url:
-                    browser.get("https://demo.opencart.com.gr/index.php?route=account/login")
+                    login_page.open()
             except:
-                browser.get("https://demo.opencart.com.gr/index.php?route=account/login")
+                login_page.open()
             
             # Wait for login form to load
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "content"))
-            )
-            
-            # Fill out the login form - use demo account credentials
-            # Email - assuming default OpenCart demo credentials, adjust if needed
-            email_field = browser.find_element(By.ID, "input-email")
-            email_field.clear()
-            email_field.send_keys("demo@opencart.com")  # Replace with actual test account email
-            
-            # Password
-            password_field = browser.find_element(By.ID, "input-password")
-            password_field.clear() 
-            password_field.send_keys("demo1234")  # Replace with actual test account password
-            
-            # Submit the form
-            submit_button_selectors = [
-                "input[type='submit']",
-                ".btn-primary",
-                "button[type='submit']",
-                "//input[@type='submit']",
-                "//button[@type='submit']",
-                "//button[contains(text(), 'Login')]",
-                "//input[contains(@value, 'Login')]"
-            ]
-            
-            for selector in submit_button_selectors:
-                try:
-                    if "//" not in selector:
-                        submit_button = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        submit_button = browser.find_element(By.XPATH, selector)
-                    submit_button.click()
-                    break
-                except:
-                    continue
+            wait_until(browser, element_present((By.ID, "content")))
+            
+            # Fill out and submit the login form - use demo account credentials
+            # (assuming default OpenCart demo credentials, adjust if needed)
+            login_url = login_page.login("demo@opencart.com", "demo1234")
             
             # Wait for login to complete (success means being redirected to account page)
+            wait_until(browser, route_changed(login_url), required=False)
             try:
                 # Wait for page to load after form submission
-                WebDriverWait(browser, 10).until(
-                    EC.presence_of_element_located((By.ID, "content"))
-                )
+                wait_until(browser, element_present((By.ID, "content")))
                 
                 # Check for login success - either by URL or page content
-                success = False
-                
-                # Check URL for account area
-                if "account" in browser.current_url and "login" not in browser.current_url:
-                    success = True
-                
-                # Check page content for account page indicators
-                if not success:
-                    account_indicators = [
-                        "My Account",
-                        "Account Dashboard",
-                        "My Orders",
-                        "Logout"
-                    ]
-                    
-                    page_content = browser.find_element(By.ID, "content").text
-                    for indicator in account_indicators:
-                        if indicator in page_content:
-                            success = True
-                            break
+                success = login_page.logged_in()
                 
                 assert success, "Login should complete successfully and redirect to account area"
                 
                 # Return to homepage
-                browser.get("https://demo.opencart.com.gr/")
+                HomePage(browser).open()
                 
             except TimeoutException:
                 pytest.fail("Login completion page did not load within timeout period")
@@ -440,152 +183,63 @@ class TestOpenCart:
             pytest.fail(f"Failed to complete user login: {str(e)}")
         
    
+    @pytest.mark.session("customer")
     def test_wishlist_functionality_TC_005(self, browser):
         """[TC-005] Test adding a product to the wishlist"""
         try:
-            # First, login to the account
-            self.login(browser)
-            
-            # Then navigate to a product
-            # Try to find a featured product on homepage
-            product_selectors = [
-                ".product-layout",
-                ".product-thumb",
-                "//div[contains(@class, 'product-layout')]",
-                "//div[contains(@class, 'product-thumb')]"
-            ]
-            
-            product_found = False
-            for selector in product_selectors:
-                try:
-                    products = browser.find_elements(By.XPATH if "//" in selector else By.CSS_SELECTOR, selector)
-                    if products and len(products) > 0:
-                        # Click the first product
-                        products[0].click()
-                        product_found = True
-                        break
-                except:
-                    continue
+            # The session marker starts the test logged in, on the home page
             
-            # If no product found on homepage, try to browse a category
+            # Navigate to a product
+            # Try to find a featured product on homepage and click the first one
+            home = HomePage(browser)
+            product_found = home.open_first_product()
+            
+            # If no product found on homepage, try to browse the categories
             if not product_found:
                 try:
-                    # Try to click on a category
-                    categories = browser.find_elements(By.CSS_SELECTOR, "#menu a")
-                    for category in categories:
-                        if category.is_displayed():
-                            category.click()
-                            # Try to find a product in category page
-                            WebDriverWait(browser, 10).until(
-                                EC.presence_of_element_located((By.ID, "content"))
-                            )
-                            for selector in product_selectors:
-                                try:
-                                    products = browser.find_elements(By.XPATH if "//" in selector else By.CSS_SELECTOR, selector)
-                                    if products and len(products) > 0:
-                                        products[0].click()
-                                        product_found = True
-                                        break
-                                except:
-                                    continue
-                            if product_found:
-                                break
+                    for index in range(len(home.state.menu_links)):
+                        if index:
+                            home.open()
+                        home.open_category(index)
+                        # Try to find a product in category page
+                        wait_until(browser, element_present((By.ID, "content")))
+                        product_found = home.open_first_product()
+                        if product_found:
+                            break
                 except:
                     # If all fails, try direct product URL
-                    browser.get("https://demo.opencart.com.gr/index.php?route=product/product&product_id=43")
+                    ProductPage(browser, product_id=43).open()
                     product_found = True
             
             # Wait for product page to load
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "product"))
-            )
+            wait_until(browser, element_present((By.ID, "product")))
             
-            # Get product name for verification
-            try:
-                product_name = browser.find_element(By.CSS_SELECTOR, "h1").text
-            except:
-                product_name = "Product"  # Fallback
+            # Get product name for verification ("Product" if there is no heading)
+            product = ProductPage(browser)
+            product_name = product.name
             
             # Try to find and click add to wishlist button
-            wishlist_button_selectors = [
-                "button[data-original-title='Add to Wish List']",
-                "button[title='Add to Wish List']",
-                ".fa-heart",
-                "button[onclick*='wishlist']",
-                "//button[contains(@onclick, 'wishlist')]",
-                "//button[contains(@data-original-title, 'Wish List')]",
-                "//button[contains(@title, 'Wish List')]",
-                "//i[contains(@class, 'fa-heart')]/.."
-            ]
-            
-            wishlist_clicked = False
-            for selector in wishlist_button_selectors:
-                try:
-                    if "//" not in selector:
-                        wishlist_button = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        wishlist_button = browser.find_element(By.XPATH, selector)
-                    wishlist_button.click()
-                    wishlist_clicked = True
-                    break
-                except:
-                    continue
+            wishlist_clicked = product.add_to_wishlist()
             
             assert wishlist_clicked, "Should be able to click wishlist button"
             
             # Wait for success message
-            time.sleep(2)
+            wait_until(browser, success_alert("wish list"), required=False)
             
             # Check for success message
-            success = False
-            try:
-                alerts = browser.find_elements(By.CSS_SELECTOR, ".alert")
-                for alert in alerts:
-                    alert_text = alert.text.lower()
-                    if "success" in alert.get_attribute("class").lower() and "wish list" in alert_text:
-                        success = True
-                        break
-            except:
-                pass
+            success = bool(product.refresh().success_alerts("wish list"))
             
             # If no success message, try to navigate to wishlist to verify
             if not success:
-                # Wait a moment for any animations/processes to complete
-                time.sleep(2)
-                
-                # Try to navigate to wishlist
-                wishlist_page_selectors = [
-                    "a[title='Wish List']",
-                    "#wishlist-total",
-                    "//a[contains(@title, 'Wish List')]",
-                    "//a[contains(text(), 'Wish List')]"
-                ]
-                
-                wishlist_nav_clicked = False
-                for selector in wishlist_page_selectors:
-                    try:
-                        if "//" not in selector:
-                            wishlist_link = browser.find_element(By.CSS_SELECTOR, selector)
-                        else:
-                            wishlist_link = browser.find_element(By.XPATH, selector)
-                        wishlist_link.click()
-                        wishlist_nav_clicked = True
-                        break
-                    except:
-                        continue
-                
-                # If navigation didn't work, try direct URL
-                if not wishlist_nav_clicked:
-                    browser.get("https://demo.opencart.com.gr/index.php?route=account/wishlist")
+                # Try the header link to the wishlist, or its URL
+                wishlist = WishlistPage(browser).open_from_header()
                 
                 # Wait for wishlist page to load
                 try:
-                    WebDriverWait(browser, 10).until(
-                        EC.presence_of_element_located((By.ID, "content"))
-                    )
+                    wait_until(browser, element_present((By.ID, "content")))
                     
                     # Check if wishlist contains our product
-                    page_content = browser.find_element(By.ID, "content").text
+                    page_content = wishlist.content_text()
                     if "wish list" in page_content.lower() and (product_name in page_content or "product" in page_content.lower()):
                         success = True
                 except:
@@ -597,131 +251,46 @@ class TestOpenCart:
             pytest.fail(f"Failed to add product to wishlist: {str(e)}")
 
     
+    @pytest.mark.session("customer")
     def test_remove_from_wishlistTC_006(self, browser):
         """[TC-006] Test removing a product from the wishlist"""
         try:
             # First add a product to wishlist
             self.test_wishlist_functionality(browser)
             
-            # Navigate to wishlist page
-            wishlist_page_selectors = [
-                "a[title='Wish List']",
-                "#wishlist-total",
-                "//a[contains(@title, 'Wish List')]",
-                "//a[contains(text(), 'Wish List')]"
-            ]
-            
-            wishlist_nav_clicked = False
-            for selector in wishlist_page_selectors:
-                try:
-                    if "//" not in selector:
-                        wishlist_link = browser.find_element(By.CSS_SELECTOR, selector)
-                    else:
-                        wishlist_link = browser.find_element(By.XPATH, selector)
-                    wishlist_link.click()
-                    wishlist_nav_clicked = True
-                    break
-                except:
-                    continue
-            
-            # If navigation didn't work, try direct URL
-            if not wishlist_nav_clicked:
-                browser.get("https://demo.opencart.com.gr/index.php?route=account/wishlist")
+            # Navigate to wishlist page (header link, or its URL)
+            wishlist = WishlistPage(browser).open_from_header()
             
             # Wait for wishlist page to load
-            WebDriverWait(browser, 10).until(
-                EC.presence_of_element_located((By.ID, "content"))
-            )
+            wait_until(browser, element_present((By.ID, "content")))
             
             # Get the number of products in wishlist before removal
-            products_before = 0
-            try:
-                # Look for table rows in wishlist
-                wishlist_rows = browser.find_elements(By.CSS_SELECTOR, ".table-responsive tr")
-                # Subtract header row if present
-                products_before = len(wishlist_rows) - 1 if len(wishlist_rows) > 0 else 0
-            except:
-                # Alternative method if table structure is different
-                try:
-                    wishlist_items = browser.find_elements(By.CSS_SELECTOR, ".product-layout")
-                    products_before = len(wishlist_items)
-                except:
-                    # Default to 1 if we can't determine the count
-                    products_before = 1
-            
-            # Try to find and click remove button
-            remove_button_selectors = [
-                "a[data-original-title='Remove']",
-                "a[title='Remove']",
-                ".fa-times",
-                "button[onclick*='remove']",
-                "//a[contains(@onclick, 'remove')]",
-                "//i[contains(@class, 'fa-times')]/.."
-            ]
-            
-            remove_clicked = False
-            for selector in remove_button_selectors:
-                try:
-                    if "//" not in selector:
-                        remove_buttons = browser.find_elements(By.CSS_SELECTOR, selector)
-                    else:
-                        remove_buttons = browser.find_elements(By.XPATH, selector)
-                    
-                    if remove_buttons and len(remove_buttons) > 0:
-                        # Click the first remove button
-                        remove_buttons[0].click()
-                        remove_clicked = True
-                        break
-                except:
-                    continue
+            products_before = wishlist.product_count
+            
+            # Try to find and click the first remove button
+            remove_clicked = wishlist.remove_first()
             
             assert remove_clicked, "Should be able to click remove button"
             
-            # Wait for page to refresh
-            time.sleep(2)
+            # Wait for the success message or the row to disappear
+            wait_until(browser, any_of(
+                success_alert("removed"),
+                element_count_below((By.CSS_SELECTOR, ".table-responsive tr"), products_before + 1),
+            ), required=False)
             
-            # Verify product was removed
+            # Verify product was removed, from one snapshot of the page
+            wishlist.refresh()
             # Option 1: Check for success message
-            success = False
-            try:
-                alerts = browser.find_elements(By.CSS_SELECTOR, ".alert")
-                for alert in alerts:
-                    alert_text = alert.text.lower()
-                    if "success" in alert.get_attribute("class").lower() and "removed" in alert_text:
-                        success = True
-                        break
-            except:
-                pass
+            success = bool(wishlist.state.success_alerts("removed"))
             
             # Option 2: Check if number of products decreased
             if not success:
-                try:
-                    # Look for table rows in wishlist
-                    wishlist_rows = browser.find_elements(By.CSS_SELECTOR, ".table-responsive tr")
-                    # Subtract header row if present
-                    products_after = len(wishlist_rows) - 1 if len(wishlist_rows) > 0 else 0
-                    
-                    if products_after < products_before:
-                        success = True
-                except:
-                    # Alternative method if table structure is different
-                    try:
-                        wishlist_items = browser.find_elements(By.CSS_SELECTOR, ".product-layout")
-                        products_after = len(wishlist_items)
-                        
-                        if products_after < products_before:
-                            success = True
-                    except:
-                        pass
+                success = wishlist.product_count < products_before
             
             # Option 3: Check for "empty wishlist" message
             if not success:
-                try:
-                    page_content = browser.find_element(By.ID, "content").text.lower()
-                    if "empty" in page_content and "wishlist" in page_content:
-                        success = True
-                except:
-                    pass
+                page_content = wishlist.content_text().lower()
+                success = "empty" in page_content and "wishlist" in page_content
             
             assert success, "Product should be removed from wishlist successfully"
                 